@@ -0,0 +1,160 @@
+import numpy
+
+import graph
+import qtable
+import train
+
+# A batch training session plays many independent games in lockstep,
+# advancing every game by one move per step with NumPy operations over the whole batch.
+# The semantics of a single game are the same as train.runEpisode with train.SARSA or train.QLearning,
+# which remain the reference implementations.
+#
+# Games are described by dense state indices of qtable.States, and players by their index in Players,
+# and are played on the precomputed tables of the graph module.
+# The action-value functions must be qtable.ArrayActionValueFunc or one of its subclasses,
+# whose values arrays are updated in place.
+#
+# Since all games of a step are updated at once, several games may update the same (state, action) pair in one step.
+# Such conflicts are resolved by averaging: the TD errors of all conflicting updates are computed from the scores before the step,
+# and the pair moves by the mean of their increments, alpha*(target - Q).
+# The result does not depend on the order of games in the batch,
+# and a score never moves by more than alpha times the largest TD error, no matter how many games collide.
+
+# Players are the players of a game, in the order of their indices in the tables of the graph module.
+Players = graph.Players
+
+# _offsets caches the offsets of scores in the values arrays of each kind of action-value function.
+_offsets = {}
+
+# offsets returns an array whose element [i, pos] is the position in q.values of the score of position pos in the state with index i.
+def offsets(q):
+  if q.__class__ not in _offsets:
+    _offsets[q.__class__] = numpy.array(graph.offsets(q), dtype=numpy.int64).reshape(qtable.NumStates, 9)
+  return _offsets[q.__class__]
+
+
+# BatchEpisodes is a batch of games played in lockstep between two action-value functions.
+# When a game ends, a new one is started in its place in the next step, with the player who moves first chosen randomly as in train.run.
+class BatchEpisodes:
+  def __init__(self, algo, circle, cross, batchSize, epsilon, alpha, gamma, rng):
+    if algo != train.SARSA and algo != train.QLearning:
+      raise ValueError("unexpected algorithm: %s" % algo)
+    self.algo = algo
+    self.values = [numpy.frombuffer(q.values, dtype=numpy.float64) for q in (circle, cross)]
+    self.offsets = [offsets(q) for q in (circle, cross)]
+    self.epsilon = epsilon
+    self.alpha = alpha
+    self.gamma = gamma
+    self.rng = rng
+
+    # state and mover are the current state and the player to move in each game.
+    self.state = numpy.zeros(batchSize, dtype=numpy.int32)
+    self.mover = rng.randint(len(Players), size=batchSize)
+    # pendingState[p] and pendingAction[p] are the last move of player p in each game,
+    # whose update is deferred until the opponent has moved, or -1 if player p has not moved yet.
+    self.pendingState = numpy.full((len(Players), batchSize), -1, dtype=numpy.int32)
+    self.pendingAction = numpy.full((len(Players), batchSize), -1, dtype=numpy.int32)
+
+  # scores returns the scores of all positions of states, each with respect to the corresponding player in players.
+  def scores(self, states, players):
+    res = numpy.empty((len(states), 9))
+    for p in range(len(Players)):
+      sel = players == p
+      res[sel] = self.values[p][self.offsets[p][states[sel]]]
+    return res
+
+  # chooseActions is the batched equivalent of tictactoe.chooseAction, states must not be terminal.
+  # Ties among the best positions are broken uniformly at random.
+  def chooseActions(self, states, players, epsilon):
+    scores = self.scores(states, players)
+    noise = self.rng.random_sample(scores.shape)
+    top = scores.max(axis=1)[:, numpy.newaxis]
+    actions = numpy.where(scores == top, noise, -1).argmax(axis=1)
+
+    explore = self.rng.random_sample(len(states)) < epsilon
+    if explore.any():
+      actions[explore] = numpy.where(graph.legal[states[explore]], noise[explore], -1).argmax(axis=1)
+    return actions
+
+  # targets returns the TD targets of players having observed newStates, according to the training algorithm.
+  def targets(self, newStates, players):
+    reward = graph.rewards[newStates, players]
+    end = graph.terminal[newStates]
+    newQ = numpy.zeros(len(newStates))
+    if self.algo == train.SARSA:
+      newQ[end] = reward[end]
+      cont = ~end
+      if cont.any():
+        s = newStates[cont]
+        p = players[cont]
+        a = self.chooseActions(s, p, self.epsilon)
+        newQ[cont] = self.scores(s, p)[numpy.arange(len(s)), a]
+    else:
+      cont = ~end
+      if cont.any():
+        newQ[cont] = self.scores(newStates[cont], players[cont]).max(axis=1)
+    return reward + self.gamma*newQ
+
+  # learn updates the scores of (states, actions) pairs of players towards targets,
+  # resolving conflicting updates of the same pair by averaging.
+  def learn(self, states, actions, players, targets):
+    for p in range(len(Players)):
+      sel = players == p
+      if not sel.any():
+        continue
+      values = self.values[p]
+      flat = self.offsets[p][states[sel], actions[sel]]
+      delta = self.alpha * (targets[sel] - values[flat])
+      uniq, inverse = numpy.unique(flat, return_inverse=True)
+      values[uniq] += numpy.bincount(inverse, delta) / numpy.bincount(inverse)
+
+  # step advances every game by one move and updates the action-value functions.
+  # It returns the number of games that have ended in this step.
+  def step(self):
+    # Start new games in place of the ones that have ended in the previous step.
+    ended = graph.terminal[self.state]
+    if ended.any():
+      self.state[ended] = 0
+      self.mover[ended] = self.rng.randint(len(Players), size=ended.sum())
+      self.pendingState[:, ended] = -1
+      self.pendingAction[:, ended] = -1
+
+    games = numpy.arange(len(self.state))
+    s = self.state
+    mover = self.mover
+    opponent = 1 - mover
+    a = self.chooseActions(s, mover, self.epsilon)
+    newState = graph.successors[s, mover, a]
+
+    # The opponent's last move is now followed by the new state, from which the opponent learns as in train.runEpisode.
+    pendingState = self.pendingState[opponent, games]
+    pendingAction = self.pendingAction[opponent, games]
+    learnOpponent = pendingState >= 0
+    # When the game ends, the mover learns from the terminal state immediately.
+    end = graph.terminal[newState]
+
+    learnStates = numpy.concatenate((pendingState[learnOpponent], s[end]))
+    learnActions = numpy.concatenate((pendingAction[learnOpponent], a[end]))
+    learnPlayers = numpy.concatenate((opponent[learnOpponent], mover[end]))
+    learnNewStates = numpy.concatenate((newState[learnOpponent], newState[end]))
+    if len(learnStates):
+      self.learn(learnStates, learnActions, learnPlayers, self.targets(learnNewStates, learnPlayers))
+
+    self.pendingState[mover, games] = s
+    self.pendingAction[mover, games] = a
+    self.state = newState
+    self.mover = opponent
+    return int(end.sum())
+
+
+# run trains two action-value functions of type qtable.ArrayActionValueFunc by playing batchSize games at a time,
+# until at least the given number of episodes have been completed.
+# The arguments algo, epsilon, alpha and gamma have the same meanings as in train.runEpisode,
+# and seed seeds the random number generator of the session.
+# The number of completed episodes is returned.
+def run(algo, circle, cross, episodes, batchSize=4096, epsilon=0.1, alpha=0.1, gamma=0.9, seed=None):
+  games = BatchEpisodes(algo, circle, cross, batchSize, epsilon, alpha, gamma, numpy.random.RandomState(seed))
+  completed = 0
+  while completed < episodes:
+    completed += games.step()
+  return completed
@@ -0,0 +1,79 @@
+import numpy
+import random
+import unittest
+
+from tictactoe import *
+import batch
+import graph
+import qtable
+import train
+
+class TestBatch(unittest.TestCase):
+
+  def testSameAsRunEpisode(self):
+    # Play a batch of a single game greedily, and replay its moves with train.runEpisode's update rules.
+    # With epsilon = 0 the SARSA target is the best score regardless of ties, so both must learn the same scores.
+    for algo in (train.SARSA, train.QLearning):
+      circle = qtable.ArrayActionValueFunc(PlayerCircle)
+      cross = qtable.ArrayActionValueFunc(PlayerCross)
+      games = batch.BatchEpisodes(algo, circle, cross, 1, 0.0, 0.5, 0.9, numpy.random.RandomState(1))
+
+      replay = {PlayerCircle: qtable.ArrayActionValueFunc(PlayerCircle), PlayerCross: qtable.ArrayActionValueFunc(PlayerCross)}
+      pending = {}
+      for _ in range(300):
+        s = games.state[0]
+        if graph.terminal[s]:
+          s = 0
+          pending = {}
+        games.step()
+        state = qtable.States[s]
+        newState = qtable.States[games.state[0]]
+        if newState.o != state.o:
+          player, opponent, bits = PlayerCircle, PlayerCross, newState.o ^ state.o
+        else:
+          player, opponent, bits = PlayerCross, PlayerCircle, newState.x ^ state.x
+        a = bits.bit_length() - 1
+
+        updates = []
+        if opponent in pending:
+          updates.append((replay[opponent], pending[opponent][0], pending[opponent][1], newState))
+        if newState.terminal():
+          updates.append((replay[player], state, a, newState))
+        for q, us, ua, un in updates:
+          if algo == train.SARSA:
+            train.SARSA(q, us, ua, un, 0.0, 0.5, 0.9)
+          else:
+            train.QLearning(q, us, ua, un, 0.5, 0.9)
+        pending[player] = (state, a)
+
+      for q in (circle, cross):
+        self.assertEqual(list(q.values), list(replay[q.player].values))
+
+
+  def testConflictAveraging(self):
+    circle = qtable.ArrayActionValueFunc(PlayerCircle)
+    cross = qtable.ArrayActionValueFunc(PlayerCross)
+    games = batch.BatchEpisodes(train.QLearning, circle, cross, 4, 0.1, 0.5, 0.9, numpy.random.RandomState(1))
+
+    # Three games update the same pair towards different targets in the same step, the fourth updates another pair.
+    states = numpy.array([0, 0, 0, 0])
+    actions = numpy.array([4, 4, 4, 0])
+    players = numpy.array([0, 0, 0, 0])
+    games.learn(states, actions, players, numpy.array([1.0, 0.0, -0.4, 1.0]))
+
+    # assert that the conflicting updates are averaged
+    self.assertAlmostEqual(circle.Q(BitState(), 4), 0.5 * 0.2)
+    self.assertAlmostEqual(circle.Q(BitState(), 0), 0.5)
+    self.assertEqual(cross.Q(BitState(), 4), ScoreDraw)
+
+
+  def testRun(self):
+    # assert that batch training learns to beat a random opponent.
+    for table in (qtable.ArrayActionValueFunc, qtable.SymmetricActionValueFunc):
+      circle = table(PlayerCircle)
+      cross = table(PlayerCross)
+      self.assertTrue(batch.run(train.QLearning, circle, cross, 50000, seed=1) >= 50000)
+
+      random.seed(1)
+      rpe = sum(train.rewardPerEpisode(circle, 1.0, BitState) for _ in range(500)) / 500
+      self.assertTrue(rpe > 0.6, rpe)
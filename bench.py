@@ -0,0 +1,277 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+import fastrandom
+import mnk
+import qtable
+import tictactoe
+import train
+
+# This module benchmarks the primitives that training spends its time in, and whole training sessions.
+# Each benchmark reports how many operations, or episodes, it performs per second.
+#
+# Primitives are run over all the non-terminal reachable states in turn, so that results are not skewed by a single state,
+# and each benchmark is repeated several times, keeping the fastest run, which is the least disturbed by other processes.
+# Results can be saved as JSON and compared with a saved baseline, so that slowdowns of the hot paths are caught.
+
+# StateClasses maps the names of State implementations to their classes.
+# MNKState is the general m,n,k engine of the mnk module on the Tic Tac Toe board.
+StateClasses = {"State": tictactoe.State, "BitState": tictactoe.BitState, "MNKState": mnk.Board(3, 3, 3)}
+
+# Tables are the combinations of action-value function storage and name of State implementation that are benchmarked.
+Tables = [
+  ("dict", tictactoe.ActionValueFunc, "State"),
+  ("dict", tictactoe.ActionValueFunc, "BitState"),
+  ("array", qtable.ArrayActionValueFunc, "BitState"),
+  ("symmetric", qtable.SymmetricActionValueFunc, "BitState"),
+  ("sparse", qtable.SparseActionValueFunc, "BitState"),
+  ("sparse", qtable.SparseActionValueFunc, "MNKState"),
+]
+
+# Algos maps the names of the training algorithms to their functions.
+Algos = {"sarsa": train.SARSA, "qlearning": train.QLearning}
+
+# Units of the results of benchmarks.
+OpsPerSecond = "ops/sec"
+EpisodesPerSecond = "episodes/sec"
+
+
+# _states returns the non-terminal reachable states in the State implementation stateClass.
+def _states(stateClass):
+  states = []
+  for state in qtable.States:
+    if state.terminal():
+      continue
+    s = state
+    if isinstance(stateClass, mnk.Board):
+      s = stateClass.fromTuple(state.s)
+    elif stateClass is not tictactoe.BitState:
+      s = stateClass()
+      s.s = state.s
+    states.append(s)
+  return states
+
+# _table returns an action-value function of class table for circle, with a score set for every action of states.
+def _table(table, states):
+  q = table(tictactoe.PlayerCircle)
+  rng = fastrandom.FastRandom(0)
+  for s in states:
+    for pos in s.unoccupied():
+      q.update(s, pos, rng.uniform(-1, 1))
+  return q
+
+# Every benchmark below is a function that sets up its inputs and returns an operation,
+# which is a function that performs the benchmarked operation n times.
+
+def _winner(stateClass):
+  states = _states(stateClass)
+  def op(n):
+    for s in itertools.islice(itertools.cycle(states), n):
+      s.winner()
+  return op
+
+def _takeAction(stateClass):
+  moves = [(s, pos) for s in _states(stateClass) for pos in s.unoccupied()]
+  def op(n):
+    takeAction = tictactoe.takeAction
+    for s, pos in itertools.islice(itertools.cycle(moves), n):
+      takeAction(tictactoe.PlayerCircle, s, pos)
+  return op
+
+def _Q(table, stateClass):
+  states = _states(stateClass)
+  q = _table(table, states)
+  pairs = [(s, pos) for s in states for pos in s.unoccupied()]
+  def op(n):
+    for s, pos in itertools.islice(itertools.cycle(pairs), n):
+      q.Q(s, pos)
+  return op
+
+def _update(table, stateClass):
+  states = _states(stateClass)
+  q = _table(table, states)
+  rng = fastrandom.FastRandom(1)
+  updates = [(s, pos, rng.uniform(-1, 1)) for s in states for pos in s.unoccupied()]
+  def op(n):
+    for s, pos, score in itertools.islice(itertools.cycle(updates), n):
+      q.update(s, pos, score)
+  return op
+
+def _best(table, stateClass):
+  states = _states(stateClass)
+  q = _table(table, states)
+  def op(n):
+    for s in itertools.islice(itertools.cycle(states), n):
+      q.best(s)
+  return op
+
+def _chooseAction(table, stateClass):
+  states = _states(stateClass)
+  q = _table(table, states)
+  rng = fastrandom.FastRandom(2)
+  def op(n):
+    chooseAction = tictactoe.chooseAction
+    for s in itertools.islice(itertools.cycle(states), n):
+      chooseAction(q, s, 0.1, rng)
+  return op
+
+def _runEpisode(algo, table, stateClass):
+  circle = table(tictactoe.PlayerCircle)
+  cross = table(tictactoe.PlayerCross)
+  rng = fastrandom.FastRandom(3)
+  def op(n):
+    for i in range(n):
+      if i & 1:
+        q = [circle, cross]
+      else:
+        q = [cross, circle]
+      train.runEpisode(algo, q, 0.1, 0.1, 0.9, stateClass, rng)
+  return op
+
+# _stateActionsBest benchmarks tictactoe.StateActions.best on a state with all its positions scored,
+# or, if sort is True, finding the best position by sorting the positions by score, as best used to do.
+def _stateActionsBest(sort):
+  sa = tictactoe.StateActions(tictactoe.State())
+  for pos in range(9):
+    sa.update(pos, pos * 0.1)
+  a = list(sa.a)
+  score = lambda ps: ps.score
+  def op(n):
+    if sort:
+      for _ in range(n):
+        a.sort(key=score, reverse=True)
+    else:
+      best = sa.best
+      for _ in range(n):
+        best()
+  return op
+
+# RunEpisodes is the number of episodes of a session of the train.run benchmarks, which is evaluated exactly once at its end.
+RunEpisodes = 1000
+
+# _run benchmarks train.run, with its output discarded. Each operation is a session of RunEpisodes episodes.
+def _run(algo, table, stateClass):
+  rng = fastrandom.FastRandom(4)
+  schedule = train.EvalSchedule(RunEpisodes, exact=True)
+  def op(n):
+    stdout = sys.stdout
+    sys.stdout = _discard
+    try:
+      for _ in range(n):
+        train.run(algo, table(tictactoe.PlayerCircle), table(tictactoe.PlayerCross), stateClass, schedule, RunEpisodes, rng=rng)
+    finally:
+      sys.stdout = stdout
+  return op
+
+class _Discard:
+  def write(self, s):
+    pass
+
+  def flush(self):
+    pass
+
+_discard = _Discard()
+
+
+# benchmarks returns the list of all benchmarks, as tuples of a name, a unit, a function returning the operation of the benchmark,
+# and the number of units of work done by each operation.
+def benchmarks():
+  bs = []
+  for name, stateClass in sorted(StateClasses.items()):
+    bs.append(("winner/%s" % name, OpsPerSecond, lambda c=stateClass: _winner(c), 1))
+    bs.append(("takeAction/%s" % name, OpsPerSecond, lambda c=stateClass: _takeAction(c), 1))
+  bs.append(("stateActionsBest/cached", OpsPerSecond, lambda: _stateActionsBest(False), 1))
+  bs.append(("stateActionsBest/sorted", OpsPerSecond, lambda: _stateActionsBest(True), 1))
+  for tableName, table, stateName in Tables:
+    stateClass = StateClasses[stateName]
+    suffix = "%s/%s" % (tableName, stateName)
+    for name, f in (("Q", _Q), ("update", _update), ("best", _best), ("chooseAction", _chooseAction)):
+      bs.append(("%s/%s" % (name, suffix), OpsPerSecond, lambda f=f, t=table, c=stateClass: f(t, c), 1))
+    for algoName, algo in sorted(Algos.items()):
+      bs.append(("runEpisode/%s/%s" % (algoName, suffix), EpisodesPerSecond, lambda a=algo, t=table, c=stateClass: _runEpisode(a, t, c), 1))
+      bs.append(("run/%s/%s" % (algoName, suffix), EpisodesPerSecond, lambda a=algo, t=table, c=stateClass: _run(a, t, c), RunEpisodes))
+  return bs
+
+# measure returns the number of operations per second of op.
+# The number of operations of a run is doubled until a run takes at least seconds,
+# and the fastest of repeat runs of that many operations is kept.
+def measure(op, seconds=0.2, repeat=3):
+  n = 1
+  while True:
+    start = time.time()
+    op(n)
+    elapsed = time.time() - start
+    if elapsed >= seconds:
+      break
+    n *= 2
+
+  fastest = elapsed
+  for _ in range(repeat - 1):
+    start = time.time()
+    op(n)
+    fastest = min(fastest, time.time() - start)
+  return n / fastest
+
+# run runs the benchmarks whose names contain pattern, and returns their results,
+# as a dictionary mapping names to dictionaries of a rate and its unit.
+def run(pattern="", seconds=0.2, repeat=3, out=sys.stdout):
+  results = {}
+  for name, unit, setup, work in benchmarks():
+    if pattern not in name:
+      continue
+    rate = work * measure(setup(), seconds, repeat)
+    results[name] = {"rate": rate, "unit": unit}
+    out.write("%-42s %14.1f %s\n" % (name, rate, unit))
+    out.flush()
+  return results
+
+# compare returns the benchmarks whose rate in results is lower than in baseline by more than the fraction threshold,
+# as a sorted list of tuples of a name, the baseline rate and the new rate.
+# Benchmarks missing from either results or baseline are not compared.
+def compare(results, baseline, threshold=0.1):
+  regressions = []
+  for name in sorted(results):
+    if name not in baseline:
+      continue
+    old = baseline[name]["rate"]
+    new = results[name]["rate"]
+    if new < old * (1 - threshold):
+      regressions.append((name, old, new))
+  return regressions
+
+# save writes results to a JSON file at path, together with the versions of Python and the platform they have been measured on.
+def save(path, results):
+  with open(path, "w") as f:
+    json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=2, sort_keys=True)
+
+# load returns the results saved to a JSON file at path.
+def load(path):
+  with open(path) as f:
+    return json.load(f)["results"]
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the primitives of training and whole training sessions.")
+  parser.add_argument("pattern", nargs="?", default="", help="only run the benchmarks whose names contain this string")
+  parser.add_argument("--seconds", type=float, default=0.2, help="the minimum duration of a run of each benchmark")
+  parser.add_argument("--repeat", type=int, default=3, help="the number of runs of each benchmark, of which the fastest is kept")
+  parser.add_argument("--out", help="save the results to this JSON file", metavar="PATH")
+  parser.add_argument("--baseline", help="compare the results with those saved in this JSON file, and fail on regressions", metavar="PATH")
+  parser.add_argument("--threshold", type=float, default=0.1, help="the fraction by which a benchmark may be slower than the baseline")
+  args = parser.parse_args()
+
+  results = run(args.pattern, args.seconds, args.repeat)
+  if args.out:
+    save(args.out, results)
+  if args.baseline:
+    regressions = compare(results, load(args.baseline), args.threshold)
+    for name, old, new in regressions:
+      print("regression: %s %.1f -> %.1f (%+.1f%%)" % (name, old, new, 100 * (new / old - 1)))
+    if regressions:
+      sys.exit(1)
+
+if __name__ == '__main__':
+  main()
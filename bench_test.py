@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import bench
+
+class TestBench(unittest.TestCase):
+
+  def testBenchmarks(self):
+    # assert that every benchmark has a distinct name
+    names = [b[0] for b in bench.benchmarks()]
+    self.assertEqual(len(set(names)), len(names))
+
+    # assert that benchmarks run and report positive rates
+    results = bench.run("winner/", seconds=0.001, repeat=1, out=bench._discard)
+    self.assertEqual(sorted(results), ["winner/BitState", "winner/MNKState", "winner/State"])
+    for r in results.values():
+      self.assertTrue(r["rate"] > 0)
+      self.assertEqual(r["unit"], bench.OpsPerSecond)
+    results = bench.run("run/qlearning/array", seconds=0.001, repeat=1, out=bench._discard)
+    self.assertEqual(results["run/qlearning/array/BitState"]["unit"], bench.EpisodesPerSecond)
+
+
+  def testCompare(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      path = os.path.join(tmp, "baseline.json")
+      bench.save(path, {"a": {"rate": 100.0, "unit": bench.OpsPerSecond}, "b": {"rate": 100.0, "unit": bench.OpsPerSecond}})
+      baseline = bench.load(path)
+    finally:
+      shutil.rmtree(tmp)
+
+    # assert that only slowdowns beyond the threshold are regressions
+    results = {"a": {"rate": 95.0, "unit": bench.OpsPerSecond}, "b": {"rate": 80.0, "unit": bench.OpsPerSecond},
+               "c": {"rate": 1.0, "unit": bench.OpsPerSecond}}
+    self.assertEqual(bench.compare(results, baseline, 0.1), [("b", 100.0, 80.0)])
+    self.assertEqual(bench.compare(results, baseline, 0.25), [])
@@ -0,0 +1,62 @@
+import os
+import pickle
+import random
+import time
+
+# A checkpoint is a snapshot of a training session taken between two episodes, from which the session can be resumed.
+# It holds both action-value functions, the number of episodes done, the evaluations reported so far,
+# the state of the random number generator and of the hyperparameter schedules, so that a resumed session continues exactly as if it had never been stopped.
+
+# A CheckpointSchedule determines when checkpoints of a training session are written to path:
+# every `every` episodes, whenever `seconds` seconds have passed since the last checkpoint, and at the end of training.
+# Either of every and seconds may be None to disable it.
+class CheckpointSchedule:
+  def __init__(self, path, every=10000, seconds=None):
+    self.path = path
+    self.every = every
+    self.seconds = seconds
+    self.last = time.time()
+
+  # due returns whether a checkpoint should be written after episode epi out of totalEpisodes.
+  def due(self, epi, totalEpisodes):
+    if epi == totalEpisodes:
+      return True
+    if self.every is not None and epi % self.every == 0:
+      return True
+    return self.seconds is not None and time.time() - self.last >= self.seconds
+
+
+# save writes a checkpoint to path, including the state of the random number generator rng of the session,
+# and of its hyperparameter schedules, such as the visit counts of a config.VisitCount.
+# The checkpoint is written to a temporary file first and then renamed,
+# so that an interrupted write never destroys the previous checkpoint.
+def save(path, circle, cross, episode, evaluations, rng=random, schedules=()):
+  snapshot = {
+    "circle": circle,
+    "cross": cross,
+    "episode": episode,
+    "evaluations": evaluations,
+    "random": rng.getstate(),
+    "schedules": list(schedules),
+  }
+  tmp = path + ".tmp"
+  with open(tmp, "wb") as f:
+    pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+    f.flush()
+    os.fsync(f.fileno())
+  os.rename(tmp, path)
+
+# load reads the checkpoint at path.
+# It returns the number of episodes done and the evaluations reported so far,
+# after having restored the state of the random number generator rng, the scores of circle and cross,
+# and the state of those schedules that are of the same kind as the ones saved.
+def load(path, circle, cross, rng=random, schedules=()):
+  with open(path, "rb") as f:
+    snapshot = pickle.load(f)
+  circle.__dict__.update(snapshot["circle"].__dict__)
+  cross.__dict__.update(snapshot["cross"].__dict__)
+  rng.setstate(snapshot["random"])
+  for schedule, saved in zip(schedules, snapshot.get("schedules", [])):
+    if saved.__class__ is schedule.__class__:
+      schedule.__dict__.update(saved.__dict__)
+  return snapshot["episode"], snapshot["evaluations"]
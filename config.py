@@ -0,0 +1,145 @@
+import json
+
+# Schedules determine the values of epsilon and alpha over the course of training.
+# The value of a schedule for an episode is returned by its value method.
+# Episode-based schedules return a number, whereas VisitCount returns itself,
+# and is then asked for the value of each state or (state, action) pair by train.runEpisode.
+
+# A Constant schedule keeps its value throughout training.
+class Constant:
+  def __init__(self, value):
+    self.v = value
+
+  def value(self, episode):
+    return self.v
+
+# A Linear schedule moves from start to end over the given number of episodes, and stays at end afterwards.
+class Linear:
+  def __init__(self, start, end, episodes):
+    self.start = start
+    self.end = end
+    self.episodes = episodes
+
+  def value(self, episode):
+    if episode >= self.episodes:
+      return self.end
+    return self.start + (self.end - self.start) * episode / float(self.episodes)
+
+# An Exponential schedule starts at start and is multiplied by decay every episode, without going below minimum.
+class Exponential:
+  def __init__(self, start, decay, minimum=0.0):
+    self.start = start
+    self.decay = decay
+    self.minimum = minimum
+
+  def value(self, episode):
+    return max(self.minimum, self.start * self.decay ** episode)
+
+# A VisitCount schedule decays with the number of times a player has visited a state, or a (state, action) pair,
+# so that rarely seen situations keep being explored and learnt quickly while frequent ones converge.
+# After n visits its value is start * scale / (scale + n), but no lower than minimum.
+class VisitCount:
+  def __init__(self, start, scale, minimum=0.0):
+    self.start = start
+    self.scale = scale
+    self.minimum = minimum
+    # counts maps a player and a state, or a player, a state and a position, to the number of visits so far.
+    self.counts = {}
+
+  def value(self, episode):
+    return self
+
+  # at returns the value of this schedule for the player of q in state, or for the pair of state and pos if pos is given.
+  # If visit is True, the visit is counted after the value has been determined.
+  def at(self, q, state, pos=None, visit=True):
+    key = (q.player, state, pos)
+    n = self.counts.get(key, 0)
+    if visit:
+      self.counts[key] = n + 1
+    return max(self.minimum, self.start * self.scale / float(self.scale + n))
+
+
+# parseSchedule returns the schedule described by spec, which is either a number for a Constant schedule,
+# or a string of a kind and its parameters separated by colons:
+#
+#   constant:VALUE
+#   linear:START:END:EPISODES
+#   exponential:START:DECAY[:MINIMUM]
+#   visits:START:SCALE[:MINIMUM]
+def parseSchedule(spec):
+  if isinstance(spec, (int, float)):
+    return Constant(float(spec))
+
+  parts = spec.split(":")
+  try:
+    if len(parts) == 1:
+      return Constant(float(parts[0]))
+    kind = parts[0]
+    params = [float(p) for p in parts[1:]]
+    if kind == "constant" and len(params) == 1:
+      return Constant(params[0])
+    if kind == "linear" and len(params) == 3:
+      return Linear(params[0], params[1], int(params[2]))
+    if kind == "exponential" and len(params) in (2, 3):
+      return Exponential(*params)
+    if kind == "visits" and len(params) in (2, 3):
+      return VisitCount(*params)
+  except ValueError:
+    pass
+  raise ValueError("invalid schedule: %s" % spec)
+
+
+# Algorithms are the names of the training algorithms: SARSA, Q-learning, SARSA(lambda) and Watkins's Q(lambda).
+Algorithms = ("sarsa", "qlearning", "sarsalambda", "qlambda")
+
+# A TrainConfig holds the hyperparameters of a training session:
+# the algorithm name, one of Algorithms, the number of episodes, the schedules of alpha and epsilon, and gamma.
+# The argument lam is the decay rate of the eligibility traces of sarsalambda and qlambda, relative to gamma.
+#
+# If patience is not None, training stops early once the reward-per-episode of the circle player
+# has not improved by more than minDelta over its best value for patience evaluations in a row.
+class TrainConfig:
+  def __init__(self, algo="qlearning", episodes=400000, alpha=None, gamma=0.9, epsilon=None, patience=None, minDelta=0.0, lam=0.8):
+    if alpha is None:
+      alpha = Constant(0.1)
+    if epsilon is None:
+      epsilon = Constant(0.1)
+    self.algo = algo
+    self.episodes = episodes
+    self.alpha = alpha
+    self.gamma = gamma
+    self.epsilon = epsilon
+    self.patience = patience
+    self.minDelta = minDelta
+    self.lam = lam
+
+  # update sets the hyperparameters given in the dictionary d, whose keys are the names of the attributes of a TrainConfig.
+  # Schedules are given as specifications understood by parseSchedule.
+  def update(self, d):
+    for key, v in d.items():
+      if key in ("alpha", "epsilon"):
+        v = parseSchedule(v)
+      elif key == "episodes" or key == "patience":
+        v = int(v)
+      elif key == "gamma" or key == "minDelta" or key == "lam":
+        v = float(v)
+      elif key == "algo":
+        if v not in Algorithms:
+          raise ValueError("unknown algorithm: %s" % v)
+      else:
+        raise ValueError("unknown configuration: %s" % key)
+      setattr(self, key, v)
+
+
+# load returns the TrainConfig described by the JSON object in the file at path.
+# For example:
+#
+#   {"algo": "sarsa", "episodes": 200000, "gamma": 0.9,
+#    "alpha": "linear:0.5:0.05:100000", "epsilon": "exponential:0.3:0.99995:0.01",
+#    "patience": 5, "minDelta": 0.001}
+def load(path):
+  with open(path) as f:
+    d = json.load(f)
+  c = TrainConfig()
+  c.update(d)
+  return c
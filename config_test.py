@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tictactoe import *
+import config
+
+class TestConfig(unittest.TestCase):
+
+  def testSchedules(self):
+    # assert that episode-based schedules decay as specified
+    linear = config.parseSchedule("linear:0.5:0.1:100")
+    self.assertEqual(linear.value(0), 0.5)
+    self.assertAlmostEqual(linear.value(50), 0.3)
+    self.assertAlmostEqual(linear.value(1000), 0.1)
+
+    exponential = config.parseSchedule("exponential:0.5:0.5:0.1")
+    self.assertEqual(exponential.value(1), 0.25)
+    self.assertEqual(exponential.value(10), 0.1)
+
+    self.assertEqual(config.parseSchedule(0.2).value(123), 0.2)
+    self.assertEqual(config.parseSchedule("0.2").value(123), 0.2)
+
+    # assert that a visit count schedule decays per state, independently of other states and players
+    visits = config.parseSchedule("visits:0.8:1")
+    self.assertTrue(visits.value(5) is visits)
+    q = ActionValueFunc(PlayerCircle)
+    s = State()
+    self.assertEqual(visits.at(q, s), 0.8)
+    self.assertEqual(visits.at(q, s), 0.4)
+    self.assertEqual(visits.at(q, s, visit=False), 0.8 / 3)
+    self.assertEqual(visits.at(q, s, 4), 0.8)
+    self.assertEqual(visits.at(ActionValueFunc(PlayerCross), s), 0.8)
+
+    for spec in ("linear:0.5", "cosine:1:2", "fast"):
+      self.assertRaises(ValueError, config.parseSchedule, spec)
+
+
+  def testLoad(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      path = os.path.join(tmp, "config.json")
+      with open(path, "w") as f:
+        json.dump({"algo": "sarsa", "episodes": 5000, "alpha": "visits:0.5:10", "epsilon": 0.05, "patience": 3}, f)
+      c = config.load(path)
+
+      # assert that the file overrides the defaults, and only those
+      self.assertEqual(c.algo, "sarsa")
+      self.assertEqual(c.episodes, 5000)
+      self.assertTrue(isinstance(c.alpha, config.VisitCount))
+      self.assertEqual(c.epsilon.value(0), 0.05)
+      self.assertEqual(c.gamma, 0.9)
+      self.assertEqual(c.patience, 3)
+      self.assertEqual(c.lam, 0.8)
+      c.update({"algo": "qlambda", "lam": "0.5"})
+      self.assertEqual((c.algo, c.lam), ("qlambda", 0.5))
+
+      # assert that unknown settings are rejected
+      self.assertRaises(ValueError, c.update, {"beta": 1})
+      self.assertRaises(ValueError, c.update, {"algo": "td"})
+    finally:
+      shutil.rmtree(tmp)
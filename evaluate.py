@@ -0,0 +1,121 @@
+import operator
+
+import minimax
+import qtable
+import tictactoe
+
+# This module evaluates action-value functions exactly, by enumerating all the ways a game can unfold instead of sampling games.
+# Since there are only a few thousand reachable states, each evaluation takes a few milliseconds.
+
+def _opponent(player):
+  if player == tictactoe.PlayerCircle:
+    return tictactoe.PlayerCross
+  return tictactoe.PlayerCircle
+
+# _moves returns the number of moves that have been made to reach a state.
+def _moves(state):
+  return 9 - len(state.unoccupied())
+
+# greedyActions returns the positions among which the player of q picks uniformly at random when acting greedily,
+# that is the positions with the highest score, or all available positions if q has never seen the state.
+def greedyActions(q, state):
+  unoccupied = state.unoccupied()
+  if isinstance(q, tictactoe.ActionValueFunc) and state not in q.stateActions:
+    return unoccupied
+
+  top = q.best(state)
+  return [pos for pos in unoccupied if q.Q(state, pos) == top]
+
+# greedyTable returns a list whose element i is the tuple of greedyActions of the player of q in the state with dense index i,
+# or None if the player cannot be the one to move in that state.
+# The argument stateClass must be the State implementation q has been trained with.
+def greedyTable(q, stateClass=tictactoe.State):
+  greedy = [None] * qtable.NumStates
+  for state, s in minimax.playerStates(q.player, stateClass):
+    greedy[qtable.indexOf(state)] = tuple(greedyActions(q, s))
+  return greedy
+
+
+# _expectation returns the expectations of outcome over all games starting from both seatings,
+# in which the player of q acts greedily and its opponent picks uniformly among the positions returned by opponentActions.
+# The argument outcome maps a terminal state to a tuple of the quantities of interest,
+# so that several expectations are computed in a single pass over the games.
+def _expectation(q, opponentActions, outcome, stateClass):
+  memo = {}
+  def play(state, mover):
+    key = (state, mover)
+    if key in memo:
+      return memo[key]
+
+    if mover == q.player:
+      actions = greedyActions(q, state)
+    else:
+      actions = opponentActions(state, mover)
+    v = None
+    for pos in actions:
+      s = tictactoe.takeAction(mover, state, pos)
+      if s.terminal():
+        w = outcome(s)
+      else:
+        w = play(s, _opponent(mover))
+      if v is None:
+        v = w
+      else:
+        v = tuple(map(operator.add, v, w))
+    n = float(len(actions))
+    memo[key] = tuple(a / n for a in v)
+    return memo[key]
+
+  s = stateClass()
+  first = play(s, q.player)
+  second = play(s, _opponent(q.player))
+  return tuple(0.5*a + 0.5*b for a, b in zip(first, second))
+
+def _randomActions(state, player):
+  return state.unoccupied()
+
+# expectedReward returns the exact expectation of train.rewardPerEpisode,
+# that is the expected discounted reward of the player of q against a uniformly random opponent, with either of them moving first.
+# The argument stateClass must be the State implementation q has been trained with.
+def expectedReward(q, gamma, stateClass=tictactoe.State):
+  return summary(q, gamma, stateClass)[0]
+
+# outcomeRates returns the exact probabilities that the player of q wins, draws and loses against a uniformly random opponent,
+# with either of them moving first.
+# The argument stateClass must be the State implementation q has been trained with.
+def outcomeRates(q, stateClass=tictactoe.State):
+  return summary(q, 1.0, stateClass)[1:]
+
+# summary returns both the expectedReward and the outcomeRates of the player of q, in a single pass over the games,
+# as a tuple of the expected reward and the probabilities of winning, drawing and losing.
+def summary(q, gamma, stateClass=tictactoe.State):
+  def outcome(s):
+    reward = tictactoe.observeReward(q.player, s)
+    return (gamma ** _moves(s) * reward, float(reward == tictactoe.ScoreWin), float(reward == tictactoe.ScoreLose))
+  reward, win, loss = _expectation(q, _randomActions, outcome, stateClass)
+  return reward, win, 1.0 - win - loss, loss
+
+# lossRate returns the exact probability that the player of q loses against a perfect opponent,
+# with either of them moving first. The perfect opponent picks uniformly among its optimal actions.
+# The argument stateClass must be the State implementation q has been trained with.
+def lossRate(q, stateClass=tictactoe.State):
+  opponent = _opponent(q.player)
+  def lost(s):
+    if s.winner() == opponent:
+      return (1.0, )
+    return (0.0, )
+  return _expectation(q, minimax.optimalActions, lost, stateClass)[0]
+
+# agreement returns the fraction of states in which the player of q acts perfectly when acting greedily,
+# that is all its greedy actions are optimal according to minimax.optimalActions.
+# Only non-terminal reachable states in which the player of q may be the one to move are considered.
+# The argument stateClass must be the State implementation q has been trained with.
+def agreement(q, stateClass=tictactoe.State):
+  agreed = 0
+  total = 0
+  for state, s in minimax.playerStates(q.player, stateClass):
+    optimal = minimax.optimalActions(state, q.player)
+    total += 1
+    if all(pos in optimal for pos in greedyActions(q, s)):
+      agreed += 1
+  return float(agreed) / total
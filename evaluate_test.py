@@ -0,0 +1,60 @@
+import random
+import unittest
+
+from tictactoe import *
+import batch
+import evaluate
+import minimax
+import qtable
+import train
+
+class TestEvaluate(unittest.TestCase):
+
+  def testExpectedReward(self):
+    circle = qtable.ArrayActionValueFunc(PlayerCircle)
+    cross = qtable.ArrayActionValueFunc(PlayerCross)
+    batch.run(train.QLearning, circle, cross, 20000, seed=2)
+
+    # assert that the exact expectation agrees with the average of many sampled games.
+    gamma = 0.9
+    random.seed(2)
+    sampled = train.evaluate(circle, gamma, 20000, BitState)
+    self.assertAlmostEqual(evaluate.expectedReward(circle, gamma, BitState), sampled, delta=0.02)
+
+    # assert that an untrained player, which plays randomly, is as good as its random opponent when rewards are not discounted.
+    self.assertAlmostEqual(evaluate.expectedReward(qtable.ArrayActionValueFunc(PlayerCircle), 1.0), 0.0)
+
+
+  def testLossRate(self):
+    # A random player loses most games against a perfect one.
+    untrained = qtable.ArrayActionValueFunc(PlayerCross)
+    self.assertTrue(evaluate.lossRate(untrained) > 0.5)
+
+    # A player that has learnt perfect play never loses.
+    perfect = qtable.ArrayActionValueFunc(PlayerCross)
+    for state in qtable.States:
+      if state.terminal():
+        continue
+      for pos in minimax.optimalActions(state, PlayerCross):
+        perfect.update(state, pos, ScoreWin)
+    self.assertEqual(evaluate.lossRate(perfect), 0.0)
+
+
+  def testAgreement(self):
+    self.assertTrue(evaluate.agreement(qtable.ArrayActionValueFunc(PlayerCircle)) < 0.5)
+
+    q = ActionValueFunc(PlayerCross)
+    minimax.initialize(q)
+    self.assertEqual(evaluate.agreement(q), 1.0)
+
+
+  def testGreedyTable(self):
+    q = ActionValueFunc(PlayerCross)
+    minimax.initialize(q)
+    greedy = evaluate.greedyTable(q)
+    self.assertEqual(len(greedy), qtable.NumStates)
+    for state, _ in minimax.playerStates(PlayerCross):
+      self.assertEqual(list(greedy[qtable.indexOf(state)]), minimax.optimalActions(state, PlayerCross))
+    # Terminal states, and states in which circle is to move, have no actions.
+    self.assertEqual(greedy[qtable.indexOf(BitState.fromTuple([PlayerCross] + [PlayerNone]*8))], None)
+    self.assertEqual(greedy[qtable.indexOf(BitState.fromTuple([PlayerCross]*3 + [PlayerCircle]*2 + [PlayerNone]*4))], None)
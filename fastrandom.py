@@ -0,0 +1,15 @@
+import random
+
+# A FastRandom is a seedable random number generator for the training code,
+# providing the random and choice methods of the random module that are used by tictactoe.chooseAction and friends.
+#
+# It is a random.Random, so random is still the Mersenne Twister implemented in C,
+# which turns out to be faster than handing out numbers pre-drawn in blocks from Python.
+# Only choice is replaced with one based on a single call to random, rather than on random bits,
+# which saves several Python calls each time an action is explored or a tie is broken.
+# Generators with different seeds produce independent streams, so each worker of a parallel session can be given its own.
+class FastRandom(random.Random):
+
+  # choice returns a random element of the non-empty sequence seq.
+  def choice(self, seq):
+    return seq[int(self.random() * len(seq))]
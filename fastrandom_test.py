@@ -0,0 +1,42 @@
+import random
+import unittest
+
+from tictactoe import *
+import fastrandom
+import train
+
+class TestFastRandom(unittest.TestCase):
+
+  def testChoice(self):
+    rng = fastrandom.FastRandom(1)
+
+    # assert that choice is uniform
+    counts = [0, 0, 0]
+    for _ in range(3000):
+      counts[rng.choice((0, 1, 2))] += 1
+    for c in counts:
+      self.assertTrue(900 < c < 1100)
+
+    # assert that restoring a state replays the same choices
+    state = rng.getstate()
+    xs = [rng.choice(range(9)) for _ in range(25)]
+    rng.setstate(state)
+    self.assertEqual([rng.choice(range(9)) for _ in range(25)], xs)
+
+
+  def testSeededTraining(self):
+    # assert that a seed determines the whole training session, regardless of the global random module
+    curves = []
+    for globalSeed in (1, 2):
+      random.seed(globalSeed)
+      circle = ActionValueFunc(PlayerCircle)
+      cross = ActionValueFunc(PlayerCross)
+      schedule = train.EvalSchedule(evalEvery=50, evalGames=50)
+      curves.append(train.run(train.SARSA, circle, cross, schedule=schedule, totalEpisodes=200, rng=fastrandom.FastRandom(7)))
+    self.assertEqual(curves[0], curves[1])
+
+    # assert that different seeds give different sessions
+    circle = ActionValueFunc(PlayerCircle)
+    cross = ActionValueFunc(PlayerCross)
+    schedule = train.EvalSchedule(evalEvery=50, evalGames=50)
+    self.assertNotEqual(train.run(train.SARSA, circle, cross, schedule=schedule, totalEpisodes=200, rng=fastrandom.FastRandom(8)), curves[0])
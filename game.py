@@ -9,54 +9,37 @@ def toOX(player):
     return " "
 
 def sPrintRow(row):
-  return "%s | %s | %s" % (toOX(row[0]), toOX(row[1]), toOX(row[2]))
+  return " | ".join(toOX(player) for player in row)
 
+# printBoard draws the grid of a state, with columns labelled by letters from the left and rows numbered from the bottom.
 def printBoard(state):
-  print "     a   b   c"
-  print "   -------------"
-  print("3  | %s |" % sPrintRow(state.s[0:3]))
-  print "   -------------"
-  print("2  | %s |" % sPrintRow(state.s[3:6]))
-  print "   -------------"
-  print("1  | %s |" % sPrintRow(state.s[6:9]))
-  print "   -------------"
+  rows, cols = state.rows, state.cols
+  line = "   " + "-" * (4*cols + 1)
+  print "     " + "   ".join(chr(ord("a") + col) for col in range(cols))
+  print line
+  for row in range(rows):
+    print("%-2d | %s |" % (rows - row, sPrintRow(state.s[row*cols:(row+1)*cols])))
+    print line
+
+# parseMove returns the position of a move written as a column letter followed by a row number, e.g. b2,
+# or -1 if it does not denote a position of the grid of state.
+def parseMove(inp, state):
+  inp = inp.strip()
+  if len(inp) < 2 or not inp[1:].isdigit():
+    return -1
+  col = ord(inp[0]) - ord("a")
+  row = state.rows - int(inp[1:])
+  if col < 0 or col >= state.cols or row < 0 or row >= state.rows:
+    return -1
+  return row*state.cols + col
 
 def getUserAction(user, state):
   inp = raw_input("Your turn (%s): " % toOX(user))
 
   while True:
-    if len(inp) < 2:
-      inp = raw_input("Wrong move '%s', please try again: " % inp)
-      continue
-    col = inp[0]
-    row = inp[1]
-
-    pos = -1
-    if col == "a" and row == "3":
-      pos = 0
-    elif col == "b" and row == "3":
-      pos =  1
-    elif col == "c" and row == "3":
-      pos = 2
-    elif col == "a" and row == "2":
-      pos = 3
-    elif col == "b" and row == "2":
-      pos = 4
-    elif col == "c" and row == "2":
-      pos = 5
-    elif col == "a" and row == "1":
-      pos = 6
-    elif col == "b" and row == "1":
-      pos = 7
-    elif col == "c" and row == "1":
-      pos = 8
-    else:
-      inp = raw_input("Wrong move '%s', please try again: " % inp)
-      continue
-
-    for unoccupied in state.unoccupied():
-      if pos == unoccupied:
-        return pos
+    pos = parseMove(inp, state)
+    if pos in state.unoccupied():
+      return pos
 
     inp = raw_input("Wrong move '%s', please try again: " % inp)
 
@@ -73,8 +56,8 @@ def printWinner(state, user):
   print ""
 
 
-def run(user, opponent, opponentFirst):
-  s = tictactoe.State()
+def run(user, opponent, opponentFirst, stateClass=tictactoe.State):
+  s = stateClass()
 
   if opponentFirst:
     a = tictactoe.chooseAction(opponent, s, 0)
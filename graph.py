@@ -0,0 +1,127 @@
+import random
+
+import numpy
+
+import qtable
+import tictactoe
+
+# This module precomputes the complete graph of reachable states once, so that games can be played on dense state indices
+# of qtable.States instead of State objects. Moving, observing rewards and telling whether a game has ended
+# then become lookups into the tables below, without creating any object per move.
+#
+# The tables come in two forms: NumPy arrays, for the batched operations of the batch module,
+# and flat Python lists, for code playing one game at a time, where indexing NumPy arrays would be slower.
+# Players are described by their index in Players.
+
+# Players are the players of a game, in the order of their indices in the tables below.
+Players = (tictactoe.PlayerCircle, tictactoe.PlayerCross)
+
+# playerIndex returns the index of a player in Players.
+def playerIndex(player):
+  if player == tictactoe.PlayerCircle:
+    return 0
+  if player == tictactoe.PlayerCross:
+    return 1
+  raise ValueError("unexpected player: %s" % player)
+
+def _build():
+  successors = numpy.full((qtable.NumStates, len(Players), 9), -1, dtype=numpy.int32)
+  rewards = numpy.zeros((qtable.NumStates, len(Players)))
+  terminal = numpy.zeros(qtable.NumStates, dtype=bool)
+  winners = numpy.zeros(qtable.NumStates, dtype=numpy.int8)
+  legal = numpy.zeros((qtable.NumStates, 9), dtype=bool)
+  for i, state in enumerate(qtable.States):
+    terminal[i] = state.terminal()
+    winners[i] = state.winner()
+    for p, player in enumerate(Players):
+      rewards[i, p] = tictactoe.observeReward(player, state)
+    for pos in qtable.legalActions[i]:
+      legal[i, pos] = True
+      for p, player in enumerate(Players):
+        # A player moving twice in a row leads to an unreachable state, which is left as -1.
+        try:
+          successors[i, p, pos] = qtable.indexOf(tictactoe.takeAction(player, state, pos))
+        except ValueError:
+          pass
+  return successors, rewards, terminal, winners, legal
+
+# successors[i, p, pos] is the index of the state after player p takes position pos in the state with index i.
+# rewards[i, p] is the reward observed by player p in the state with index i.
+# terminal[i] tells whether the state with index i is terminal, and winners[i] is its winner, or tictactoe.PlayerNone.
+# legal[i, pos] tells whether position pos is available in the state with index i.
+successors, rewards, terminal, winners, legal = _build()
+
+# legalMasks[i] is the bit mask of the available positions of the state with index i, where bit pos stands for position pos.
+legalMasks = tuple(int(sum(1 << pos for pos in qtable.legalActions[i])) for i in range(qtable.NumStates))
+
+# Flat copies of the tables above, indexed by i*18 + p*9 + pos, i*2 + p and i respectively.
+_successors = successors.ravel().tolist()
+_rewards = rewards.ravel().tolist()
+_terminal = terminal.tolist()
+_winners = winners.tolist()
+
+# takeAction returns the index of the state after the player with index p takes position pos in the state with index i.
+def takeAction(p, i, pos):
+  return _successors[i*18 + p*9 + pos]
+
+# observeReward returns the reward observed by the player with index p in the state with index i.
+def observeReward(p, i):
+  return _rewards[i*2 + p]
+
+# isTerminal returns whether the state with index i is terminal.
+def isTerminal(i):
+  return _terminal[i]
+
+# winner returns the winner of the state with index i, or tictactoe.PlayerNone.
+def winner(i):
+  return _winners[i]
+
+
+# _offsets caches the offsets of scores in the values arrays of each kind of action-value function.
+_offsets = {}
+
+# offsets returns a flat list whose element i*9 + pos is the position in q.values of the score of position pos in the state with index i,
+# for q a qtable.ArrayActionValueFunc or one of its subclasses.
+def offsets(q):
+  if q.__class__ not in _offsets:
+    _offsets[q.__class__] = [q.offset(i, pos) for i in range(qtable.NumStates) for pos in range(9)]
+  return _offsets[q.__class__]
+
+# best returns the highest score in the values of a dense action-value function, laid out according to offs,
+# among the available positions of the state with index i. Terminal states have the score tictactoe.ScoreDraw.
+def best(values, offs, i):
+  legalActions = qtable.legalActions[i]
+  if not legalActions:
+    return tictactoe.ScoreDraw
+  row = i * 9
+  top = qtable.IllegalScore
+  for pos in legalActions:
+    v = values[offs[row + pos]]
+    if v > top:
+      top = v
+  return top
+
+# bestAction returns a position with the highest score in the state with index i, like qtable.ArrayActionValueFunc.bestAction,
+# making the same random choices for breaking ties.
+def bestAction(values, offs, i, rng=random):
+  row = i * 9
+  top = qtable.IllegalScore
+  action = -1
+  ties = 0
+  for pos in qtable.legalActions[i]:
+    v = values[offs[row + pos]]
+    if v > top:
+      top = v
+      action = pos
+      ties = 1
+    elif v == top:
+      ties += 1
+      if rng.random() * ties < 1:
+        action = pos
+  return action
+
+# chooseAction is the equivalent of tictactoe.chooseAction on the state with index i, making the same random choices.
+def chooseAction(values, offs, i, epsilon, rng=random):
+  if rng.random() < epsilon:
+    return rng.choice(qtable.legalActions[i])
+  return bestAction(values, offs, i, rng)
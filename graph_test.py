@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from tictactoe import *
+import fastrandom
+import graph
+import qtable
+import train
+
+class TestGraph(unittest.TestCase):
+
+  def testTables(self):
+    # assert that the tables agree with the State implementations on every reachable state
+    for i, state in enumerate(qtable.States):
+      self.assertEqual(graph.isTerminal(i), state.terminal())
+      self.assertEqual(graph.winner(i), state.winner())
+      self.assertEqual(graph.legalMasks[i], sum(1 << pos for pos in state.unoccupied()))
+      for player in (PlayerCircle, PlayerCross):
+        p = graph.playerIndex(player)
+        self.assertEqual(graph.observeReward(p, i), observeReward(player, state))
+
+    # assert that following successors plays the same games as takeAction
+    rng = random.Random(1)
+    for _ in range(200):
+      s = State()
+      i = 0
+      player = rng.choice((PlayerCircle, PlayerCross))
+      while not s.terminal():
+        pos = rng.choice(s.unoccupied())
+        s = takeAction(player, s, pos)
+        i = graph.takeAction(graph.playerIndex(player), i, pos)
+        self.assertEqual(qtable.States[i].s, s.s)
+        player = PlayerCross if player == PlayerCircle else PlayerCircle
+
+
+  def testRunGraphEpisode(self):
+    # assert that episodes played on the graph are exactly the same as those played with State objects
+    for algo in (train.SARSA, train.QLearning):
+      for table in (qtable.ArrayActionValueFunc, qtable.SymmetricActionValueFunc):
+        results = []
+        for stateClass in (State, BitState):
+          rng = fastrandom.FastRandom(5)
+          circle = table(PlayerCircle)
+          cross = table(PlayerCross)
+          moves = 0
+          for _ in range(300):
+            q = [circle, cross]
+            if rng.random() < 0.5:
+              q = [cross, circle]
+            moves += train.runEpisode(algo, q, 0.2, 0.1, 0.9, stateClass, rng)
+          results.append((list(circle.values), list(cross.values), moves, rng.random()))
+        self.assertEqual(results[0], results[1])
@@ -1,26 +1,189 @@
 import argparse
 import random
+import signal
 
+import batch
+import checkpoint
+import config
+import fastrandom
 import game
+import metrics
+import minimax
+import mnk
+import parallel
+import policy
+import qtable
+import replay
+import solver
+import tablefile
+import telemetry
 import tictactoe
 import train
 
+# tablePaths returns the paths of the files of the circle and cross action-value functions saved with a prefix.
+def tablePaths(prefix):
+  return prefix + "-circle.qtable", prefix + "-cross.qtable"
+
+# algorithmNames maps the names of the training algorithms in a config.TrainConfig to the names printed when training.
+algorithmNames = {"sarsa": "SARSA", "qlearning": "Q-learning", "sarsalambda": "SARSA(lambda)", "qlambda": "Q(lambda)"}
+
+# initialValue returns the value of a hyperparameter schedule at the start of training, which is recorded in table files.
+def initialValue(schedule):
+  if isinstance(schedule, config.VisitCount):
+    return schedule.start
+  return schedule.value(0)
+
 def main():
   parser = argparse.ArgumentParser()
-  parser.add_argument("--algo", help="the training algorithm, sarsa for SARSA and qlearning for Q-learning")
+  parser.add_argument("--config", help="read the training configuration from this JSON file, which the flags below override", metavar="PATH")
+  parser.add_argument("--algo", help="the training algorithm, sarsa for SARSA, qlearning for Q-learning, sarsalambda for SARSA(lambda) and qlambda for Watkins's Q(lambda)")
+  parser.add_argument("--episodes", type=int, help="the number of training episodes, 400000 by default")
+  parser.add_argument("--alpha", help="the learning rate, either a number or a schedule such as linear:START:END:EPISODES, exponential:START:DECAY[:MINIMUM] or visits:START:SCALE[:MINIMUM], 0.1 by default")
+  parser.add_argument("--gamma", type=float, help="the discount rate of rewards, 0.9 by default")
+  parser.add_argument("--lambda", dest="lam", type=float, help="the decay rate of the eligibility traces of sarsalambda and qlambda, 0.8 by default")
+  parser.add_argument("--epsilon", help="the exploration rate of epsilon-greedy action selection, a number or a schedule like --alpha, 0.1 by default")
+  parser.add_argument("--patience", type=int, help="stop training once this many evaluations in a row have not improved on the best one")
+  parser.add_argument("--min-delta", type=float, help="the smallest increase of the reward-per-episode that counts as an improvement for --patience")
+  parser.add_argument("--bitboard", action="store_true", help="represent game states as bitboards for faster training")
+  parser.add_argument("--table", default="dict", help="the action-value function storage, dict for hash tables, array for dense arrays, symmetric for dense arrays shared among symmetric states and sparse for hash tables of the updated scores only")
+  parser.add_argument("--board", help="play on a board of M rows and N columns, won by taking K positions in a row, e.g. 4,4,3, requires a sparse table", metavar="M,N,K")
+  parser.add_argument("--batch", type=int, default=0, help="train by playing this many games in lockstep with NumPy, requires an array or symmetric table")
+  parser.add_argument("--workers", type=int, default=1, help="the number of processes to train with")
+  parser.add_argument("--replay", type=int, default=0, help="train Q-learning from minibatches sampled from a replay buffer of this many transitions, requires an array or symmetric table", metavar="CAPACITY")
+  parser.add_argument("--replay-batch", type=int, default=1024, help="the number of transitions of each minibatch sampled from the replay buffer")
+  parser.add_argument("--replay-every", type=int, default=16, help="learn from a minibatch every this many episodes")
+  parser.add_argument("--eval-every", type=int, default=10000, help="evaluate the circle player every this many training episodes")
+  parser.add_argument("--eval-games", type=int, default=1000, help="the number of games to play against a random opponent in each evaluation")
+  parser.add_argument("--eval-background", action="store_true", help="run evaluations in a separate process")
+  parser.add_argument("--eval-exact", action="store_true", help="compute the exact expected reward-per-episode instead of sampling games")
+  parser.add_argument("--init", default="draw", help="the initial scores of the action-value functions, draw for ties everywhere, minimax for the game-theoretic values and solve for the scores Q-learning converges to in self-play, computed by value iteration")
+  parser.add_argument("--opponent", default="trained", help="the opponent to play against, trained for the trained agents and minimax for a perfect player, which skips training")
+  parser.add_argument("--save", help="after training, save the action-value functions to PREFIX-circle.qtable and PREFIX-cross.qtable", metavar="PREFIX")
+  parser.add_argument("--load", help="skip training and load the action-value functions saved with --save PREFIX", metavar="PREFIX")
+  parser.add_argument("--checkpoint", help="periodically save the training session to this file", metavar="PATH")
+  parser.add_argument("--checkpoint-every", type=int, default=10000, help="save a checkpoint every this many episodes")
+  parser.add_argument("--checkpoint-seconds", type=float, help="also save a checkpoint whenever this many seconds have passed since the last one")
+  parser.add_argument("--resume", action="store_true", help="resume training from the file given by --checkpoint, if it exists")
+  parser.add_argument("--metrics", help="log the evaluations and table sizes of both players, and with --eval-exact their win, draw and loss rates, to this JSON lines or .csv file, instead of printing evaluations", metavar="PATH")
+  parser.add_argument("--telemetry", help="append records of counters and timers of training to this JSON lines file, and profile samples of episodes on SIGUSR1", metavar="PATH")
+  parser.add_argument("--telemetry-every", type=int, default=10000, help="append a telemetry record every this many episodes")
+  parser.add_argument("--profile-every", type=int, help="also profile a sample of episodes every this many episodes")
+  parser.add_argument("--profile-episodes", type=int, default=100, help="the number of episodes of each profiled sample")
+  parser.add_argument("--seed", type=int, help="seed the random number generator of training, so that the same seed always gives the same training session")
   args = parser.parse_args()
-  if args.algo == "sarsa":
-    algo = train.SARSA
-    print "Training using SARSA algorithm"
+
+  cfg = config.TrainConfig()
+  try:
+    if args.config:
+      cfg = config.load(args.config)
+    flags = {"algo": args.algo, "episodes": args.episodes, "alpha": args.alpha, "gamma": args.gamma,
+             "epsilon": args.epsilon, "patience": args.patience, "minDelta": args.min_delta, "lam": args.lam}
+    cfg.update(dict((k, v) for k, v in flags.items() if v is not None))
+  except ValueError as e:
+    parser.error(str(e))
+  constant = isinstance(cfg.alpha, config.Constant) and isinstance(cfg.epsilon, config.Constant)
+  if (args.batch > 0 or args.workers > 1 or args.replay > 0) and (not constant or cfg.patience is not None):
+    parser.error("schedules and --patience are only supported when training in a single process without --batch or --replay")
+
+  if args.batch > 0 and args.table not in ("array", "symmetric"):
+    parser.error("--batch requires --table array or --table symmetric")
+  if args.batch > 0 and args.workers > 1:
+    parser.error("--batch and --workers cannot be used together")
+  if args.replay > 0 and args.table not in ("array", "symmetric"):
+    parser.error("--replay requires --table array or --table symmetric")
+  if args.replay > 0 and (args.batch > 0 or args.workers > 1):
+    parser.error("--replay cannot be used together with --batch or --workers")
+  if args.replay > 0 and cfg.algo != "qlearning":
+    parser.error("--replay requires --algo qlearning")
+  if (args.batch > 0 or args.workers > 1) and cfg.algo not in ("sarsa", "qlearning"):
+    parser.error("--batch and --workers only support --algo sarsa and --algo qlearning")
+  if args.workers > 1 and args.table == "sparse":
+    parser.error("--workers requires --table dict, array or symmetric")
+  board = None
+  if args.board:
+    try:
+      board = mnk.Board(*[int(n) for n in args.board.split(",")])
+    except (TypeError, ValueError):
+      parser.error("--board must be three numbers M,N,K with K at most M or N")
+    if args.table != "sparse":
+      parser.error("--board requires --table sparse")
+    if (args.bitboard or args.batch > 0 or args.replay > 0 or args.workers > 1 or args.init != "draw" or
+        args.opponent != "trained" or args.load or args.save or args.eval_exact or args.metrics):
+      parser.error("--board only supports training with sampled evaluations in a single process, and playing against the trained agents")
+  if args.opponent == "minimax" or args.load:
+    algo = None
   else:
-    algo = train.QLearning
-    print "Training using Q-learning algorithm"
+    algo = train.Algorithms[cfg.algo]
+    print "Training using %s algorithm" % algorithmNames[cfg.algo]
 
-  circle = tictactoe.ActionValueFunc(tictactoe.PlayerCircle)
-  cross = tictactoe.ActionValueFunc(tictactoe.PlayerCross)
-  train.run(algo, circle, cross)
+  stateClass = tictactoe.State
+  if args.bitboard:
+    stateClass = tictactoe.BitState
+  elif board is not None:
+    stateClass = board
+
+  actionValueFunc = tictactoe.ActionValueFunc
+  if args.table == "array":
+    actionValueFunc = qtable.ArrayActionValueFunc
+  elif args.table == "symmetric":
+    actionValueFunc = qtable.SymmetricActionValueFunc
+  elif args.table == "sparse":
+    actionValueFunc = qtable.SparseActionValueFunc
+
+  circle = actionValueFunc(tictactoe.PlayerCircle)
+  cross = actionValueFunc(tictactoe.PlayerCross)
+  if args.init == "minimax":
+    minimax.initialize(circle, stateClass)
+    minimax.initialize(cross, stateClass)
+  elif args.init == "solve":
+    solver.solve(circle, cfg.gamma, stateClass=stateClass)
+    solver.solve(cross, cfg.gamma, stateClass=stateClass)
+
+  if args.opponent == "minimax":
+    circle = minimax.MinimaxAgent(tictactoe.PlayerCircle)
+    cross = minimax.MinimaxAgent(tictactoe.PlayerCross)
+  elif args.load:
+    circlePath, crossPath = tablePaths(args.load)
+    circle, _ = tablefile.load(circlePath)
+    cross, _ = tablefile.load(crossPath)
+    print "Loaded %s and %s" % (circlePath, crossPath)
+  elif args.batch > 0:
+    batch.run(algo, circle, cross, cfg.episodes, args.batch, cfg.epsilon.value(0), cfg.alpha.value(0), cfg.gamma, seed=args.seed)
+  elif args.replay > 0:
+    replay.run(circle, cross, cfg.episodes, args.replay, args.replay_batch, args.replay_every,
+               cfg.epsilon.value(0), cfg.alpha.value(0), cfg.gamma, seed=args.seed)
+  elif args.workers > 1:
+    parallel.run(algo, circle, cross, args.workers, cfg.episodes, seed=args.seed or 0,
+                 epsilon=cfg.epsilon.value(0), alpha=cfg.alpha.value(0), gamma=cfg.gamma, stateClass=stateClass)
+  else:
+    schedule = train.EvalSchedule(args.eval_every, args.eval_games, args.eval_background, args.eval_exact)
+    checkpoints = None
+    if args.checkpoint:
+      checkpoints = checkpoint.CheckpointSchedule(args.checkpoint, args.checkpoint_every, args.checkpoint_seconds)
+    rng = random
+    if args.seed is not None:
+      rng = fastrandom.FastRandom(args.seed)
+    tel = None
+    if args.telemetry:
+      tel = telemetry.Telemetry(args.telemetry, args.telemetry_every, args.profile_every, args.profile_episodes)
+      signal.signal(signal.SIGUSR1, lambda signum, frame: tel.requestProfile())
+    log = None
+    if args.metrics:
+      log = metrics.Metrics(args.metrics)
+    train.run(algo, circle, cross, stateClass, schedule, checkpoints=checkpoints, resume=args.resume, rng=rng, cfg=cfg,
+              telemetry=tel, metrics=log)
 
-  print "Training completed, game starting..."
+  if algo is not None:
+    if args.save:
+      circlePath, crossPath = tablePaths(args.save)
+      header = tablefile.TableHeader(tictactoe.PlayerNone, algo.__name__, initialValue(cfg.alpha), cfg.gamma, initialValue(cfg.epsilon), cfg.episodes)
+      tablefile.save(circlePath, circle, header, stateClass)
+      tablefile.save(crossPath, cross, header, stateClass)
+    print "Training completed, game starting..."
+  if args.opponent != "minimax" and board is None:
+    # Games only need the best move of every state, so the tables are replaced by frozen policies, freeing their memory.
+    circle = policy.freeze(circle, stateClass)
+    cross = policy.freeze(cross, stateClass)
   while True:
     user = raw_input("Please choose a player, O or X: ")
     if user == "X" or user == "x":
@@ -42,7 +205,7 @@ def main():
       if random.random() < 0.5:
         opponentFirst = False
 
-    game.run(user, opponent, opponentFirst)
+    game.run(user, opponent, opponentFirst, stateClass)
 
 if __name__ == '__main__':
   main()
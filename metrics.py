@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+import time
+
+import evaluate
+import telemetry
+
+# Metrics records the progress of a training session to a log file, one record per evaluation window,
+# so that learning curves can be plotted afterwards without scraping the output of training.
+#
+# A record holds the reward-per-episode the circle player has been evaluated at by train.run,
+# the number of states each player has learnt, epsilon, alpha, and the episodes per second of the window.
+# When evaluations are exact, it also holds the exact expected reward of cross and the win, draw and loss rates
+# of both players against a random opponent, computed with the evaluate module so that recording neither plays games nor draws random numbers.
+#
+# Records are buffered and appended to the file in batches, as JSON lines, or as CSV if the path ends with .csv.
+# A session resumed from a checkpoint first drops the records after the checkpoint, so that no episode is recorded twice.
+
+# Fields are the fields of a record, in the order of the columns of CSV files.
+Fields = ["episode", "time", "episodesPerSecond", "epsilon", "alpha",
+          "circleReward", "circleWin", "circleDraw", "circleLoss", "circleStates",
+          "crossReward", "crossWin", "crossDraw", "crossLoss", "crossStates"]
+
+
+# A MetricsWriter appends records to a JSON lines or CSV file at path, in batches of batch records.
+class MetricsWriter:
+  def __init__(self, path, batch=100):
+    self.path = path
+    self.batch = batch
+    self.csv = path.endswith(".csv")
+    self.buffer = []
+
+  def write(self, record):
+    self.buffer.append(record)
+    if len(self.buffer) >= self.batch:
+      self.flush()
+
+  # flush appends the buffered records to the file.
+  def flush(self):
+    if not self.buffer:
+      return
+    header = self.csv and (not os.path.exists(self.path) or os.path.getsize(self.path) == 0)
+    with open(self.path, "a") as f:
+      if self.csv:
+        w = csv.writer(f)
+        if header:
+          w.writerow(Fields)
+        for r in self.buffer:
+          w.writerow([r.get(k) for k in Fields])
+      else:
+        for r in self.buffer:
+          f.write(json.dumps(r, sort_keys=True) + "\n")
+    self.buffer = []
+
+  # _episode returns the episode of a line of the file, or None if the line is not a complete record,
+  # such as a last line left half-written by an interrupted session.
+  def _episode(self, line):
+    if not line.endswith("\n"):
+      return None
+    try:
+      if self.csv:
+        return float(line.split(",", 1)[0])
+      return json.loads(line)["episode"]
+    except (ValueError, KeyError, TypeError):
+      return None
+
+  # truncate drops the records of episodes after episode, both buffered and already in the file,
+  # as well as lines of the file that are not complete records.
+  def truncate(self, episode):
+    self.buffer = [r for r in self.buffer if r["episode"] <= episode]
+    if not os.path.exists(self.path):
+      return
+    with open(self.path) as f:
+      lines = f.readlines()
+    kept, records = [], lines
+    if self.csv:
+      kept, records = lines[:1], lines[1:]
+    for line in records:
+      e = self._episode(line)
+      if e is not None and e <= episode:
+        kept.append(line)
+    if len(kept) < len(lines):
+      with open(self.path, "w") as f:
+        f.writelines(kept)
+
+
+# read returns the records of a JSON lines or CSV file written by a MetricsWriter.
+# Values of CSV files are converted to numbers, and empty ones to None.
+def read(path):
+  records = []
+  with open(path) as f:
+    if not path.endswith(".csv"):
+      for line in f:
+        records.append(json.loads(line))
+      return records
+    for row in csv.DictReader(f):
+      r = {}
+      for k, v in row.items():
+        r[k] = float(v) if v != "" else None
+      records.append(r)
+  return records
+
+# _number returns a hyperparameter as a number, or None for schedules such as config.VisitCount that have no single value.
+def _number(v):
+  if isinstance(v, (int, float)):
+    return v
+  return None
+
+
+# A Metrics records the windows of a training session with a MetricsWriter.
+class Metrics:
+  def __init__(self, path, batch=100):
+    self.writer = MetricsWriter(path, batch)
+    self.lastTime = time.time()
+    self.lastEpisode = 0
+
+  # begin starts the first window after episode, which is 0 unless the session is resumed.
+  # Records of later episodes, logged by an interrupted session after its last checkpoint, are dropped,
+  # since the resumed session records them again.
+  def begin(self, episode):
+    self.writer.truncate(episode)
+    self.lastTime = time.time()
+    self.lastEpisode = episode
+
+  # record records the window ending after episode epi, during which epsilon and alpha were the latest values of the schedules,
+  # with the reward-per-episode reward the circle player has been evaluated at.
+  # Only if exact is True, as with train.EvalSchedule(exact=True), are the exact outcome rates of circle and the exact results of cross computed,
+  # since they take as long as an exact evaluation; otherwise they are left out of the record.
+  # The argument stateClass must be the State implementation circle and cross are trained with.
+  def record(self, epi, circle, cross, epsilon, alpha, gamma, stateClass, reward, exact=False):
+    now = time.time()
+    r = {
+      "episode": epi,
+      "time": now,
+      "episodesPerSecond": None,
+      "epsilon": _number(epsilon),
+      "alpha": _number(alpha),
+    }
+    if now > self.lastTime:
+      r["episodesPerSecond"] = (epi - self.lastEpisode) / (now - self.lastTime)
+    for name, q in (("circle", circle), ("cross", cross)):
+      for field in ("Reward", "Win", "Draw", "Loss"):
+        r[name + field] = None
+      if exact:
+        r[name + "Reward"], r[name + "Win"], r[name + "Draw"], r[name + "Loss"] = evaluate.summary(q, gamma, stateClass)
+      r[name + "States"] = telemetry.tableSize(q)
+    r["circleReward"] = reward
+    self.writer.write(r)
+    # Start the next window after recording, so that recording does not count against throughput.
+    self.lastTime = time.time()
+    self.lastEpisode = epi
+
+  def flush(self):
+    self.writer.flush()
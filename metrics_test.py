@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from tictactoe import *
+import evaluate
+import metrics
+import plotmetrics
+import qtable
+import train
+
+class TestMetrics(unittest.TestCase):
+
+  def testRun(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      for name in ("metrics.jsonl", "metrics.csv"):
+        path = os.path.join(tmp, name)
+        log = metrics.Metrics(path, batch=2)
+        circle = ActionValueFunc(PlayerCircle)
+        cross = ActionValueFunc(PlayerCross)
+        schedule = train.EvalSchedule(evalEvery=25, exact=True)
+        evaluations = train.run(train.QLearning, circle, cross, schedule=schedule, totalEpisodes=50, metrics=log)
+        records = metrics.read(path)
+
+        # assert that every evaluation is logged, with the exact rewards and the outcome rates of both players
+        self.assertEqual([r["episode"] for r in records], [25, 50])
+        last = records[-1]
+        self.assertAlmostEqual(last["circleReward"], evaluations[-1][1])
+        self.assertAlmostEqual(last["crossReward"], evaluate.expectedReward(cross, 0.9))
+        for player in ("circle", "cross"):
+          self.assertAlmostEqual(last[player + "Win"] + last[player + "Draw"] + last[player + "Loss"], 1.0)
+        self.assertEqual(last["circleStates"], len(circle.stateActions))
+        self.assertEqual(last["epsilon"], 0.1)
+        self.assertTrue(last["episodesPerSecond"] > 0)
+
+        self.assertEqual(plotmetrics.curve(records, "crossReward")[0], [25, 50])
+
+        # assert that sampled evaluations are logged as they are, without computing exact results
+        os.remove(path)
+        log = metrics.Metrics(path, batch=2)
+        schedule = train.EvalSchedule(evalEvery=25, evalGames=50)
+        evaluations = train.run(train.QLearning, circle, cross, schedule=schedule, totalEpisodes=50, metrics=log)
+        records = metrics.read(path)
+        self.assertEqual([(r["episode"], r["circleReward"]) for r in records], evaluations)
+        for field in ("circleWin", "circleDraw", "circleLoss", "crossReward", "crossWin", "crossDraw", "crossLoss"):
+          self.assertEqual(records[-1][field], None)
+        self.assertEqual(records[-1]["crossStates"], len(cross.stateActions))
+    finally:
+      shutil.rmtree(tmp)
+
+
+  def testWriterBatches(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      path = os.path.join(tmp, "metrics.jsonl")
+      w = metrics.MetricsWriter(path, batch=3)
+      w.write({"episode": 1})
+      w.write({"episode": 2})
+      # assert that records are buffered until a batch is full
+      self.assertFalse(os.path.exists(path))
+      w.write({"episode": 3})
+      w.write({"episode": 4})
+      self.assertEqual([r["episode"] for r in metrics.read(path)], [1, 2, 3])
+      w.flush()
+      self.assertEqual([r["episode"] for r in metrics.read(path)], [1, 2, 3, 4])
+    finally:
+      shutil.rmtree(tmp)
+
+
+  def testResume(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      for name in ("metrics.jsonl", "metrics.csv"):
+        path = os.path.join(tmp, name)
+        w = metrics.MetricsWriter(path, batch=1)
+        for epi in (25, 50, 75, 100):
+          w.write({"episode": epi, "time": 1.5})
+        # assert that resuming from the checkpoint at episode 50 drops the records written after it
+        log = metrics.Metrics(path)
+        log.begin(50)
+        self.assertEqual([r["episode"] for r in metrics.read(path)], [25, 50])
+        log.writer.write({"episode": 75, "time": 2.5})
+        log.flush()
+        self.assertEqual([(r["episode"], r["time"]) for r in metrics.read(path)], [(25, 1.5), (50, 1.5), (75, 2.5)])
+
+        # assert that a last line left half-written by an interrupted session is dropped too
+        with open(path, "a") as f:
+          f.write('{"episode": 100' if name.endswith(".jsonl") else "100,1.")
+        log = metrics.Metrics(path)
+        log.begin(75)
+        self.assertEqual([r["episode"] for r in metrics.read(path)], [25, 50, 75])
+    finally:
+      shutil.rmtree(tmp)
+
+
+  def testOutcomeRates(self):
+    # assert that a random player moving first half of the time wins as often as it loses, and that rates add up
+    win, draw, loss = evaluate.outcomeRates(qtable.ArrayActionValueFunc(PlayerCircle), BitState)
+    self.assertAlmostEqual(win + draw + loss, 1.0)
+    self.assertAlmostEqual(win, loss)
+    self.assertTrue(0 < draw < 0.2)
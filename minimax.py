@@ -0,0 +1,130 @@
+import random
+
+import qtable
+import tictactoe
+
+# This module solves Tic Tac Toe with negamax search and alpha-beta pruning.
+# Search results are kept in a transposition table shared by all callers,
+# so every state is searched at most once per process, and later queries are dictionary lookups.
+#
+# Values are given from the point of view of the player to move, and are
+# tictactoe.ScoreWin, tictactoe.ScoreDraw or tictactoe.ScoreLose when both players play perfectly from then on.
+
+def _opponent(player):
+  if player == tictactoe.PlayerCircle:
+    return tictactoe.PlayerCross
+  return tictactoe.PlayerCircle
+
+# _order is the order in which positions are searched. Trying the center and corners first causes more cutoffs.
+_order = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Kinds of entries in the transposition table.
+# An exact entry holds the value of a state, whereas lower and upper entries hold bounds found in searches that were cut off.
+_exact = 0
+_lower = 1
+_upper = 2
+
+# _table is the transposition table, mapping the qtable.stateKey of a state combined with the player to move, key | player << 18,
+# to a value and its kind.
+_table = {}
+
+# _negamax returns the value of a BitState for the player to move, if it lies within (alpha, beta).
+# Otherwise, a bound on the value that lies outside of the window is returned.
+def _negamax(state, player, alpha, beta):
+  key = state.o | state.x << 9 | player << 18
+  entry = _table.get(key)
+  if entry is not None:
+    v, kind = entry
+    if kind == _exact:
+      return v
+    if kind == _lower and v >= beta:
+      return v
+    if kind == _upper and v <= alpha:
+      return v
+
+  alphaOrig = alpha
+  best = tictactoe.ScoreLose
+  occupied = state.o | state.x
+  for pos in _order:
+    if occupied >> pos & 1:
+      continue
+    s = tictactoe.takeAction(player, state, pos)
+    if s.terminal():
+      v = tictactoe.observeReward(player, s)
+    else:
+      v = -_negamax(s, _opponent(player), -beta, -alpha)
+    if v > best:
+      best = v
+    if v > alpha:
+      alpha = v
+    if alpha >= beta:
+      break
+
+  if best <= alphaOrig:
+    _table[key] = (best, _upper)
+  elif best >= beta:
+    _table[key] = (best, _lower)
+  else:
+    _table[key] = (best, _exact)
+  return best
+
+def _bitState(state):
+  if state.__class__ is tictactoe.BitState:
+    return state
+  return tictactoe.BitState.fromTuple(state.s)
+
+# value returns the game-theoretic value of a non-terminal state for the player to move.
+def value(state, player):
+  return _negamax(_bitState(state), player, tictactoe.ScoreLose, tictactoe.ScoreWin)
+
+# actionValue returns the game-theoretic value for a player of taking position pos in a state.
+def actionValue(state, player, pos):
+  s = tictactoe.takeAction(player, _bitState(state), pos)
+  if s.terminal():
+    return tictactoe.observeReward(player, s)
+  return -value(s, _opponent(player))
+
+# optimalActions returns the positions that achieve the game-theoretic value of a non-terminal state for the player to move.
+def optimalActions(state, player):
+  values = [(pos, actionValue(state, player, pos)) for pos in state.unoccupied()]
+  best = max(v for _, v in values)
+  return [pos for pos, v in values if v == best]
+
+
+# A MinimaxAgent is a perfect player, which can take the place of an ActionValueFunc in tictactoe.chooseAction and game.run.
+# Among optimal actions, it picks one uniformly at random.
+class MinimaxAgent:
+  def __init__(self, player):
+    self.player = player
+
+  # bestAction returns an optimal position with respect to the current state, chosen with the random number generator rng.
+  def bestAction(self, state, rng=random):
+    return rng.choice(optimalActions(state, self.player))
+
+
+# playerStates returns the non-terminal reachable states in which a player may be the one to move.
+# Each state is returned as a pair of its BitState and its equivalent in the State implementation stateClass.
+def playerStates(player, stateClass=tictactoe.State):
+  for state in qtable.States:
+    if state.terminal():
+      continue
+    circles = bin(state.o).count("1")
+    crosses = bin(state.x).count("1")
+    if player == tictactoe.PlayerCircle and circles > crosses:
+      continue
+    if player == tictactoe.PlayerCross and crosses > circles:
+      continue
+
+    s = state
+    if stateClass is not tictactoe.BitState:
+      s = stateClass()
+      s.s = state.s
+    yield state, s
+
+# initialize sets the scores of an action-value function to the game-theoretic values of its actions,
+# in all reachable states where its player may be the one to move.
+# The argument stateClass must be the State implementation q is going to be trained with.
+def initialize(q, stateClass=tictactoe.State):
+  for state, s in playerStates(q.player, stateClass):
+    for pos in state.unoccupied():
+      q.update(s, pos, actionValue(state, q.player, pos))
@@ -0,0 +1,78 @@
+import random
+import unittest
+
+from tictactoe import *
+import minimax
+import qtable
+
+# fullMinimax returns the game-theoretic value of a state without pruning, as a reference for the alpha-beta search.
+def fullMinimax(state, player, memo):
+  key = (state, player)
+  if key not in memo:
+    other = PlayerCross if player == PlayerCircle else PlayerCircle
+    values = []
+    for pos in state.unoccupied():
+      s = takeAction(player, state, pos)
+      if s.terminal():
+        values.append(observeReward(player, s))
+      else:
+        values.append(-fullMinimax(s, other, memo))
+    memo[key] = max(values)
+  return memo[key]
+
+class TestMinimax(unittest.TestCase):
+
+  def testValue(self):
+    # Tic Tac Toe is a draw under perfect play.
+    self.assertEqual(minimax.value(State(), PlayerCircle), ScoreDraw)
+
+    # Circle to move wins by completing the top row, which is its only optimal action.
+    s = BitState.fromTuple((PlayerCircle, PlayerCircle, PlayerNone,
+                            PlayerCross,  PlayerCross,  PlayerNone,
+                            PlayerNone,   PlayerNone,   PlayerNone, ))
+    self.assertEqual(minimax.value(s, PlayerCircle), ScoreWin)
+    self.assertEqual(minimax.optimalActions(s, PlayerCircle), [2])
+    # Cross to move wins either by completing the middle row at once, or by blocking circle and completing it later.
+    self.assertEqual(minimax.value(s, PlayerCross), ScoreWin)
+    self.assertEqual(minimax.optimalActions(s, PlayerCross), [2, 5])
+
+
+  def testSameAsFullMinimax(self):
+    # assert that pruning and the transposition table do not change the value of any state
+    memo = {}
+    for player in (PlayerCircle, PlayerCross):
+      for state, _ in minimax.playerStates(player, BitState):
+        for pos in state.unoccupied():
+          s = takeAction(player, state, pos)
+          if not s.terminal():
+            other = PlayerCross if player == PlayerCircle else PlayerCircle
+            self.assertEqual(minimax.value(s, other), fullMinimax(s, other, memo))
+
+
+  def testMinimaxAgent(self):
+    # assert that a perfect player never loses against a random one
+    random.seed(4)
+    agent = minimax.MinimaxAgent(PlayerCross)
+    opponent = ActionValueFunc(PlayerCircle)
+    for i in range(200):
+      s = State()
+      q = [opponent, agent] if i % 2 == 0 else [agent, opponent]
+      while not s.terminal():
+        s = takeAction(q[0].player, s, chooseAction(q[0], s, 0))
+        q.reverse()
+      self.assertNotEqual(s.winner(), PlayerCircle)
+
+
+  def testInitialize(self):
+    q = qtable.ArrayActionValueFunc(PlayerCircle)
+    minimax.initialize(q, BitState)
+
+    # The center is a draw for circle on an empty grid, and so are all other first moves.
+    for pos in range(9):
+      self.assertEqual(q.Q(BitState(), pos), ScoreDraw)
+    # Circle wins by completing the top row.
+    s = BitState.fromTuple((PlayerCircle, PlayerCircle, PlayerNone,
+                            PlayerCross,  PlayerCross,  PlayerNone,
+                            PlayerNone,   PlayerNone,   PlayerNone, ))
+    self.assertEqual(q.bestAction(s), 2)
+    self.assertEqual(q.best(s), ScoreWin)
@@ -0,0 +1,167 @@
+import random
+
+import tictactoe
+
+# This module generalizes the game to m,n,k boards: boards of m rows and n columns, on which a player wins
+# by taking k positions in a row, horizontally, vertically or diagonally. Tic Tac Toe is the 3,3,3 game,
+# and gomoku-like games such as 5,5,4 have far too many states for the dense tables of the qtable module.
+#
+# Positions are numbered row by row like in tictactoe.State, and a grid is encoded as two bit masks like in tictactoe.BitState.
+# Since a game can only be won with the last move, a State only looks for lines through the position just taken,
+# and remembers the winner so that winner and terminal are constant time.
+#
+# States hash to a Zobrist key: the XOR of a random key per (player, position) taken, updated with a single XOR per move,
+# so that hashing takes the same time however large the board.
+
+# A Board describes the geometry of an m,n,k game.
+# It can be passed wherever a State implementation is expected, e.g. to train.runEpisode,
+# since calling it returns the empty State of the board.
+class Board(object):
+  def __init__(self, rows, cols, k):
+    if rows < 1 or cols < 1 or k < 1 or k > max(rows, cols):
+      raise ValueError("invalid board %dx%d with %d in a row" % (rows, cols, k))
+    self.rows = rows
+    self.cols = cols
+    self.k = k
+    self.size = rows * cols
+    # full is the bit mask of a grid with all its positions occupied.
+    self.full = (1 << self.size) - 1
+
+    # windows[pos] are the bit masks of all the lines of k positions through position pos.
+    windows = [[] for _ in range(self.size)]
+    for row in range(rows):
+      for col in range(cols):
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+          endRow, endCol = row + dr*(k - 1), col + dc*(k - 1)
+          if endRow >= rows or endCol < 0 or endCol >= cols:
+            continue
+          line = [(row + dr*i)*cols + col + dc*i for i in range(k)]
+          mask = sum(1 << pos for pos in line)
+          for pos in line:
+            windows[pos].append(mask)
+    self.windows = tuple(tuple(w) for w in windows)
+
+    # zobrist[player][pos] is the key of player having taken position pos.
+    # Keys depend only on the geometry, so that a board rebuilt by unpickling hashes states the same way.
+    rng = random.Random(rows << 16 | cols << 8 | k)
+    self.zobrist = tuple(tuple(int(rng.getrandbits(63)) for _ in range(self.size)) for _ in range(3))
+
+  def __reduce__(self):
+    return (Board, (self.rows, self.cols, self.k))
+
+  def __eq__(self, other):
+    return isinstance(other, Board) and (self.rows, self.cols, self.k) == (other.rows, other.cols, other.k)
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __hash__(self):
+    return hash((self.rows, self.cols, self.k))
+
+  def __call__(self):
+    return State(self)
+
+  # fromTuple returns the State of a grid represented like tictactoe.State.s, with one player per position.
+  # The winner is looked for among all lines, since the last move is unknown.
+  def fromTuple(self, s):
+    state = State(self)
+    for pos, player in enumerate(s):
+      if player == tictactoe.PlayerCircle:
+        state.o |= 1 << pos
+      elif player == tictactoe.PlayerCross:
+        state.x |= 1 << pos
+      if player != tictactoe.PlayerNone:
+        state.key ^= self.zobrist[player][pos]
+    for pos in range(self.size):
+      for player, bits in ((tictactoe.PlayerCircle, state.o), (tictactoe.PlayerCross, state.x)):
+        if bits >> pos & 1 and self._lineThrough(bits, pos):
+          state.win = player
+    return state
+
+  # _lineThrough returns whether the positions set in bits contain a line through position pos.
+  def _lineThrough(self, bits, pos):
+    for mask in self.windows[pos]:
+      if bits & mask == mask:
+        return True
+    return False
+
+
+# A State is a snapshot of the grid of an m,n,k game, which can be used interchangeably with tictactoe.State
+# by the training and game code. States are created by calling their Board, and moves are made with tictactoe.takeAction.
+#
+# States of different boards must not be mixed, as they are compared by their grids only.
+class State(object):
+  __slots__ = ("board", "o", "x", "key", "win")
+
+  def __init__(self, board, o=0, x=0, key=0, win=tictactoe.PlayerNone):
+    self.board = board
+    self.o = o
+    self.x = x
+    self.key = key # the Zobrist key of the grid
+    self.win = win # the winner, found when the winning position was taken
+
+  # rows and cols are the dimensions of the board, which game.printBoard draws.
+  @property
+  def rows(self):
+    return self.board.rows
+
+  @property
+  def cols(self):
+    return self.board.cols
+
+  # s returns the grid of this state as a tuple, in the same layout as tictactoe.State.s.
+  @property
+  def s(self):
+    return tuple(tictactoe.PlayerCircle if self.o >> pos & 1 else tictactoe.PlayerCross if self.x >> pos & 1 else tictactoe.PlayerNone
+                 for pos in range(self.board.size))
+
+  def __eq__(self, other):
+    return self.o == other.o and self.x == other.x
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __hash__(self):
+    return self.key
+
+  def __getstate__(self):
+    return (self.board, self.o, self.x, self.key, self.win)
+
+  def __setstate__(self, state):
+    self.board, self.o, self.x, self.key, self.win = state
+
+  # winner returns the winner of a state, or PlayerNone if no one has taken k positions in a row yet.
+  def winner(self):
+    return self.win
+
+  # terminal returns whether or not this state contains no possible future moves.
+  def terminal(self):
+    return self.win != tictactoe.PlayerNone or self.o | self.x == self.board.full
+
+  # unoccupied returns the list of positions that are available.
+  def unoccupied(self):
+    res = []
+    free = self.board.full & ~(self.o | self.x)
+    while free:
+      low = free & -free
+      res.append(low.bit_length() - 1)
+      free ^= low
+    return res
+
+  # play returns the state after player takes position pos, looking for a win only along the lines through pos.
+  # It is called by tictactoe.takeAction.
+  def play(self, player, pos):
+    bit = 1 << pos
+    if (self.o | self.x) & bit:
+      raise ValueError("invalid position %s for state %s" % (pos, self.s))
+    board = self.board
+    o, x, win = self.o, self.x, self.win
+    if player == tictactoe.PlayerCircle:
+      o |= bit
+      bits = o
+    else:
+      x |= bit
+      bits = x
+    if win == tictactoe.PlayerNone and board._lineThrough(bits, pos):
+      win = player
+    return State(board, o, x, self.key ^ board.zobrist[player][pos], win)
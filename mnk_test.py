@@ -0,0 +1,120 @@
+import pickle
+import random
+import unittest
+
+from tictactoe import *
+import fastrandom
+import mnk
+import qtable
+import train
+
+class TestMNK(unittest.TestCase):
+
+  def testSameAsTicTacToe(self):
+    # On the 3,3,3 board, states agree with BitState in every reachable state.
+    board = mnk.Board(3, 3, 3)
+    for state in qtable.States:
+      s = board.fromTuple(state.s)
+      self.assertEqual(s.s, state.s)
+      self.assertEqual(s.winner(), state.winner())
+      self.assertEqual(s.terminal(), state.terminal())
+      self.assertEqual(s.unoccupied(), list(state.unoccupied()))
+      if state.terminal():
+        continue
+      for pos in state.unoccupied():
+        for player in (PlayerCircle, PlayerCross):
+          t = takeAction(player, s, pos)
+          expected = takeAction(player, state, pos)
+          self.assertEqual(t.s, expected.s)
+          self.assertEqual(t.winner(), expected.winner())
+          self.assertEqual(t, board.fromTuple(expected.s))
+          self.assertEqual(hash(t), hash(board.fromTuple(expected.s)))
+
+
+  def testWinDetection(self):
+    board = mnk.Board(5, 5, 4)
+    s = board()
+    # Three in a row do not win, the fourth on the anti-diagonal does.
+    for pos in (4, 8, 12):
+      s = takeAction(PlayerCross, s, pos)
+      self.assertEqual(s.winner(), PlayerNone)
+    s = takeAction(PlayerCircle, s, 0)
+    s = takeAction(PlayerCross, s, 16)
+    self.assertEqual(s.winner(), PlayerCross)
+    self.assertTrue(s.terminal())
+    self.assertEqual(observeReward(PlayerCross, s), ScoreWin)
+    self.assertEqual(observeReward(PlayerCircle, s), ScoreLose)
+
+    # Lines do not wrap around the edges of the board.
+    s = board()
+    for pos in (3, 4, 5, 6):
+      s = takeAction(PlayerCircle, s, pos)
+    self.assertEqual(s.winner(), PlayerNone)
+
+    self.assertRaises(ValueError, takeAction, PlayerCircle, s, 3)
+    self.assertRaises(ValueError, mnk.Board, 3, 3, 4)
+
+
+  def testZobrist(self):
+    # The same grid reached in different orders is the same state, with the same hash.
+    board = mnk.Board(4, 5, 3)
+    a = takeAction(PlayerCross, takeAction(PlayerCircle, board(), 7), 12)
+    b = takeAction(PlayerCircle, takeAction(PlayerCross, board(), 12), 7)
+    self.assertEqual(a, b)
+    self.assertEqual(hash(a), hash(b))
+    self.assertNotEqual(hash(a), hash(board()))
+
+    # Unpickled states and boards hash the same way.
+    c = pickle.loads(pickle.dumps(a, pickle.HIGHEST_PROTOCOL))
+    self.assertEqual(c, a)
+    self.assertEqual(hash(c), hash(a))
+    self.assertEqual(c.board, board)
+    self.assertEqual(hash(takeAction(PlayerCircle, c, 0)), hash(takeAction(PlayerCircle, a, 0)))
+
+
+  def testTraining(self):
+    board = mnk.Board(4, 4, 3)
+    circle = qtable.SparseActionValueFunc(PlayerCircle)
+    cross = qtable.SparseActionValueFunc(PlayerCross)
+    rng = fastrandom.FastRandom(1)
+    evalRng = random.Random(2)
+    before = sum(train.rewardPerEpisode(circle, 0.9, board, evalRng) for _ in range(500))
+    for i in range(3000):
+      q = [circle, cross] if i & 1 else [cross, circle]
+      train.runEpisode(train.QLearning, q, 0.1, 0.2, 0.9, board, rng)
+    evalRng = random.Random(2)
+    after = sum(train.rewardPerEpisode(circle, 0.9, board, evalRng) for _ in range(500))
+    self.assertGreater(len(circle.scores), 0)
+    self.assertGreater(after, before)
+
+
+  def testDictTable(self):
+    # The default tables of tictactoe hold any position of larger boards.
+    board = mnk.Board(4, 4, 3)
+    q = [ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross)]
+    rng = random.Random(6)
+    for algo in (train.SARSA, train.QLearning):
+      for _ in range(50):
+        train.runEpisode(algo, q, 0.1, 0.1, 0.9, board, rng)
+    s = takeAction(PlayerCross, board(), 15)
+    q[0].update(s, 14, 0.5)
+    self.assertEqual(q[0].Q(s, 14), 0.5)
+    self.assertEqual(q[0].best(s), 0.5)
+    self.assertEqual(q[0].bestAction(s), 14)
+
+
+  def testUpdateCount(self):
+    # runEpisode returns the number of updates it has made, which is the number of moves of the game, on any board.
+    class Counting(qtable.SparseActionValueFunc):
+      updates = 0
+      def update(self, state, pos, score):
+        Counting.updates += 1
+        qtable.SparseActionValueFunc.update(self, state, pos, score)
+
+    board = mnk.Board(4, 4, 3)
+    q = [Counting(PlayerCircle), Counting(PlayerCross)]
+    rng = random.Random(5)
+    for algo in (train.SARSA, train.QLearning):
+      for _ in range(50):
+        Counting.updates = 0
+        self.assertEqual(train.runEpisode(algo, q, 0.5, 0.1, 0.9, board, rng), Counting.updates)
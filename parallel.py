@@ -0,0 +1,101 @@
+import multiprocessing
+import random
+
+import fastrandom
+import tictactoe
+import train
+
+# A parallel training session splits episodes among worker processes.
+# Training proceeds in rounds: in every round each worker trains its own copies of the circle and cross ActionValueFuncs,
+# after which the parent merges the copies back into the originals, and hands the merged functions out for the next round.
+#
+# Every task of every round plays with its own random number generator, seeded by a seed drawn from a generator seeded with the seed of the session,
+# and results are merged in the order of workers. Therefore, a fixed seed and number of workers always give the same tables.
+
+# MergeAverage merges copies of an action-value function by averaging the scores of each (state, action) pair.
+MergeAverage = "average"
+# MergeLast merges copies of an action-value function by keeping, for each (state, action) pair,
+# the score of the last worker that has changed it during the round.
+MergeLast = "last"
+
+# _trainEpisodes runs a task of a parallel training session in a worker process.
+def _trainEpisodes(task):
+  algo, circle, cross, episodes, epsilon, alpha, gamma, stateClass, seed = task
+  rng = fastrandom.FastRandom(seed)
+  for _ in range(episodes):
+    if rng.random() < 0.5:
+      q = [circle, cross]
+    else:
+      q = [cross, circle]
+    train.runEpisode(algo, q, epsilon, alpha, gamma, stateClass, rng)
+  return circle, cross
+
+# _entries returns the (state, action) pairs stored in a tictactoe.ActionValueFunc.
+def _entries(q):
+  for state, sa in q.stateActions.items():
+    for ps in sa.a:
+      yield state, ps.pos
+
+# merge replaces the scores of the action-value function q by merging copies of it, which have been trained separately.
+# The argument how is either MergeAverage or MergeLast.
+def merge(q, copies, how=MergeAverage):
+  if how != MergeAverage and how != MergeLast:
+    raise ValueError("unexpected merge: %s" % how)
+
+  if not isinstance(q, tictactoe.ActionValueFunc):
+    # Dense tables have the same layout, so merging is done position by position over their values arrays.
+    values = q.values
+    for i in range(len(values)):
+      if how == MergeAverage:
+        values[i] = sum(c.values[i] for c in copies) / len(copies)
+      else:
+        base = values[i]
+        for c in copies:
+          if c.values[i] != base:
+            values[i] = c.values[i]
+    return
+
+  pairs = set()
+  for c in copies:
+    pairs.update(_entries(c))
+
+  merged = tictactoe.ActionValueFunc(q.player)
+  for state, pos in pairs:
+    if how == MergeAverage:
+      score = sum(c.Q(state, pos) for c in copies) / len(copies)
+    else:
+      score = q.Q(state, pos)
+      for c in copies:
+        if c.Q(state, pos) != q.Q(state, pos):
+          score = c.Q(state, pos)
+    merged.update(state, pos, score)
+  q.stateActions = merged.stateActions
+
+
+# run trains circle and cross like train.run, but using a pool of worker processes.
+# Every round, each of the workers plays syncEvery episodes before the functions are merged with the given method,
+# either MergeAverage or MergeLast.
+# The remaining arguments have the same meanings as in train.runEpisode.
+def run(algo, circle, cross, workers, episodes=400000, syncEvery=10000, how=MergeAverage, seed=0,
+        epsilon=0.1, alpha=0.1, gamma=0.9, stateClass=tictactoe.State):
+  rng = random.Random(seed)
+  pool = multiprocessing.Pool(workers)
+  try:
+    done = 0
+    while done < episodes:
+      tasks = []
+      for _ in range(workers):
+        n = min(syncEvery, episodes - done)
+        done += n
+        if n > 0:
+          tasks.append((algo, circle, cross, n, epsilon, alpha, gamma, stateClass, rng.getrandbits(32)))
+
+      results = pool.map(_trainEpisodes, tasks)
+      merge(circle, [r[0] for r in results], how)
+      merge(cross, [r[1] for r in results], how)
+
+      rpe = train.evaluate(circle, gamma, 1000, stateClass, rng)
+      print("episode: %s, reward-per-episode: %s" % (done, rpe))
+  finally:
+    pool.close()
+    pool.join()
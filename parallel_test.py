@@ -0,0 +1,57 @@
+import unittest
+
+from tictactoe import *
+import parallel
+import qtable
+import train
+
+class TestParallel(unittest.TestCase):
+
+  def testMerge(self):
+    state = State()
+    copies = [ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCircle)]
+    copies[0].update(state, 0, 0.3)
+    copies[1].update(state, 0, 0.6)
+    copies[2].update(state, 4, 0.9)
+
+    # assert that averaging counts pairs missing in a copy as having the default score
+    q = ActionValueFunc(PlayerCircle)
+    parallel.merge(q, copies, parallel.MergeAverage)
+    self.assertAlmostEqual(q.Q(state, 0), 0.3)
+    self.assertAlmostEqual(q.Q(state, 4), 0.3)
+    self.assertEqual(q.Q(state, 8), ScoreDraw)
+
+    # assert that the last change wins
+    q = ActionValueFunc(PlayerCircle)
+    parallel.merge(q, copies, parallel.MergeLast)
+    self.assertEqual(q.Q(state, 0), 0.6)
+    self.assertEqual(q.Q(state, 4), 0.9)
+
+    # assert that dense tables are merged the same way
+    dense = [qtable.ArrayActionValueFunc(PlayerCircle) for _ in copies]
+    for d, c in zip(dense, copies):
+      for s, pos in parallel._entries(c):
+        d.update(s, pos, c.Q(s, pos))
+    q = qtable.ArrayActionValueFunc(PlayerCircle)
+    parallel.merge(q, dense, parallel.MergeAverage)
+    self.assertAlmostEqual(q.Q(state, 0), 0.3)
+    self.assertAlmostEqual(q.Q(state, 4), 0.3)
+    q = qtable.ArrayActionValueFunc(PlayerCircle)
+    parallel.merge(q, dense, parallel.MergeLast)
+    self.assertEqual(q.Q(state, 0), 0.6)
+    self.assertEqual(q.Q(state, 4), 0.9)
+
+
+  def testReproducible(self):
+    # assert that a fixed seed gives the same tables
+    tables = []
+    for _ in range(2):
+      circle = ActionValueFunc(PlayerCircle)
+      cross = ActionValueFunc(PlayerCross)
+      parallel.run(train.QLearning, circle, cross, 2, episodes=400, syncEvery=100, seed=3)
+      tables.append(circle)
+
+    entries = sorted(parallel._entries(tables[0]), key=lambda e: (e[0].s, e[1]))
+    self.assertEqual(entries, sorted(parallel._entries(tables[1]), key=lambda e: (e[0].s, e[1])))
+    for state, pos in entries:
+      self.assertEqual(tables[0].Q(state, pos), tables[1].Q(state, pos))
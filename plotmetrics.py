@@ -0,0 +1,45 @@
+import argparse
+import os
+
+import metrics
+
+# This tool plots the learning curves of training sessions from the logs written with main.py --metrics,
+# like readme_static/reward_per_episode.png. It requires matplotlib, which training itself does not.
+
+# curve returns the episodes and the values of a field of the records of a metrics log, skipping records without the field.
+def curve(records, field):
+  points = [(r["episode"], r[field]) for r in records if r.get(field) is not None]
+  return [p[0] for p in points], [p[1] for p in points]
+
+# plot draws the field of each of the logs at paths, labelled by labels, and saves the figure to out.
+def plot(paths, labels, field, out):
+  import matplotlib
+  matplotlib.use("Agg")
+  import matplotlib.pyplot as plt
+
+  fig, ax = plt.subplots()
+  for path, label in zip(paths, labels):
+    episodes, values = curve(metrics.read(path), field)
+    ax.plot(episodes, values, label=label)
+  ax.set_xlabel("episode")
+  ax.set_ylabel(field)
+  ax.legend()
+  fig.savefig(out)
+
+def main():
+  parser = argparse.ArgumentParser(description="Plot learning curves from metrics logs.")
+  parser.add_argument("logs", nargs="+", help="the JSON lines or CSV metrics logs to plot")
+  parser.add_argument("--labels", help="comma separated labels of the logs, their file names by default")
+  parser.add_argument("--field", default="circleReward", help="the field to plot, e.g. circleReward, crossReward or circleLoss")
+  parser.add_argument("--out", default="reward_per_episode.png", help="the image file to save the plot to")
+  args = parser.parse_args()
+
+  labels = [os.path.splitext(os.path.basename(p))[0] for p in args.logs]
+  if args.labels:
+    labels = args.labels.split(",")
+  if len(labels) != len(args.logs):
+    parser.error("--labels must have one label per log")
+  plot(args.logs, labels, args.field, args.out)
+
+if __name__ == '__main__':
+  main()
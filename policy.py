@@ -0,0 +1,76 @@
+import array
+import random
+
+import evaluate
+import minimax
+import qtable
+import tictactoe
+
+# This module freezes trained action-value functions into compact policies for playing, once training is over.
+#
+# A FrozenPolicy holds a single byte per dense state index of qtable.States: the position its player takes in that state.
+# It can optionally keep the scores of the function too, in an array laid out like the values of a qtable.ArrayActionValueFunc.
+# Both are flat arrays of machine values, without any Python object per state or per score,
+# so a policy takes under 10 KB, or under 700 KB with its scores, whatever the table it was frozen from.
+#
+# Since a policy is never modified after freezing and its arrays hold no reference counts,
+# reading it never writes to their memory: processes forked after freezing, or game sessions playing in parallel,
+# share the same physical pages copy-on-write, where the objects of a tictactoe.ActionValueFunc would be copied page by page.
+
+# NoMove is the move of a policy in states in which its player is not the one to move, and in terminal states.
+NoMove = 255
+
+# A FrozenPolicy is an immutable greedy policy, which can take the place of an action-value function
+# in tictactoe.chooseAction and game.run.
+class FrozenPolicy(object):
+  __slots__ = ("player", "moves", "scores")
+
+  def __init__(self, player, moves, scores=None):
+    self.player = player
+    self.moves = moves
+    self.scores = scores
+
+  # bestAction returns the position taken by the policy in a state, or raises a ValueError if it has none.
+  # The argument rng is unused, since ties have been broken when freezing, and is accepted for compatibility with action-value functions.
+  def bestAction(self, state, rng=random):
+    pos = self.moves[qtable.indexOf(state)]
+    if pos == NoMove:
+      raise ValueError("no move for player %s in state %s" % (self.player, state.s))
+    return pos
+
+  # Q returns the score of a (state, action) pair, if the scores have been kept when freezing.
+  def Q(self, state, pos):
+    if self.scores is None:
+      raise ValueError("the scores of this policy have not been kept")
+    return self.scores[qtable.indexOf(state)*9 + pos]
+
+  # best returns the score of the move of the policy in a state, or tictactoe.ScoreDraw in states without a move
+  # like terminal states of tictactoe.ActionValueFunc, if the scores have been kept when freezing.
+  def best(self, state):
+    if self.scores is None:
+      raise ValueError("the scores of this policy have not been kept")
+    i = qtable.indexOf(state)
+    if self.moves[i] == NoMove:
+      return tictactoe.ScoreDraw
+    return self.scores[i*9 + self.moves[i]]
+
+
+# freeze returns the FrozenPolicy of playing greedily with respect to the action-value function q.
+# Ties among the best positions of a state are broken once and for all with the random number generator rng,
+# and scores are kept if keepScores is True.
+# The argument stateClass must be the State implementation q has been trained with.
+def freeze(q, stateClass=tictactoe.State, keepScores=False, rng=random):
+  moves = array.array("B", [NoMove]) * qtable.NumStates
+  scores = None
+  if keepScores:
+    scores = array.array("d", [qtable.IllegalScore]) * (qtable.NumStates * 9)
+
+  for i, actions in enumerate(evaluate.greedyTable(q, stateClass)):
+    if actions is not None:
+      moves[i] = rng.choice(actions)
+  if keepScores:
+    for state, s in minimax.playerStates(q.player, stateClass):
+      i = qtable.indexOf(state)
+      for pos in state.unoccupied():
+        scores[i*9 + pos] = q.Q(s, pos)
+  return FrozenPolicy(q.player, moves, scores)
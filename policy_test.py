@@ -0,0 +1,50 @@
+import pickle
+import random
+import unittest
+
+from tictactoe import *
+import evaluate
+import minimax
+import policy
+import qtable
+
+class TestPolicy(unittest.TestCase):
+
+  def testFreeze(self):
+    for q, stateClass in ((ActionValueFunc(PlayerCircle), State), (qtable.SymmetricActionValueFunc(PlayerCross), BitState)):
+      minimax.initialize(q, stateClass)
+      p = policy.freeze(q, stateClass, keepScores=True, rng=random.Random(1))
+      self.assertEqual(p.player, q.player)
+      self.assertEqual(len(p.moves), qtable.NumStates)
+      for state, s in minimax.playerStates(q.player, stateClass):
+        self.assertTrue(p.bestAction(s) in evaluate.greedyActions(q, s))
+        self.assertEqual(p.best(s), q.best(s))
+        for pos in state.unoccupied():
+          self.assertEqual(p.Q(s, pos), q.Q(s, pos))
+
+      # Ties are broken once, so the policy always plays the same move, whatever the random number generator.
+      s = stateClass()
+      self.assertEqual(len(set(p.bestAction(s, random.Random(n)) for n in range(20))), 1)
+      self.assertEqual(chooseAction(p, s, 0), p.bestAction(s))
+
+    # Terminal states and states in which the player is not the one to move have no move.
+    won = BitState.fromTuple([PlayerCross]*3 + [PlayerCircle]*2 + [PlayerNone]*4)
+    self.assertRaises(ValueError, p.bestAction, won)
+    self.assertEqual(p.best(won), ScoreDraw)
+    self.assertRaises(ValueError, p.bestAction, BitState.fromTuple([PlayerCross] + [PlayerNone]*8))
+
+
+  def testWithoutScores(self):
+    q = qtable.ArrayActionValueFunc(PlayerCircle)
+    q.update(State(), 4, 1.0)
+    p = policy.freeze(q)
+    self.assertEqual(p.scores, None)
+    self.assertEqual(p.bestAction(State()), 4)
+    self.assertRaises(ValueError, p.Q, State(), 4)
+    self.assertRaises(ValueError, p.best, State())
+
+    # Policies have no attributes beyond their arrays, and survive pickling.
+    self.assertRaises(AttributeError, setattr, p, "other", 1)
+    p2 = pickle.loads(pickle.dumps(p, pickle.HIGHEST_PROTOCOL))
+    self.assertEqual(p2.player, p.player)
+    self.assertEqual(p2.moves, p.moves)
@@ -0,0 +1,319 @@
+import array
+import random
+
+import tictactoe
+
+# KeySize is the number of possible keys returned by stateKey.
+KeySize = 1 << 18
+
+# stateKey returns a perfect hash of a state, that is an integer in [0, KeySize) that differs for every grid.
+# Both tictactoe.State and tictactoe.BitState are supported, and a BitState is hashed to the same key as its equivalent State.
+def stateKey(state):
+  if state.__class__ is not tictactoe.BitState:
+    state = tictactoe.BitState.fromTuple(state.s)
+  return state.o | state.x << 9
+
+# enumerateStates returns all states that can be reached in a game, in breadth first order starting from the empty grid.
+# Since either player may move first in our training sessions, states reached by both playing orders are included.
+def enumerateStates():
+  states = [tictactoe.BitState()]
+  seen = set(states)
+  for state in states:
+    if state.terminal():
+      continue
+
+    circles = bin(state.o).count("1")
+    crosses = bin(state.x).count("1")
+    players = []
+    if circles <= crosses:
+      players.append(tictactoe.PlayerCircle)
+    if crosses <= circles:
+      players.append(tictactoe.PlayerCross)
+
+    for player in players:
+      for pos in state.unoccupied():
+        newState = tictactoe.takeAction(player, state, pos)
+        if newState not in seen:
+          seen.add(newState)
+          states.append(newState)
+  return states
+
+# States is the list of all reachable states, and a state's position in this list is its dense index.
+States = enumerateStates()
+# NumStates is the number of reachable states.
+NumStates = len(States)
+
+# _index maps the key of a state to its dense index, or -1 if the state is unreachable.
+_index = array.array("i", [-1]) * KeySize
+for i, state in enumerate(States):
+  _index[stateKey(state)] = i
+
+# legalActions[i] is the tuple of available positions of the state with dense index i.
+legalActions = tuple(state.unoccupied() for state in States)
+
+# IllegalScore is the score stored in an ArrayActionValueFunc for the positions that are already occupied.
+# Since it is lower than any real score, such positions never get picked as the best action.
+IllegalScore = float("-inf")
+
+# _initialValues are the scores of a newly created ArrayActionValueFunc,
+# where each available position gets the default value of tictactoe.ScoreDraw.
+_initialValues = array.array("d", [IllegalScore]) * (NumStates * 9)
+for i, legal in enumerate(legalActions):
+  for pos in legal:
+    _initialValues[i*9 + pos] = tictactoe.ScoreDraw
+
+# indexOf returns the dense index of a state.
+def indexOf(state):
+  if state.__class__ is tictactoe.BitState:
+    i = _index[state.o | state.x << 9]
+  else:
+    i = _index[stateKey(state)]
+  if i < 0:
+    raise ValueError("unreachable state %s" % (state.s, ))
+  return i
+
+
+# An ArrayActionValueFunc is an action-value function with the same interface as tictactoe.ActionValueFunc,
+# but backed by a single contiguous array of NumStates rows of 9 scores, one row for every reachable state.
+# The score of position pos in the state with dense index i is stored at values[i*9 + pos],
+# and occupied positions hold IllegalScore.
+#
+# Since every reachable state has a preallocated row, memory use is fixed at creation,
+# and looking up or updating a score is a matter of indexing into this array.
+class ArrayActionValueFunc:
+  def __init__(self, player, values=None):
+    self.player = player
+    if values is None:
+      values = array.array("d", _initialValues)
+    self.values = values
+
+  # offset returns the position in values of the score of position pos in the state with dense index i.
+  def offset(self, i, pos):
+    return i*9 + pos
+
+  # Q returns the score or a (state, action) pair.
+  def Q(self, state, pos):
+    return self.values[indexOf(state)*9 + pos]
+
+  # update updates the score of a (state, action) pair.
+  def update(self, state, pos, score):
+    self.values[indexOf(state)*9 + pos] = score
+
+  # best returns the score of the best possible action to be taken with respect to the current state.
+  # Terminal states have no actions, and are given the score tictactoe.ScoreDraw like in tictactoe.ActionValueFunc.
+  def best(self, state):
+    i = indexOf(state)
+    legal = legalActions[i]
+    if not legal:
+      return tictactoe.ScoreDraw
+
+    values = self.values
+    row = i * 9
+    top = IllegalScore
+    for pos in legal:
+      if values[row + pos] > top:
+        top = values[row + pos]
+    return top
+
+  # bestAction returns the position with the highest score with respect to the current state.
+  # In case there are more than one positions sharing the same highest score,
+  # one of them is picked uniformly at random with the random number generator rng.
+  def bestAction(self, state, rng=random):
+    i = indexOf(state)
+    values = self.values
+    row = i * 9
+    top = IllegalScore
+    action = -1
+    ties = 0
+    for pos in legalActions[i]:
+      v = values[row + pos]
+      if v > top:
+        top = v
+        action = pos
+        ties = 1
+      elif v == top:
+        # Reservoir sampling with a reservoir of size one keeps each tied position with equal probability.
+        ties += 1
+        if rng.random() * ties < 1:
+          action = pos
+    return action
+
+
+def _rotate(pos):
+  row, col = divmod(pos, 3)
+  return col*3 + 2 - row
+
+def _reflect(pos):
+  row, col = divmod(pos, 3)
+  return row*3 + 2 - col
+
+# Symmetries are the 8 rotations and reflections of the grid, each represented as a permutation of positions.
+# A symmetry moves the mark at position pos to position Symmetries[t][pos].
+Symmetries = []
+for _reflected in (False, True):
+  for _turns in range(4):
+    _perm = []
+    for _pos in range(9):
+      if _reflected:
+        _pos = _reflect(_pos)
+      for _ in range(_turns):
+        _pos = _rotate(_pos)
+      _perm.append(_pos)
+    Symmetries.append(tuple(_perm))
+Symmetries = tuple(Symmetries)
+
+# _permutedBits[t][bits] is the result of moving the positions set in bits by the symmetry t.
+_permutedBits = tuple(tuple(sum(1 << perm[pos] for pos in range(9) if bits >> pos & 1) for bits in range(tictactoe.BoardFull + 1))
+                      for perm in Symmetries)
+
+# The canonical representative of a state is the one with the smallest key among its 8 symmetric images.
+# Symmetric states share the scores of their canonical representative,
+# with positions mapped to the canonical grid through the same symmetry.
+CanonicalStates = []
+# _canonicalRow[i] is the offset of the row of scores of the canonical representative of the state with dense index i.
+_canonicalRow = array.array("i", [0]) * NumStates
+# _actionMap[i][pos] is the position in the canonical row that holds the score of position pos of the state with dense index i.
+# In case a state is symmetric to itself, all positions that are symmetric to each other are mapped to the same one.
+_actionMap = [None] * NumStates
+_canonicalIndex = {}
+for i, state in enumerate(States):
+  images = [(_permutedBits[t][state.o] | _permutedBits[t][state.x] << 9, t) for t in range(len(Symmetries))]
+  key = min(images)[0]
+  if key not in _canonicalIndex:
+    _canonicalIndex[key] = len(CanonicalStates)
+    CanonicalStates.append(States[_index[key]])
+  _canonicalRow[i] = _canonicalIndex[key] * 9
+  _actionMap[i] = tuple(min(Symmetries[t][pos] for k, t in images if k == key) for pos in range(9))
+_actionMap = tuple(_actionMap)
+del _canonicalIndex
+# NumCanonicalStates is the number of reachable states that are distinct up to symmetry.
+NumCanonicalStates = len(CanonicalStates)
+
+# _initialCanonicalValues are the scores of a newly created SymmetricActionValueFunc.
+# Only one position in every group of positions that are symmetric to each other gets the default value tictactoe.ScoreDraw,
+# the others are given IllegalScore so that they are never picked as the best action.
+_initialCanonicalValues = array.array("d", [IllegalScore]) * (NumCanonicalStates * 9)
+for i in range(NumStates):
+  for pos in legalActions[i]:
+    _initialCanonicalValues[_canonicalRow[i] + _actionMap[i][pos]] = tictactoe.ScoreDraw
+
+
+# A SymmetricActionValueFunc is an ArrayActionValueFunc that learns a single row of scores for all states symmetric to each other.
+# Its values array has NumCanonicalStates rows instead of NumStates rows, about 8 times smaller,
+# and a score learnt in one state immediately applies to all its rotations and reflections.
+class SymmetricActionValueFunc(ArrayActionValueFunc):
+  def __init__(self, player, values=None):
+    if values is None:
+      values = array.array("d", _initialCanonicalValues)
+    ArrayActionValueFunc.__init__(self, player, values)
+
+  # offset returns the position in values of the score of position pos in the state with dense index i.
+  def offset(self, i, pos):
+    return _canonicalRow[i] + _actionMap[i][pos]
+
+  # Q returns the score or a (state, action) pair.
+  def Q(self, state, pos):
+    i = indexOf(state)
+    return self.values[_canonicalRow[i] + _actionMap[i][pos]]
+
+  # update updates the score of a (state, action) pair.
+  def update(self, state, pos, score):
+    i = indexOf(state)
+    self.values[_canonicalRow[i] + _actionMap[i][pos]] = score
+
+  # best returns the score of the best possible action to be taken with respect to the current state.
+  # Terminal states have no actions, and are given the score tictactoe.ScoreDraw like in tictactoe.ActionValueFunc.
+  def best(self, state):
+    i = indexOf(state)
+    legal = legalActions[i]
+    if not legal:
+      return tictactoe.ScoreDraw
+
+    values = self.values
+    row = _canonicalRow[i]
+    actionMap = _actionMap[i]
+    top = IllegalScore
+    for pos in legal:
+      if values[row + actionMap[pos]] > top:
+        top = values[row + actionMap[pos]]
+    return top
+
+  # bestAction returns the position with the highest score with respect to the current state.
+  # In case there are more than one positions sharing the same highest score,
+  # one of them is picked uniformly at random with the random number generator rng.
+  def bestAction(self, state, rng=random):
+    i = indexOf(state)
+    values = self.values
+    row = _canonicalRow[i]
+    actionMap = _actionMap[i]
+    top = IllegalScore
+    action = -1
+    ties = 0
+    for pos in legalActions[i]:
+      v = values[row + actionMap[pos]]
+      if v > top:
+        top = v
+        action = pos
+        ties = 1
+      elif v == top:
+        ties += 1
+        if rng.random() * ties < 1:
+          action = pos
+    return action
+
+
+# A SparseActionValueFunc is an action-value function with the same interface as tictactoe.ActionValueFunc,
+# for games whose states are too many to preallocate, such as the larger boards of the mnk module.
+# Only the scores that have been updated are stored, in a small dictionary per state mapping positions to scores,
+# which is allocated on the first update of the state. Any other available position has the default score tictactoe.ScoreDraw.
+class SparseActionValueFunc:
+  def __init__(self, player):
+    self.player = player
+    self.scores = {}
+
+  # Q returns the score or a (state, action) pair.
+  def Q(self, state, pos):
+    scores = self.scores.get(state)
+    if scores is None:
+      return tictactoe.ScoreDraw
+    return scores.get(pos, tictactoe.ScoreDraw)
+
+  # update updates the score of a (state, action) pair.
+  def update(self, state, pos, score):
+    scores = self.scores.get(state)
+    if scores is None:
+      scores = self.scores[state] = {}
+    scores[pos] = score
+
+  # best returns the score of the best possible action to be taken with respect to the current state.
+  # States that have never been updated, including terminal states, are given the score tictactoe.ScoreDraw.
+  def best(self, state):
+    scores = self.scores.get(state)
+    if not scores:
+      return tictactoe.ScoreDraw
+    top = max(scores.values())
+    if top < tictactoe.ScoreDraw and len(scores) < len(state.unoccupied()):
+      return tictactoe.ScoreDraw
+    return top
+
+  # bestAction returns the position with the highest score with respect to the current state.
+  # In case there are more than one positions sharing the same highest score,
+  # one of them is picked uniformly at random with the random number generator rng.
+  def bestAction(self, state, rng=random):
+    scores = self.scores.get(state)
+    if not scores:
+      return rng.choice(state.unoccupied())
+    top = IllegalScore
+    action = -1
+    ties = 0
+    for pos in state.unoccupied():
+      v = scores.get(pos, tictactoe.ScoreDraw)
+      if v > top:
+        top = v
+        action = pos
+        ties = 1
+      elif v == top:
+        ties += 1
+        if rng.random() * ties < 1:
+          action = pos
+    return action
@@ -0,0 +1,191 @@
+import random
+import unittest
+
+from tictactoe import *
+from qtable import *
+import train
+
+class TestQTable(unittest.TestCase):
+
+  def testEnumerateStates(self):
+    # Every reachable state has a distinct dense index.
+    self.assertEqual(len(set(States)), NumStates)
+    for i, state in enumerate(States):
+      self.assertEqual(indexOf(state), i)
+
+    # The empty grid comes first, and players take turns in every reachable state.
+    self.assertEqual(States[0], BitState())
+    for state in States:
+      self.assertTrue(abs(bin(state.o).count("1") - bin(state.x).count("1")) <= 1)
+
+    # Unreachable states are rejected.
+    with self.assertRaises(ValueError):
+      indexOf(BitState(0x007, 0x038))
+
+
+  def testArrayActionValueFunc(self):
+    q = ArrayActionValueFunc(PlayerCircle)
+
+    state = State()
+    state.s = (PlayerCross,  PlayerNone,  PlayerCross,
+               PlayerCircle, PlayerNone,  PlayerCircle,
+               PlayerCircle, PlayerCross, PlayerNone, )
+
+    action = 8
+    score = ScoreWin + 0.6
+
+    # assert that the update method of an ArrayActionValueFunc does update itself
+    self.assertEqual(q.Q(state, action), ScoreDraw)
+    q.update(state, action, score)
+    self.assertEqual(q.Q(state, action), score)
+
+    # assert that State and BitState share the same entries
+    self.assertEqual(q.Q(BitState.fromTuple(state.s), action), score)
+
+    # assert that the best score is indeed the one we updated just now
+    self.assertEqual(q.best(state), score)
+    self.assertEqual(q.bestAction(state), action)
+
+    # occupied positions are never the best
+    q.update(state, 1, -5.0)
+    q.update(state, 4, -5.0)
+    q.update(state, 8, -5.0)
+    self.assertEqual(q.best(state), -5.0)
+    self.assertIn(q.bestAction(state), (1, 4, 8))
+
+
+  def testArrayActionValueFuncTies(self):
+    q = ArrayActionValueFunc(PlayerCircle)
+    state = BitState()
+    q.update(state, 0, 0.5)
+    q.update(state, 4, 0.5)
+    q.update(state, 8, 0.5)
+
+    random.seed(1)
+    counts = {}
+    for _ in range(3000):
+      pos = q.bestAction(state)
+      counts[pos] = counts.get(pos, 0) + 1
+
+    # assert that tied positions are chosen uniformly at random
+    self.assertEqual(sorted(counts), [0, 4, 8])
+    for pos in counts:
+      self.assertTrue(900 < counts[pos] < 1100)
+
+
+  def testSARSASameAsActionValueFunc(self):
+    # With epsilon = 1 all moves are random, so given the same seed,
+    # training an ArrayActionValueFunc must produce exactly the same scores as training an ActionValueFunc.
+    tables = [ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross)]
+    random.seed(7)
+    for _ in range(200):
+      train.runEpisode(train.SARSA, list(tables), 1.0, 0.1, 0.9)
+
+    arrays = [ArrayActionValueFunc(PlayerCircle), ArrayActionValueFunc(PlayerCross)]
+    random.seed(7)
+    for _ in range(200):
+      train.runEpisode(train.SARSA, list(arrays), 1.0, 0.1, 0.9, BitState)
+
+    for q, a in zip(tables, arrays):
+      for state, sa in q.stateActions.items():
+        for ps in sa.a:
+          self.assertEqual(a.Q(state, ps.pos), ps.score)
+
+
+  def testQLearningSameAsActionValueFunc(self):
+    # Apply Q-learning to the same transitions of random games,
+    # and assert that both kinds of action-value functions end up with the same scores.
+    q = ActionValueFunc(PlayerCircle)
+    a = ArrayActionValueFunc(PlayerCircle)
+    rng = random.Random(7)
+    for _ in range(300):
+      s = State()
+      if rng.random() < 0.5:
+        s = takeAction(PlayerCross, s, rng.choice(s.unoccupied()))
+      while not s.terminal():
+        action = rng.choice(s.unoccupied())
+        newState = takeAction(PlayerCircle, s, action)
+        if not newState.terminal():
+          newState = takeAction(PlayerCross, newState, rng.choice(newState.unoccupied()))
+        train.QLearning(q, s, action, newState, 0.1, 0.9)
+        train.QLearning(a, s, action, newState, 0.1, 0.9)
+        s = newState
+
+    for state, sa in q.stateActions.items():
+      for ps in sa.a:
+        self.assertEqual(a.Q(state, ps.pos), ps.score)
+
+
+  def testSymmetries(self):
+    # assert that symmetries preserve lines, so that symmetric states have the same winner.
+    lines = set(lineMasks)
+    for perm in Symmetries:
+      for m in lineMasks:
+        self.assertIn(sum(1 << perm[pos] for pos in range(9) if m >> pos & 1), lines)
+
+    # The canonical states are about 8 times fewer than the reachable states.
+    self.assertEqual(len(set(Symmetries)), 8)
+    self.assertEqual(len(set(CanonicalStates)), NumCanonicalStates)
+    self.assertTrue(NumStates / 8 <= NumCanonicalStates < NumStates / 7)
+
+
+  def testSymmetricActionValueFunc(self):
+    # Update a plain table at every symmetric image of a (state, action) pair,
+    # and a symmetric table only at the pair itself.
+    plain = ArrayActionValueFunc(PlayerCircle)
+    symmetric = SymmetricActionValueFunc(PlayerCircle)
+    rng = random.Random(3)
+    for _ in range(20000):
+      state = rng.choice(States)
+      if not state.unoccupied():
+        continue
+      pos = rng.choice(state.unoccupied())
+      score = rng.choice((-1.0, -0.5, 0.0, 0.5, 1.0)) + rng.random() * 0.01
+
+      symmetric.update(state, pos, score)
+      for perm in Symmetries:
+        image = BitState(sum(1 << perm[p] for p in range(9) if state.o >> p & 1),
+                         sum(1 << perm[p] for p in range(9) if state.x >> p & 1))
+        plain.update(image, perm[pos], score)
+
+    # assert that both tables agree on every score, and therefore have the same greedy policy.
+    random.seed(5)
+    for state in States:
+      for pos in state.unoccupied():
+        self.assertEqual(symmetric.Q(state, pos), plain.Q(state, pos))
+      self.assertEqual(symmetric.best(state), plain.best(state))
+      if state.unoccupied():
+        self.assertEqual(plain.Q(state, symmetric.bestAction(state)), plain.best(state))
+        self.assertEqual(symmetric.Q(state, plain.bestAction(state)), symmetric.best(state))
+
+
+  def testSparseActionValueFunc(self):
+    # Given the same seed, training a SparseActionValueFunc must produce exactly the same scores as training an ActionValueFunc.
+    tables = [ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross)]
+    random.seed(9)
+    for _ in range(200):
+      train.runEpisode(train.SARSA, list(tables), 1.0, 0.1, 0.9, BitState)
+
+    sparse = [SparseActionValueFunc(PlayerCircle), SparseActionValueFunc(PlayerCross)]
+    random.seed(9)
+    for _ in range(200):
+      train.runEpisode(train.SARSA, list(sparse), 1.0, 0.1, 0.9, BitState)
+
+    for q, a in zip(tables, sparse):
+      self.assertEqual(len(a.scores), len(q.stateActions))
+      for state in States:
+        for pos in state.unoccupied():
+          self.assertEqual(a.Q(state, pos), q.Q(state, pos))
+        self.assertEqual(a.best(state), q.best(state))
+
+    # Positions that have never been updated keep the default score, and win over lower scores.
+    q = SparseActionValueFunc(PlayerCircle)
+    s = takeAction(PlayerCross, BitState(), 4)
+    for pos in s.unoccupied():
+      if pos != 2:
+        q.update(s, pos, -0.5)
+    self.assertEqual(q.best(s), ScoreDraw)
+    self.assertEqual(q.bestAction(s), 2)
+    q.update(s, 2, -0.75)
+    self.assertEqual(q.best(s), -0.5)
+    self.assertNotEqual(q.bestAction(s), 2)
@@ -0,0 +1,104 @@
+import array
+
+import numpy
+
+import batch
+import fastrandom
+import tictactoe
+import train
+
+# Experience replay decouples playing from learning: the transitions of games are recorded into a ReplayBuffer
+# by train.runEpisode, and the action-value functions learn from minibatches of transitions sampled from the buffer,
+# so that every transition is learnt from many times, in large vectorized Q-learning updates.
+#
+# Transitions are described by dense state indices of qtable.States, and players by their index in graph.Players.
+
+# A ReplayBuffer holds the last capacity transitions recorded into it, overwriting the oldest ones once it is full.
+# A transition is a player taking an action in a state, and the reward it observes in the next state it gets to move in,
+# or the terminal state of the game.
+#
+# The fields of transitions are stored in preallocated arrays, which are cheap to append to one transition at a time,
+# and are viewed as NumPy arrays without copying when sampling.
+class ReplayBuffer:
+  def __init__(self, capacity):
+    self.capacity = capacity
+    self.players = array.array("b", [0]) * capacity
+    self.states = array.array("i", [0]) * capacity
+    self.actions = array.array("b", [0]) * capacity
+    self.rewards = array.array("d", [0.0]) * capacity
+    self.newStates = array.array("i", [0]) * capacity
+    self.terminal = array.array("b", [0]) * capacity
+    self.size = 0 # the number of transitions held
+    self.next = 0 # the position of the next transition to be recorded
+
+  def __len__(self):
+    return self.size
+
+  # add records the transition of the player with index p taking action a in the state with index s,
+  # and observing reward in the state with index newState, which is terminal or not.
+  def add(self, p, s, a, reward, newState, terminal):
+    i = self.next
+    self.players[i] = p
+    self.states[i] = s
+    self.actions[i] = a
+    self.rewards[i] = reward
+    self.newStates[i] = newState
+    self.terminal[i] = terminal
+    self.next = i + 1
+    if self.next == self.capacity:
+      self.next = 0
+    if self.size < self.capacity:
+      self.size += 1
+
+  # sample returns n transitions drawn uniformly with replacement with the numpy.random.RandomState rng,
+  # as NumPy arrays of players, states, actions, rewards, new states and terminal flags.
+  def sample(self, n, rng):
+    i = rng.randint(self.size, size=n)
+    return (numpy.frombuffer(self.players, dtype=numpy.int8)[i],
+            numpy.frombuffer(self.states, dtype=numpy.int32)[i],
+            numpy.frombuffer(self.actions, dtype=numpy.int8)[i],
+            numpy.frombuffer(self.rewards, dtype=numpy.float64)[i],
+            numpy.frombuffer(self.newStates, dtype=numpy.int32)[i],
+            numpy.frombuffer(self.terminal, dtype=numpy.int8)[i] != 0)
+
+
+# learn applies Q-learning updates for a minibatch of transitions returned by ReplayBuffer.sample
+# to the dense action-value functions circle and cross.
+# All targets are computed from the scores before the minibatch, and updates of the same (state, action) pair are averaged,
+# like in batch.BatchEpisodes.learn.
+def learn(transitions, circle, cross, alpha, gamma):
+  players, states, actions, rewards, newStates, terminal = transitions
+  for p, q in enumerate((circle, cross)):
+    sel = players == p
+    if not sel.any():
+      continue
+    values = numpy.frombuffer(q.values, dtype=numpy.float64)
+    offs = batch.offsets(q)
+    best = values[offs[newStates[sel]]].max(axis=1)
+    targets = rewards[sel] + gamma * numpy.where(terminal[sel], 0.0, best)
+
+    flat = offs[states[sel], actions[sel]]
+    delta = alpha * (targets - values[flat])
+    uniq, inverse = numpy.unique(flat, return_inverse=True)
+    values[uniq] += numpy.bincount(inverse, delta) / numpy.bincount(inverse)
+
+
+# run trains two dense action-value functions, qtable.ArrayActionValueFunc or one of its subclasses, with experience replay.
+# Each episode is played epsilon-greedily with the current scores and recorded into a ReplayBuffer of the given capacity.
+# Every trainEvery episodes, once the buffer holds at least batchSize transitions,
+# a minibatch of batchSize transitions is sampled from it and learnt with alpha and gamma.
+# The argument seed seeds the random number generators of the session.
+def run(circle, cross, episodes, capacity=100000, batchSize=1024, trainEvery=16, epsilon=0.1, alpha=0.1, gamma=0.9, seed=None):
+  rng = fastrandom.FastRandom(seed)
+  sampler = numpy.random.RandomState(seed)
+  buf = ReplayBuffer(capacity)
+  for epi in range(1, episodes + 1):
+    if rng.random() < 0.5:
+      q = [circle, cross]
+    else:
+      q = [cross, circle]
+    train.runEpisode(train.QLearning, q, epsilon, alpha, gamma, tictactoe.BitState, rng, buf)
+
+    if epi % trainEvery == 0 and len(buf) >= batchSize:
+      learn(buf.sample(batchSize, sampler), circle, cross, alpha, gamma)
+  return buf
@@ -0,0 +1,86 @@
+import numpy
+import unittest
+
+from tictactoe import *
+import evaluate
+import fastrandom
+import qtable
+import replay
+import train
+
+class TestReplay(unittest.TestCase):
+
+  def testRingBuffer(self):
+    buf = replay.ReplayBuffer(3)
+    for i in range(5):
+      buf.add(i % 2, i, i, float(i), i + 1, i == 4)
+    self.assertEqual(len(buf), 3)
+    # The two oldest transitions have been overwritten.
+    self.assertEqual(sorted(buf.states), [2, 3, 4])
+
+    players, states, actions, rewards, newStates, terminal = buf.sample(100, numpy.random.RandomState(1))
+    self.assertEqual(set(states.tolist()), set([2, 3, 4]))
+    for i in range(100):
+      self.assertEqual(players[i], states[i] % 2)
+      self.assertEqual(actions[i], states[i])
+      self.assertEqual(rewards[i], states[i])
+      self.assertEqual(newStates[i], states[i] + 1)
+      self.assertEqual(terminal[i], states[i] == 4)
+
+
+  def testRecordEpisode(self):
+    # Recording games must not change the scores, and must record one transition per move,
+    # the same ones whether games are played with State objects or on the precomputed graph.
+    bufs = []
+    for stateClass in (State, BitState):
+      circle = qtable.ArrayActionValueFunc(PlayerCircle)
+      cross = qtable.ArrayActionValueFunc(PlayerCross)
+      buf = replay.ReplayBuffer(1000)
+      rng = fastrandom.FastRandom(3)
+      moves = 0
+      for _ in range(20):
+        moves += train.runEpisode(train.QLearning, [circle, cross], 0.5, 0.5, 0.9, stateClass, rng, buf)
+      self.assertEqual(len(buf), moves)
+      for q in (circle, cross):
+        self.assertEqual(list(q.values), list(qtable.ArrayActionValueFunc(q.player).values))
+      bufs.append(buf)
+
+    for field in ("players", "states", "actions", "rewards", "newStates", "terminal"):
+      self.assertEqual(list(getattr(bufs[0], field)), list(getattr(bufs[1], field)))
+    # Both players observe the terminal state of each game.
+    self.assertEqual(sum(bufs[1].terminal), 40)
+
+
+  def testLearn(self):
+    # Transitions of distinct pairs are learnt like train.QLearning, duplicates are averaged.
+    buf = replay.ReplayBuffer(100)
+    rng = fastrandom.FastRandom(5)
+    circle = qtable.ArrayActionValueFunc(PlayerCircle)
+    cross = qtable.ArrayActionValueFunc(PlayerCross)
+    for _ in range(10):
+      train.runEpisode(train.QLearning, [circle, cross], 1.0, 0.5, 0.9, BitState, rng, buf)
+      train.runEpisode(train.QLearning, [cross, circle], 1.0, 0.5, 0.9, BitState, rng, buf)
+
+    n = len(buf)
+    transitions = buf.sample(n, numpy.random.RandomState(2))
+    players, states, actions, rewards, newStates, terminal = transitions
+    replay.learn(transitions, circle, cross, 0.5, 0.9)
+
+    expected = {}
+    for i in range(n):
+      p, s, a, s2 = int(players[i]), int(states[i]), int(actions[i]), int(newStates[i])
+      q = qtable.ArrayActionValueFunc((PlayerCircle, PlayerCross)[p])
+      train.QLearning(q, qtable.States[s], a, qtable.States[s2], 0.5, 0.9)
+      expected.setdefault((p, s, a), []).append(q.Q(qtable.States[s], a))
+    for (p, s, a), scores in expected.items():
+      q = (circle, cross)[p]
+      self.assertAlmostEqual(q.Q(qtable.States[s], a), sum(scores) / len(scores))
+
+
+  def testRun(self):
+    circle = qtable.SymmetricActionValueFunc(PlayerCircle)
+    cross = qtable.SymmetricActionValueFunc(PlayerCross)
+    before = evaluate.expectedReward(circle, 0.9, BitState)
+    buf = replay.run(circle, cross, 2000, capacity=5000, batchSize=256, trainEvery=4, seed=1)
+    self.assertEqual(len(buf), 5000)
+    self.assertGreater(evaluate.expectedReward(circle, 0.9, BitState), before)
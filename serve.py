@@ -0,0 +1,222 @@
+import argparse
+import collections
+import json
+import random
+import sys
+
+import evaluate
+import qtable
+import tablefile
+import tictactoe
+
+try:
+  import asyncio
+  _ProtocolBase = asyncio.Protocol
+except ImportError:
+  asyncio = None
+  _ProtocolBase = object
+
+# This module serves the moves of trained agents to other programs, without the interactive loop of game.run.
+#
+# A MoveServer answers batches of queries for the best moves of a player in given states.
+# When created, it computes the greedy actions of both action-value functions in every state once,
+# so that answering a query is a lookup into a list by the dense index of the state, and never touches the tables again.
+# Queries give states as grids, whose conversion to dense indices is kept in an LRU cache,
+# so that frequently asked grids are answered with a single dictionary lookup.
+#
+# serve runs a JSON lines server on top of a MoveServer with asyncio, which is only available in Python 3.
+# Each request is a line holding a JSON object such as {"id": 1, "player": "O", "states": ["X...O....", "XO..X...."]},
+# where states are written row by row with O, X and . for unoccupied positions,
+# and is answered by a line such as {"id": 1, "moves": [2, 8]}, or {"id": 1, "error": "..."} for invalid requests.
+# Moves of terminal states are null. Lines longer than MaxLineLength bytes are answered with an error, after which the connection is closed.
+
+# MaxLineLength is the maximum length in bytes of a request line.
+MaxLineLength = 1 << 20
+
+# Marks maps the characters of grids to players.
+Marks = {"O": tictactoe.PlayerCircle, "o": tictactoe.PlayerCircle, "X": tictactoe.PlayerCross, "x": tictactoe.PlayerCross,
+         ".": tictactoe.PlayerNone, "-": tictactoe.PlayerNone, " ": tictactoe.PlayerNone}
+
+# parsePlayer returns the player written as O or X.
+def parsePlayer(s):
+  player = Marks.get(s, tictactoe.PlayerNone) if len(s) == 1 else tictactoe.PlayerNone
+  if player == tictactoe.PlayerNone:
+    raise ValueError("unexpected player: %s" % s)
+  return player
+
+# parseState returns the BitState of a grid given as a string of 9 marks, or a list of 9 players like tictactoe.State.s.
+def parseState(grid):
+  if len(grid) != 9:
+    raise ValueError("a grid must have 9 positions: %s" % (grid, ))
+  if isinstance(grid, (list, tuple)):
+    if any(p not in (tictactoe.PlayerNone, tictactoe.PlayerCircle, tictactoe.PlayerCross) for p in grid):
+      raise ValueError("unexpected grid: %s" % (grid, ))
+    return tictactoe.BitState.fromTuple(grid)
+  try:
+    return tictactoe.BitState.fromTuple([Marks[c] for c in grid])
+  except KeyError:
+    raise ValueError("unexpected grid: %s" % grid)
+
+
+# An LRUCache is a dictionary holding at most size items, which forgets the least recently used ones first.
+class LRUCache:
+  def __init__(self, size):
+    self.size = size
+    self.items = collections.OrderedDict()
+
+  # get returns the value of key, or None if it is not cached.
+  def get(self, key):
+    value = self.items.pop(key, None)
+    if value is not None:
+      self.items[key] = value
+    return value
+
+  def put(self, key, value):
+    self.items.pop(key, None)
+    self.items[key] = value
+    if len(self.items) > self.size:
+      self.items.popitem(last=False)
+
+  def __len__(self):
+    return len(self.items)
+
+
+# A MoveServer answers queries for the best moves of the trained circle and cross action-value functions.
+# The argument stateClass must be the State implementation they have been trained with,
+# cacheSize is the number of grids whose dense indices are cached,
+# and rng is the random number generator breaking ties among greedy actions.
+class MoveServer:
+  def __init__(self, circle, cross, stateClass=tictactoe.State, cacheSize=65536, rng=random):
+    self.greedy = {tictactoe.PlayerCircle: evaluate.greedyTable(circle, stateClass), tictactoe.PlayerCross: evaluate.greedyTable(cross, stateClass)}
+    self.cache = LRUCache(cacheSize)
+    self.rng = rng
+
+  # load returns a MoveServer for the action-value functions saved with main.py --save PREFIX.
+  @staticmethod
+  def load(prefix, cacheSize=65536, rng=random):
+    circle, _ = tablefile.load(prefix + "-circle.qtable")
+    cross, _ = tablefile.load(prefix + "-cross.qtable")
+    return MoveServer(circle, cross, tictactoe.BitState, cacheSize, rng)
+
+  # _index returns the dense index of a state given as a tictactoe.State, a tictactoe.BitState or a grid accepted by parseState.
+  def _index(self, state):
+    if isinstance(state, (tictactoe.State, tictactoe.BitState)):
+      return qtable.indexOf(state)
+    key = state
+    if isinstance(state, list):
+      key = tuple(state)
+    i = self.cache.get(key)
+    if i is None:
+      i = qtable.indexOf(parseState(state))
+      self.cache.put(key, i)
+    return i
+
+  # bestMoves returns the best move of player in each of the states, or None for terminal states.
+  # A ValueError is raised if a state is not reachable, or not one in which player may be the one to move.
+  def bestMoves(self, player, states):
+    greedy = self.greedy.get(player)
+    if greedy is None:
+      raise ValueError("unexpected player: %s" % player)
+    moves = []
+    for state in states:
+      i = self._index(state)
+      actions = greedy[i]
+      if actions is None:
+        if not qtable.States[i].terminal():
+          raise ValueError("it is not the turn of player %s in %s" % (player, qtable.States[i].s))
+        moves.append(None)
+      elif len(actions) == 1:
+        moves.append(actions[0])
+      else:
+        moves.append(self.rng.choice(actions))
+    return moves
+
+  # handle returns the response line to a request line of the JSON lines protocol, given as text or as UTF-8 bytes.
+  def handle(self, line):
+    response = {}
+    try:
+      if isinstance(line, bytes):
+        line = line.decode("utf-8")
+      request = json.loads(line)
+      if not isinstance(request, dict):
+        raise ValueError("a request must be a JSON object")
+      if "id" in request:
+        response["id"] = request["id"]
+      response["moves"] = self.bestMoves(parsePlayer(request.get("player", "")), request.get("states", []))
+    except (ValueError, TypeError) as e:
+      response.pop("moves", None)
+      response["error"] = str(e)
+    return json.dumps(response) + "\n"
+
+
+# A _Protocol handles a connection of the JSON lines server, answering each complete line as soon as it is received.
+# While the transport has too many responses to send, it stops reading requests.
+class _Protocol(_ProtocolBase):
+  def __init__(self, server):
+    self.server = server
+    self.buffer = b""
+    self.closed = False
+
+  def connection_made(self, transport):
+    self.transport = transport
+
+  def data_received(self, data):
+    if self.closed:
+      return
+    self.buffer += data
+    lines = self.buffer.split(b"\n")
+    self.buffer = lines.pop()
+    # Neither complete lines nor the incomplete one left in the buffer may be longer than MaxLineLength.
+    tooLong = len(self.buffer) > MaxLineLength
+    responses = []
+    for line in lines:
+      if len(line) > MaxLineLength:
+        tooLong = True
+        break
+      if line.strip():
+        responses.append(self.server.handle(line))
+    if tooLong:
+      responses.append(json.dumps({"error": "request line longer than %d bytes" % MaxLineLength}) + "\n")
+    if responses:
+      self.transport.write("".join(responses).encode("utf-8"))
+    if tooLong:
+      self.buffer = b""
+      self.closed = True
+      self.transport.close()
+
+  def pause_writing(self):
+    self.transport.pause_reading()
+
+  def resume_writing(self):
+    self.transport.resume_reading()
+
+# start starts serving the MoveServer server at host and port on the asyncio event loop, and returns the asyncio server.
+# A port of 0 picks any free port, which can be found with the getsockname method of the sockets of the returned server.
+def start(server, host, port, loop):
+  return loop.run_until_complete(loop.create_server(lambda: _Protocol(server), host, port))
+
+# serve serves the MoveServer server at host and port until interrupted.
+def serve(server, host="127.0.0.1", port=8765):
+  loop = asyncio.new_event_loop()
+  s = start(server, host, port, loop)
+  sys.stderr.write("Serving moves on %s:%d\n" % s.sockets[0].getsockname()[:2])
+  try:
+    loop.run_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    s.close()
+    loop.run_until_complete(s.wait_closed())
+    loop.close()
+
+def main():
+  parser = argparse.ArgumentParser(description="Serve the moves of trained agents as JSON lines.")
+  parser.add_argument("prefix", help="the prefix the action-value functions have been saved with, by main.py --save PREFIX")
+  parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+  parser.add_argument("--port", type=int, default=8765, help="the port to listen on")
+  parser.add_argument("--cache", type=int, default=65536, help="the number of grids whose parsing is cached")
+  args = parser.parse_args()
+  serve(MoveServer.load(args.prefix, args.cache), args.host, args.port)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+from tictactoe import *
+import minimax
+import qtable
+import serve
+import tablefile
+
+def _perfectTables():
+  circle = qtable.ArrayActionValueFunc(PlayerCircle)
+  cross = qtable.ArrayActionValueFunc(PlayerCross)
+  minimax.initialize(circle, BitState)
+  minimax.initialize(cross, BitState)
+  return circle, cross
+
+class TestServe(unittest.TestCase):
+
+  def testBestMoves(self):
+    server = serve.MoveServer(*_perfectTables(), stateClass=BitState, cacheSize=100)
+    for player in (PlayerCircle, PlayerCross):
+      states = [state for state, _ in minimax.playerStates(player, BitState)]
+      moves = server.bestMoves(player, states)
+      for state, move in zip(states, moves):
+        self.assertTrue(move in minimax.optimalActions(state, player))
+
+    # Grids may be given as strings or lists, and terminal states have no move.
+    grids = ["X...O....", [PlayerCross, 0, 0, 0, PlayerCircle, 0, 0, 0, 0], "OOOXX....", "xo.oxo.x."]
+    moves = server.bestMoves(PlayerCross, grids)
+    for move in moves[:2]:
+      self.assertTrue(move in minimax.optimalActions(serve.parseState("X...O...."), PlayerCross))
+    self.assertEqual(moves[2], None)
+    self.assertTrue(moves[3] in minimax.optimalActions(serve.parseState("xo.oxo.x."), PlayerCross))
+    self.assertEqual(len(server.cache), 4)
+
+    self.assertRaises(ValueError, server.bestMoves, PlayerCircle, ["OO..X...."])
+    self.assertRaises(ValueError, server.bestMoves, PlayerCircle, ["OOOO....."])
+    self.assertRaises(ValueError, server.bestMoves, PlayerCircle, ["X..."])
+    self.assertRaises(ValueError, server.bestMoves, PlayerCircle, ["X..?O...."])
+    self.assertRaises(ValueError, server.bestMoves, PlayerNone, [])
+
+
+  def testLRUCache(self):
+    cache = serve.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    self.assertEqual(cache.get("a"), 1)
+    cache.put("c", 3)
+    # b is the least recently used.
+    self.assertEqual(cache.get("b"), None)
+    self.assertEqual(cache.get("a"), 1)
+    self.assertEqual(cache.get("c"), 3)
+    self.assertEqual(len(cache), 2)
+
+
+  def testHandle(self):
+    d = tempfile.mkdtemp()
+    try:
+      prefix = os.path.join(d, "perfect")
+      circle, cross = _perfectTables()
+      tablefile.save(prefix + "-circle.qtable", circle, tablefile.TableHeader(PlayerCircle), BitState)
+      tablefile.save(prefix + "-cross.qtable", cross, tablefile.TableHeader(PlayerCross), BitState)
+      server = serve.MoveServer.load(prefix)
+    finally:
+      shutil.rmtree(d)
+
+    r = json.loads(server.handle('{"id": 7, "player": "O", "states": ["XX..O....", "OOOXX...."]}'))
+    self.assertEqual(r, {"id": 7, "moves": [2, None]})
+    r = json.loads(server.handle('{"id": 8, "player": "Z", "states": []}'))
+    self.assertEqual(r["id"], 8)
+    self.assertTrue("error" in r and "moves" not in r)
+    self.assertTrue("error" in json.loads(server.handle('not json')))
+    self.assertTrue("error" in json.loads(server.handle('[1, 2]')))
+    # Requests may be given as UTF-8 bytes, and invalid ones are answered with an error too.
+    self.assertEqual(json.loads(server.handle(b'{"id": 9, "player": "O", "states": ["XX..O...."]}')), {"id": 9, "moves": [2]})
+    r = json.loads(server.handle(b'{"id": 10, "player": "\xff"}'))
+    self.assertTrue("error" in r and "moves" not in r)
+
+
+  def testProtocol(self):
+    class Transport:
+      def __init__(self):
+        self.written = []
+        self.reading = True
+        self.closed = False
+      def write(self, data):
+        self.written.append(data)
+      def pause_reading(self):
+        self.reading = False
+      def resume_reading(self):
+        self.reading = True
+      def close(self):
+        self.closed = True
+
+    server = serve.MoveServer(*_perfectTables(), stateClass=BitState)
+    protocol = serve._Protocol(server)
+    transport = Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(b'{"id": 1, "player": "\xff"}\n{"id": 2, "player": "O", "states": ["XX..O...."]}\n')
+    lines = b"".join(transport.written).decode("utf-8").splitlines()
+    self.assertTrue("error" in json.loads(lines[0]))
+    self.assertEqual(json.loads(lines[1]), {"id": 2, "moves": [2]})
+
+    # Reading stops while the transport cannot keep up with the responses.
+    protocol.pause_writing()
+    self.assertFalse(transport.reading)
+    protocol.resume_writing()
+    self.assertTrue(transport.reading)
+
+    # A line that never ends is answered with an error once it is too long, and the connection is closed.
+    transport.written = []
+    for _ in range(serve.MaxLineLength // 65536 + 1):
+      protocol.data_received(b"x" * 65536)
+    self.assertTrue(transport.closed)
+    self.assertEqual(protocol.buffer, b"")
+    self.assertTrue("error" in json.loads(b"".join(transport.written).decode("utf-8")))
+
+    # So is a complete line that is too long, even when it arrives at once, after the lines before it have been answered.
+    protocol = serve._Protocol(server)
+    transport = Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(b'{"id": 3, "player": "O", "states": ["XX..O...."]}\n' + b" " * (serve.MaxLineLength + 1) + b'\n{"id": 4}\n')
+    lines = b"".join(transport.written).decode("utf-8").splitlines()
+    self.assertEqual(len(lines), 2)
+    self.assertEqual(json.loads(lines[0]), {"id": 3, "moves": [2]})
+    self.assertTrue("error" in json.loads(lines[1]))
+    self.assertTrue(transport.closed)
+    protocol.data_received(b'{"id": 5}\n')
+    self.assertEqual(len(b"".join(transport.written).decode("utf-8").splitlines()), 2)
+
+
+  @unittest.skipIf(sys.version_info < (3, ), "asyncio requires Python 3")
+  def testServer(self):
+    import asyncio
+    server = serve.MoveServer(*_perfectTables(), stateClass=BitState)
+    loop = asyncio.new_event_loop()
+    s = serve.start(server, "127.0.0.1", 0, loop)
+    port = s.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+      clients = [socket.create_connection(("127.0.0.1", port)) for _ in range(3)]
+      for n, c in enumerate(clients):
+        # Requests may be split across writes, and several may arrive at once.
+        c.sendall(b'{"id": %d, "player": "X", "sta' % n)
+        c.sendall(b'tes": ["OO..X...."]}\n{"id": "second", "player": "O", "states": ["XX..O...."]}\n')
+      for n, c in enumerate(clients):
+        f = c.makefile("rb")
+        self.assertEqual(json.loads(f.readline().decode("utf-8")), {"id": n, "moves": [2]})
+        self.assertEqual(json.loads(f.readline().decode("utf-8")), {"id": "second", "moves": [2]})
+        f.close()
+        c.close()
+    finally:
+      loop.call_soon_threadsafe(loop.stop)
+      thread.join()
+      s.close()
+      loop.run_until_complete(s.wait_closed())
+      loop.close()
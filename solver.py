@@ -0,0 +1,164 @@
+import heapq
+
+import numpy
+
+import evaluate
+import graph
+import minimax
+import qtable
+import tictactoe
+
+# This module computes the scores that train.QLearning converges to, by value iteration over all reachable states
+# instead of sampling episodes. Since the game has a few thousand states and no cycles, this takes milliseconds.
+#
+# Scores follow the time step lag of train.runEpisode: the score of a player taking a position is the reward it observes
+# once its opponent has answered, plus the discounted score of the best position it then has, or the reward of the end of the game.
+#
+# The opponent either plays a fixed policy, given as a matrix of probabilities whose element [i, pos] is the probability
+# of taking position pos in the state with dense index i, or is a perfect player in self-play, which answers every position
+# with the one that minimizes the score of the player. In self-play with gamma = 1, scores are the game-theoretic values of minimax.
+
+# uniformPolicy returns the policy of an opponent picking uniformly at random among the available positions.
+def uniformPolicy():
+  counts = numpy.maximum(graph.legal.sum(axis=1), 1)
+  return graph.legal / counts[:, None].astype(numpy.float64)
+
+# greedyPolicy returns the epsilon-greedy policy of the player of the action-value function q,
+# which picks uniformly among the positions returned by evaluate.greedyActions, or among all available positions with probability epsilon.
+# The argument stateClass must be the State implementation q has been trained with.
+def greedyPolicy(q, epsilon=0.0, stateClass=tictactoe.State):
+  policy = epsilon * uniformPolicy()
+  for i, actions in enumerate(evaluate.greedyTable(q, stateClass)):
+    if actions is not None:
+      policy[i, actions] += (1.0 - epsilon) / len(actions)
+  return policy
+
+# _movers returns a mask of the non-terminal states in which the player with index p may be the one to move.
+def _movers(p):
+  circles = numpy.array([bin(state.o).count("1") for state in qtable.States])
+  crosses = numpy.array([bin(state.x).count("1") for state in qtable.States])
+  if p == 0:
+    return (circles <= crosses) & ~graph.terminal
+  return (crosses <= circles) & ~graph.terminal
+
+
+# _synchronous sweeps all the scores of the player with index p at once, computing new scores from the old ones,
+# until no score changes by more than tolerance. It returns the number of states backed up.
+def _synchronous(scores, p, gamma, policy, tolerance):
+  rows = _movers(p)
+  legal = graph.legal & rows[:, None]
+  after = graph.successors[:, p, :] # the states after the player moves
+  answers = graph.successors[:, 1 - p, :] # the states after the opponent answers
+  answered = graph.legal & (answers >= 0)
+  backups = 0
+  while True:
+    best = numpy.where(graph.terminal, tictactoe.ScoreDraw, scores.max(axis=1))
+    values = graph.rewards[:, p] + gamma * best
+    answerValues = values[answers]
+    if policy is None:
+      expected = numpy.where(answered, answerValues, numpy.inf).min(axis=1)
+    else:
+      expected = (policy * numpy.where(answered, answerValues, 0.0)).sum(axis=1)
+    targets = numpy.where(graph.terminal[after], graph.rewards[after, p] + gamma * tictactoe.ScoreDraw, expected[after])
+
+    newScores = numpy.where(legal, targets, scores)
+    change = numpy.abs(newScores[legal] - scores[legal]).max()
+    scores[...] = newScores
+    backups += int(rows.sum())
+    if change <= tolerance:
+      return backups
+
+
+# _prioritized backs up the scores of the player with index p one state at a time,
+# always picking the state whose scores are the furthest from their targets,
+# and then re-examining the states leading to it, until no score is further than tolerance from its target.
+# It returns the number of states backed up.
+def _prioritized(scores, p, gamma, policy, tolerance):
+  legalActions = qtable.legalActions
+  after = graph.successors[:, p, :].tolist()
+  answers = graph.successors[:, 1 - p, :].tolist()
+  rewards = graph.rewards[:, p].tolist()
+  terminal = graph.terminal.tolist()
+  probabilities = None
+  if policy is not None:
+    probabilities = policy.tolist()
+  rows = numpy.flatnonzero(_movers(p)).tolist()
+  table = scores.tolist()
+
+  def value(i):
+    if terminal[i]:
+      return rewards[i] + gamma * tictactoe.ScoreDraw
+    return rewards[i] + gamma * max(table[i][pos] for pos in legalActions[i])
+  # values[i] caches the value of the state with index i, for the states the opponent answers into.
+  values = [0.0] * qtable.NumStates
+  for i in range(qtable.NumStates):
+    if terminal[i] or legalActions[i]:
+      values[i] = value(i)
+
+  def target(i, pos):
+    s1 = after[i][pos]
+    if terminal[s1]:
+      return rewards[s1] + gamma * tictactoe.ScoreDraw
+    if probabilities is None:
+      return min(values[answers[s1][o]] for o in legalActions[s1])
+    return sum(probabilities[s1][o] * values[answers[s1][o]] for o in legalActions[s1])
+
+  def error(i):
+    return max(abs(target(i, pos) - table[i][pos]) for pos in legalActions[i])
+
+  # predecessors[i] are the states of the player from which the state with index i is reached after the opponent answers.
+  predecessors = dict((i, set()) for i in rows)
+  for i in rows:
+    for pos in legalActions[i]:
+      s1 = after[i][pos]
+      if not terminal[s1]:
+        for o in legalActions[s1]:
+          s2 = answers[s1][o]
+          if s2 in predecessors:
+            predecessors[s2].add(i)
+
+  queue = [(-error(i), i) for i in rows]
+  heapq.heapify(queue)
+  backups = 0
+  while queue:
+    priority, i = heapq.heappop(queue)
+    if -priority <= tolerance:
+      break
+    for pos in legalActions[i]:
+      table[i][pos] = target(i, pos)
+    backups += 1
+    old = values[i]
+    values[i] = value(i)
+    if values[i] == old:
+      continue
+    for j in predecessors[i]:
+      e = error(j)
+      if e > tolerance:
+        heapq.heappush(queue, (-e, j))
+
+  scores[...] = table
+  return backups
+
+
+# Methods are the value iteration methods of solve, by name.
+Methods = {"synchronous": _synchronous, "prioritized": _prioritized}
+
+# solve sets the scores of the action-value function q to the fixed point of Q-learning with gamma,
+# against an opponent playing the fixed policy, or a perfect opponent in self-play if policy is None.
+# The argument method is either synchronous, which sweeps all states at once, or prioritized, for prioritized sweeping.
+# Value iteration stops when no score is further than tolerance from its target.
+# The argument stateClass must be the State implementation q is going to be trained with.
+#
+# solve returns the number of states whose scores have been backed up.
+def solve(q, gamma, policy=None, method="synchronous", tolerance=1e-9, stateClass=tictactoe.State):
+  if method not in Methods:
+    raise ValueError("unexpected method: %s" % method)
+  p = graph.playerIndex(q.player)
+  scores = numpy.where(graph.legal, tictactoe.ScoreDraw, qtable.IllegalScore)
+  backups = Methods[method](scores, p, gamma, policy, tolerance)
+
+  for state, s in minimax.playerStates(q.player, stateClass):
+    i = qtable.indexOf(state)
+    for pos in qtable.legalActions[i]:
+      q.update(s, pos, float(scores[i, pos]))
+  return backups
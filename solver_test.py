@@ -0,0 +1,68 @@
+import unittest
+
+from tictactoe import *
+import minimax
+import qtable
+import solver
+
+class TestSolver(unittest.TestCase):
+
+  def testSelfPlay(self):
+    # Undiscounted, the scores in self-play are the game-theoretic values.
+    circle = qtable.SymmetricActionValueFunc(PlayerCircle)
+    cross = ActionValueFunc(PlayerCross)
+    solver.solve(circle, 1.0)
+    solver.solve(cross, 1.0, method="prioritized")
+    for q in (circle, cross):
+      for state, s in minimax.playerStates(q.player):
+        for pos in state.unoccupied():
+          self.assertEqual(q.Q(s, pos), minimax.actionValue(state, q.player, pos))
+
+
+  def testMethodsAgree(self):
+    for player, policy in ((PlayerCircle, None), (PlayerCross, solver.uniformPolicy())):
+      synchronous = qtable.ArrayActionValueFunc(player)
+      prioritized = qtable.ArrayActionValueFunc(player)
+      solver.solve(synchronous, 0.9, policy)
+      solver.solve(prioritized, 0.9, policy, "prioritized")
+      for a, b in zip(synchronous.values, prioritized.values):
+        self.assertAlmostEqual(a, b, places=7)
+    self.assertRaises(ValueError, solver.solve, synchronous, 0.9, None, "unknown")
+
+
+  def testFixedPoint(self):
+    # Against a random opponent, every score is the expected Q-learning target over the answers of the opponent.
+    gamma = 0.8
+    q = qtable.ArrayActionValueFunc(PlayerCross)
+    solver.solve(q, gamma, solver.uniformPolicy())
+    for state, s in minimax.playerStates(PlayerCross):
+      for pos in state.unoccupied():
+        s1 = takeAction(PlayerCross, s, pos)
+        if s1.terminal():
+          targets = [observeReward(PlayerCross, s1)]
+        else:
+          targets = []
+          for o in s1.unoccupied():
+            s2 = takeAction(PlayerCircle, s1, o)
+            targets.append(observeReward(PlayerCross, s2) + gamma*q.best(s2))
+        self.assertAlmostEqual(q.Q(s, pos), sum(targets) / len(targets))
+
+
+  def testGreedyPolicy(self):
+    cross = qtable.ArrayActionValueFunc(PlayerCross)
+    minimax.initialize(cross)
+    policy = solver.greedyPolicy(cross, 0.2)
+    for state, _ in minimax.playerStates(PlayerCross):
+      i = qtable.indexOf(state)
+      self.assertAlmostEqual(policy[i].sum(), 1.0)
+      optimal = minimax.optimalActions(state, PlayerCross)
+      for pos in state.unoccupied():
+        if pos in optimal:
+          self.assertGreater(policy[i, pos], 0.2 / len(state.unoccupied()))
+        else:
+          self.assertAlmostEqual(policy[i, pos], 0.2 / len(state.unoccupied()))
+
+    # Against a perfect opponent that never explores, the best the circle player can do is a draw.
+    circle = qtable.ArrayActionValueFunc(PlayerCircle)
+    solver.solve(circle, 1.0, solver.greedyPolicy(cross))
+    self.assertEqual(circle.best(State()), ScoreDraw)
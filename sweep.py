@@ -0,0 +1,187 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import config
+import fastrandom
+import qtable
+import tictactoe
+import train
+
+# A sweep trains many sessions with different hyperparameters, independently of each other and in parallel,
+# and collects how well each of them did into a single table.
+#
+# A sweep is described by a JSON spec. A grid search tries every combination of the listed values:
+#
+#   {"algos": ["sarsa", "qlearning"], "episodes": 50000, "seeds": [0, 1],
+#    "grid": {"alpha": [0.05, 0.1, "visits:1:10"], "gamma": [0.9], "epsilon": [0.1, "linear:0.5:0.01:25000"]}}
+#
+# whereas a random search draws samples of settings uniformly from the given ranges with a generator seeded by seed:
+#
+#   {"algos": ["qlearning"], "episodes": 50000, "samples": 20, "seed": 1,
+#    "random": {"alpha": [0.01, 0.5], "epsilon": [0.01, 0.3]}}
+#
+# Settings are those of a config.TrainConfig, and the optional keys table, bitboard and evalEvery
+# choose the action-value function storage, the State implementation and how often sessions are evaluated.
+# Sessions are evaluated exactly with evaluate.expectedReward, so that results do not depend on sampled games.
+#
+# Every job trains with its own seed, so that it always gives the same results.
+# Results are appended to a JSON lines file as soon as each job finishes, and jobs already in that file are skipped,
+# so that an interrupted sweep resumes where it stopped when run again.
+
+# Tables maps the names of the storage of action-value functions to their classes.
+Tables = {
+  "dict": tictactoe.ActionValueFunc,
+  "array": qtable.ArrayActionValueFunc,
+  "symmetric": qtable.SymmetricActionValueFunc,
+  "sparse": qtable.SparseActionValueFunc,
+}
+
+# Columns are the columns of the results table, followed by the settings of the jobs.
+Columns = ["id", "algo", "seed", "episodes", "convergedAt", "finalReward", "bestReward", "seconds"]
+
+
+# jobs returns the list of jobs of a sweep spec, as dictionaries of an id, an algo, a seed and the settings of the job.
+def jobs(spec):
+  if "grid" in spec:
+    names = sorted(spec["grid"])
+    settings = [dict(zip(names, values)) for values in itertools.product(*[spec["grid"][n] for n in names])]
+  elif "random" in spec:
+    rng = random.Random(spec.get("seed", 0))
+    names = sorted(spec["random"])
+    settings = []
+    for _ in range(spec["samples"]):
+      settings.append(dict((n, rng.uniform(*spec["random"][n])) for n in names))
+  else:
+    raise ValueError("a sweep spec needs either a grid or random")
+
+  js = []
+  for algo in spec.get("algos", ["sarsa", "qlearning"]):
+    for setting in settings:
+      for seed in spec.get("seeds", [0]):
+        parts = [algo] + ["%s=%s" % (n, setting[n]) for n in sorted(setting)] + ["seed=%s" % seed]
+        js.append({"id": ",".join(parts), "algo": algo, "seed": seed, "settings": setting})
+  return js
+
+# convergedAt returns the first episode of a list of (episode, reward-per-episode) evaluations
+# whose reward is within tolerance of the best one, or None if there are no evaluations.
+def convergedAt(evaluations, tolerance=0.01):
+  if not evaluations:
+    return None
+  best = max(rpe for _, rpe in evaluations)
+  for epi, rpe in evaluations:
+    if rpe >= best - tolerance:
+      return epi
+
+# _silence discards the output of training in worker processes.
+def _silence():
+  sys.stdout = open(os.devnull, "w")
+
+# runJob trains a session for a job of spec and returns its result, a dictionary with the keys of Columns and the settings of the job.
+def runJob(spec, job):
+  cfg = config.TrainConfig(episodes=spec.get("episodes", 400000))
+  cfg.update(dict(job["settings"], algo=job["algo"]))
+  algo = train.Algorithms[cfg.algo]
+
+  stateClass = tictactoe.State
+  if spec.get("bitboard"):
+    stateClass = tictactoe.BitState
+  table = Tables[spec.get("table", "dict")]
+  schedule = train.EvalSchedule(spec.get("evalEvery", 10000), exact=True)
+
+  start = time.time()
+  evaluations = train.run(algo, table(tictactoe.PlayerCircle), table(tictactoe.PlayerCross), stateClass, schedule,
+                          rng=fastrandom.FastRandom(job["seed"]), cfg=cfg)
+  result = {
+    "id": job["id"],
+    "algo": job["algo"],
+    "seed": job["seed"],
+    "episodes": evaluations[-1][0],
+    "convergedAt": convergedAt(evaluations),
+    "finalReward": evaluations[-1][1],
+    "bestReward": max(rpe for _, rpe in evaluations),
+    "seconds": time.time() - start,
+  }
+  result.update(job["settings"])
+  return result
+
+def _runJob(task):
+  return runJob(*task)
+
+# readResults returns the results recorded in the JSON lines file at path, or an empty list if it does not exist.
+# A truncated last line, left by an interrupted sweep, is ignored.
+def readResults(path):
+  results = []
+  if not os.path.exists(path):
+    return results
+  with open(path) as f:
+    for line in f:
+      try:
+        results.append(json.loads(line))
+      except ValueError:
+        break
+  return results
+
+# writeCSV writes results to a CSV file at path, one row per job with the columns of Columns followed by the settings.
+def writeCSV(path, results):
+  names = sorted(set(k for r in results for k in r) - set(Columns))
+  with open(path, "w") as f:
+    w = csv.writer(f)
+    w.writerow(Columns + names)
+    for r in results:
+      w.writerow([r.get(c) for c in Columns + names])
+
+# run runs the jobs of spec that are not in the results file PREFIX.jsonl yet in a pool of worker processes,
+# appending their results to that file as they finish, and finally writes all results to PREFIX.csv.
+# It returns the results of all the jobs of spec.
+def run(spec, prefix, workers=None):
+  path = prefix + ".jsonl"
+  results = readResults(path)
+  done = set(r["id"] for r in results)
+  todo = [(spec, job) for job in jobs(spec) if job["id"] not in done]
+
+  # Rewrite the results that have been read, so that a truncated line does not precede new results.
+  tmp = path + ".tmp"
+  with open(tmp, "w") as f:
+    for r in results:
+      f.write(json.dumps(r, sort_keys=True) + "\n")
+  os.rename(tmp, path)
+
+  if todo:
+    pool = multiprocessing.Pool(workers, _silence)
+    try:
+      with open(path, "a") as f:
+        for r in pool.imap_unordered(_runJob, todo):
+          f.write(json.dumps(r, sort_keys=True) + "\n")
+          f.flush()
+          os.fsync(f.fileno())
+          results.append(r)
+          print("%s: final reward-per-episode %s, converged at episode %s in %.1fs" %
+                (r["id"], r["finalReward"], r["convergedAt"], r["seconds"]))
+    finally:
+      pool.close()
+      pool.join()
+
+  ids = dict((job["id"], i) for i, job in enumerate(jobs(spec)))
+  results = sorted((r for r in results if r["id"] in ids), key=lambda r: ids[r["id"]])
+  writeCSV(prefix + ".csv", results)
+  return results
+
+def main():
+  parser = argparse.ArgumentParser(description="Run a hyperparameter sweep described by a JSON spec.")
+  parser.add_argument("spec", help="the JSON file of the sweep spec")
+  parser.add_argument("--out", default="sweep", help="write results to PREFIX.jsonl and PREFIX.csv, and skip the jobs already in PREFIX.jsonl", metavar="PREFIX")
+  parser.add_argument("--workers", type=int, help="the number of processes, the number of cores by default")
+  args = parser.parse_args()
+  with open(args.spec) as f:
+    spec = json.load(f)
+  run(spec, args.out, args.workers)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import sweep
+
+class TestSweep(unittest.TestCase):
+
+  def testJobs(self):
+    spec = {"algos": ["sarsa", "qlearning"], "seeds": [0, 1], "grid": {"alpha": [0.1, 0.2, "visits:1:10"], "gamma": [0.9]}}
+    js = sweep.jobs(spec)
+
+    # assert that every combination of algorithm, settings and seed is a job with a distinct id
+    self.assertEqual(len(js), 2 * 3 * 2)
+    self.assertEqual(len(set(j["id"] for j in js)), len(js))
+    self.assertEqual(js[0], {"id": "sarsa,alpha=0.1,gamma=0.9,seed=0", "algo": "sarsa", "seed": 0, "settings": {"alpha": 0.1, "gamma": 0.9}})
+
+    # assert that random searches draw the same settings every time, within their ranges
+    spec = {"algos": ["qlearning"], "samples": 5, "seed": 3, "random": {"alpha": [0.01, 0.5]}}
+    self.assertEqual(sweep.jobs(spec), sweep.jobs(spec))
+    for j in sweep.jobs(spec):
+      self.assertTrue(0.01 <= j["settings"]["alpha"] <= 0.5)
+
+    self.assertEqual(sweep.convergedAt([(10, 0.1), (20, 0.5), (30, 0.495), (40, 0.5)]), 20)
+
+
+  def testRunResume(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      prefix = os.path.join(tmp, "sweep")
+      # Exploration rates change the games played from the first episode, so every job has a different result,
+      # whereas early greedy policies, and thus rewards, hardly depend on the learning rate.
+      spec = {"episodes": 40, "evalEvery": 20, "table": "array", "grid": {"epsilon": [0.1, 0.5]}}
+      results = sweep.run(spec, prefix, workers=1)
+      self.assertEqual([r["id"] for r in results], [j["id"] for j in sweep.jobs(spec)])
+      for r in results:
+        self.assertEqual(r["episodes"], 40)
+      self.assertEqual(len(set(r["finalReward"] for r in results)), len(results))
+
+      # Interrupt the sweep in the middle of writing its last result.
+      with open(prefix + ".jsonl") as f:
+        lines = f.readlines()
+      with open(prefix + ".jsonl", "w") as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:10])
+
+      # assert that resuming reruns only the missing jobs, which give the same results thanks to their seeds
+      resumed = sweep.run(spec, prefix, workers=1)
+      self.assertEqual([r["id"] for r in resumed], [r["id"] for r in results])
+      for r, expected in zip(resumed, results):
+        self.assertEqual(r["finalReward"], expected["finalReward"])
+        self.assertEqual(r["epsilon"], expected["epsilon"])
+      with open(prefix + ".csv") as f:
+        self.assertEqual(len(f.readlines()), 1 + len(results))
+      self.assertEqual(len(sweep.readResults(prefix + ".jsonl")), len(results))
+    finally:
+      shutil.rmtree(tmp)
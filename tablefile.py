@@ -0,0 +1,123 @@
+import array
+import mmap
+import os
+import struct
+
+import numpy
+
+import qtable
+import tictactoe
+
+# A table file stores a trained action-value function in a compact binary format.
+# It starts with a header of HeaderSize bytes, followed by one fixed-size record per row of the table.
+# A record holds the 9 scores of a state as little-endian doubles, with IllegalScore at occupied positions,
+# and the record of the state with dense index i of qtable.States starts at HeaderSize + i*RecordSize.
+# Tables of kind KindSymmetric have one record per state of qtable.CanonicalStates instead.
+#
+# Since records are aligned and laid out exactly like the values array of a qtable.ArrayActionValueFunc,
+# loading a file maps it into memory without reading or converting any scores.
+# Processes that load the same file share the same physical pages of the operating system's page cache.
+
+# Magic are the first bytes of every table file.
+Magic = b"TTTQ"
+# Version is the version of the file format.
+Version = 1
+# KindArray and KindSymmetric tell which kind of action-value function a file stores.
+KindArray = 0
+KindSymmetric = 1
+# RecordSize is the number of bytes of the record of a state.
+RecordSize = 9 * 8
+
+# _header is the layout of the header: magic, version, kind, player, algorithm name, alpha, gamma, epsilon, episodes and number of records.
+_header = struct.Struct("<4sHBB16sdddQI")
+# HeaderSize is the size of the header, padded so that records are aligned.
+HeaderSize = 64
+
+
+# A TableHeader describes the action-value function stored in a table file, and how it has been trained.
+class TableHeader:
+  def __init__(self, player, algo="", alpha=0.0, gamma=0.0, epsilon=0.0, episodes=0, kind=KindArray):
+    self.player = player
+    self.algo = algo
+    self.alpha = alpha
+    self.gamma = gamma
+    self.epsilon = epsilon
+    self.episodes = episodes
+    self.kind = kind
+
+  def pack(self, records):
+    b = _header.pack(Magic, Version, self.kind, self.player, self.algo.encode("ascii"),
+                     self.alpha, self.gamma, self.epsilon, self.episodes, records)
+    return b + b"\0" * (HeaderSize - len(b))
+
+  @staticmethod
+  def unpack(b):
+    magic, version, kind, player, algo, alpha, gamma, epsilon, episodes, records = _header.unpack_from(b)
+    if magic != Magic:
+      raise ValueError("not a table file")
+    if version != Version:
+      raise ValueError("unsupported table file version: %s" % version)
+    return TableHeader(player, algo.rstrip(b"\0").decode("ascii"), alpha, gamma, epsilon, episodes, kind), records
+
+
+# _values returns the scores of an action-value function laid out as the records of a table file, together with the kind of the file.
+# The argument stateClass is the State implementation of the keys of a tictactoe.ActionValueFunc.
+def _values(q, stateClass):
+  if isinstance(q, qtable.SymmetricActionValueFunc):
+    return array.array("d", q.values), KindSymmetric
+  if isinstance(q, qtable.ArrayActionValueFunc):
+    return array.array("d", q.values), KindArray
+
+  values = array.array("d", [qtable.IllegalScore]) * (qtable.NumStates * 9)
+  for i, state in enumerate(qtable.States):
+    s = state
+    if stateClass is not tictactoe.BitState:
+      s = stateClass()
+      s.s = state.s
+    for pos in qtable.legalActions[i]:
+      values[i*9 + pos] = q.Q(s, pos)
+  return values, KindArray
+
+# save writes an action-value function to a table file at path.
+# The file is written to a temporary file first and then renamed, so that readers never see a partially written table.
+# The argument header is a TableHeader whose player and kind are set from q.
+def save(path, q, header, stateClass=tictactoe.State):
+  values, header.kind = _values(q, stateClass)
+  header.player = q.player
+  if struct.pack("=d", 1.0) != struct.pack("<d", 1.0):
+    values.byteswap()
+
+  tmp = path + ".tmp"
+  with open(tmp, "wb") as f:
+    f.write(header.pack(len(values) // 9))
+    values.tofile(f)
+  os.rename(tmp, path)
+
+# load returns the action-value function stored in a table file, and its TableHeader.
+# The function is a qtable.ArrayActionValueFunc or a qtable.SymmetricActionValueFunc, depending on the kind of the file.
+#
+# If writable is False, the file is memory-mapped read-only and the scores are read directly from the mapping,
+# which makes loading almost instant, but updating the function raises a ValueError.
+# Otherwise, the scores are copied into memory and the function can be trained further.
+def load(path, writable=False):
+  with open(path, "rb") as f:
+    header, records = TableHeader.unpack(f.read(HeaderSize))
+    if header.kind == KindSymmetric:
+      table, expected = qtable.SymmetricActionValueFunc, qtable.NumCanonicalStates
+    elif header.kind == KindArray:
+      table, expected = qtable.ArrayActionValueFunc, qtable.NumStates
+    else:
+      raise ValueError("unexpected table kind: %s" % header.kind)
+    if records != expected:
+      raise ValueError("table file has %s records, expected %s" % (records, expected))
+
+    if writable:
+      values = array.array("d")
+      values.fromfile(f, records * 9)
+      if struct.pack("=d", 1.0) != struct.pack("<d", 1.0):
+        values.byteswap()
+    else:
+      m = mmap.mmap(f.fileno(), HeaderSize + records*RecordSize, access=mmap.ACCESS_READ)
+      values = numpy.frombuffer(m, dtype="<f8", count=records*9, offset=HeaderSize)
+
+  return table(header.player, values), header
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from tictactoe import *
+import batch
+import qtable
+import tablefile
+import train
+
+class TestTableFile(unittest.TestCase):
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+
+
+  def testSaveLoad(self):
+    path = os.path.join(self.dir, "circle.qtable")
+    for table in (qtable.ArrayActionValueFunc, qtable.SymmetricActionValueFunc):
+      circle = table(PlayerCircle)
+      cross = table(PlayerCross)
+      batch.run(train.QLearning, circle, cross, 5000, seed=1)
+
+      tablefile.save(path, circle, tablefile.TableHeader(PlayerNone, "QLearning", 0.1, 0.9, 0.2, 5000))
+      for writable in (False, True):
+        q, header = tablefile.load(path, writable)
+
+        # assert that the header and all scores are restored
+        self.assertEqual(q.__class__, table)
+        self.assertEqual(header.player, PlayerCircle)
+        self.assertEqual(header.algo, "QLearning")
+        self.assertEqual((header.alpha, header.gamma, header.epsilon, header.episodes), (0.1, 0.9, 0.2, 5000))
+        self.assertEqual(list(q.values), list(circle.values))
+        for state in qtable.States[:100]:
+          self.assertEqual(q.best(state), circle.best(state))
+
+      # assert that memory-mapped tables are read-only, whereas others can be trained further
+      q, _ = tablefile.load(path)
+      with self.assertRaises(ValueError):
+        q.update(BitState(), 4, 1.0)
+      q, _ = tablefile.load(path, writable=True)
+      q.update(BitState(), 4, 1.0)
+      self.assertEqual(q.Q(BitState(), 4), 1.0)
+
+
+  def testSaveActionValueFunc(self):
+    q = ActionValueFunc(PlayerCross)
+    s = State()
+    s.s = (PlayerCircle, PlayerNone, PlayerNone,
+           PlayerNone,   PlayerNone, PlayerNone,
+           PlayerNone,   PlayerNone, PlayerNone, )
+    q.update(s, 4, 0.7)
+
+    path = os.path.join(self.dir, "cross.qtable")
+    tablefile.save(path, q, tablefile.TableHeader(PlayerNone))
+    loaded, header = tablefile.load(path)
+
+    # assert that a dict-based ActionValueFunc is stored as a dense table with the same scores
+    self.assertEqual(header.player, PlayerCross)
+    self.assertEqual(loaded.Q(s, 4), 0.7)
+    self.assertEqual(loaded.Q(s, 8), ScoreDraw)
+    self.assertEqual(loaded.Q(s, 0), qtable.IllegalScore)
+    self.assertEqual(loaded.bestAction(s), 4)
+
+
+  def testLoadInvalid(self):
+    path = os.path.join(self.dir, "invalid.qtable")
+    with open(path, "wb") as f:
+      f.write(b"\0" * tablefile.HeaderSize)
+    with self.assertRaises(ValueError):
+      tablefile.load(path)
@@ -0,0 +1,135 @@
+import cProfile
+import json
+import pstats
+import time
+
+import numpy
+
+import qtable
+import tictactoe
+
+# Telemetry instruments a training session run by train.run.
+# It counts episodes, score updates and evaluation games, times training and evaluation separately,
+# and periodically appends a record of these, together with the sizes of the action-value functions, to a JSON lines file.
+#
+# When train.run is given no Telemetry, none of this happens, and the only cost is a check per episode.
+# Counting happens per episode rather than per update, so that the cost stays small even when enabled.
+#
+# Timing individual functions, such as SARSA, QLearning and the updates of tables, is left to cProfile,
+# which runs on samples of episodes only: periodically every profileEvery episodes, or on demand by calling requestProfile,
+# e.g. from a signal handler. Each sample profiles profileEpisodes episodes,
+# whose statistics are added to the next record and saved to a file that pstats can read.
+
+# Functions are the names of the functions whose statistics are added to records from profiles.
+Functions = ("runEpisode", "runGraphEpisode", "SARSA", "QLearning", "chooseAction", "takeAction", "bestAction",
+             "Q", "update", "best", "rewardPerEpisode")
+
+
+# tableSize returns the number of states whose scores an action-value function has learnt.
+# For dense tables, these are the states having a score other than the default tictactoe.ScoreDraw.
+def tableSize(q):
+  if isinstance(q, tictactoe.ActionValueFunc):
+    return len(q.stateActions)
+  if isinstance(q, qtable.SparseActionValueFunc):
+    return len(q.scores)
+  values = numpy.frombuffer(q.values, dtype=numpy.float64).reshape(-1, 9)
+  learnt = (values != tictactoe.ScoreDraw) & numpy.isfinite(values)
+  return int(learnt.any(axis=1).sum())
+
+# profileStats returns the statistics of the functions named in Functions from a cProfile.Profile,
+# as a dictionary mapping names to their number of calls, and their total time excluding and including subcalls.
+# Functions of the same name in different modules, like the Q methods of different tables, are added up.
+def profileStats(profile):
+  stats = {}
+  for (_, _, name), (_, calls, tottime, cumtime, _) in pstats.Stats(profile).stats.items():
+    if name not in Functions:
+      continue
+    s = stats.setdefault(name, {"calls": 0, "seconds": 0.0, "cumulative": 0.0})
+    s["calls"] += calls
+    s["seconds"] += tottime
+    s["cumulative"] += cumtime
+  return stats
+
+
+class Telemetry:
+  def __init__(self, path, every=10000, profileEvery=None, profileEpisodes=100):
+    self.path = path
+    self.every = every
+    self.profileEvery = profileEvery
+    self.profileEpisodes = profileEpisodes
+
+    self.episodes = 0
+    self.updates = 0
+    self.evaluations = 0
+    self.evalGames = 0
+    self.trainSeconds = 0.0
+    self.evalSeconds = 0.0
+    self.start = time.time()
+    # The counters at the time of the last record, to compute rates over the window since then.
+    self.lastTime = self.start
+    self.lastEpisodes = 0
+
+    self.requested = False
+    self.profile = None # the cProfile.Profile of the sample being profiled, if any
+    self.profileLeft = 0 # the number of episodes left in the sample being profiled
+    self.profileStats = None # the statistics of the last finished sample, not recorded yet
+
+  # requestProfile asks for the next profileEpisodes episodes to be profiled.
+  # It only sets a flag, so that it is safe to call from a signal handler.
+  def requestProfile(self):
+    self.requested = True
+
+  # episode runs the episode epi by calling run, which returns the number of score updates made in the episode.
+  def episode(self, epi, run):
+    if self.profile is None and (self.requested or (self.profileEvery is not None and epi % self.profileEvery == 0)):
+      self.requested = False
+      self.profile = cProfile.Profile()
+      self.profileLeft = self.profileEpisodes
+      self.profile.enable()
+
+    start = time.time()
+    self.updates += run()
+    self.trainSeconds += time.time() - start
+    self.episodes += 1
+
+    if self.profile is not None:
+      self.profileLeft -= 1
+      if self.profileLeft <= 0:
+        self.profile.disable()
+        self.profile.dump_stats("%s.%d.prof" % (self.path, epi))
+        self.profileStats = profileStats(self.profile)
+        self.profile = None
+
+  # evaluation counts an evaluation that took a number of seconds and played a number of games.
+  def evaluation(self, seconds, games):
+    self.evaluations += 1
+    self.evalGames += games
+    self.evalSeconds += seconds
+
+  # record appends a record of the session after episode epi to the file at path, if one is due or force is True.
+  def record(self, epi, circle, cross, force=False):
+    if not force and epi % self.every != 0:
+      return
+    now = time.time()
+    window = now - self.lastTime
+    r = {
+      "episode": epi,
+      "time": now,
+      "elapsed": now - self.start,
+      "episodesPerSecond": (self.episodes - self.lastEpisodes) / window if window > 0 else None,
+      "episodes": self.episodes,
+      "updates": self.updates,
+      "evaluations": self.evaluations,
+      "evalGames": self.evalGames,
+      "trainSeconds": self.trainSeconds,
+      "evalSeconds": self.evalSeconds,
+      "circleStates": tableSize(circle),
+      "crossStates": tableSize(cross),
+    }
+    if self.profileStats is not None:
+      r["profile"] = self.profileStats
+      self.profileStats = None
+    with open(self.path, "a") as f:
+      f.write(json.dumps(r, sort_keys=True) + "\n")
+    self.lastTime = now
+    self.lastEpisodes = self.episodes
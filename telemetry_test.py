@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tictactoe import *
+import qtable
+import telemetry
+import train
+
+class TestTelemetry(unittest.TestCase):
+
+  def testRun(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      path = os.path.join(tmp, "telemetry.jsonl")
+      tel = telemetry.Telemetry(path, every=20, profileEvery=50, profileEpisodes=5)
+      circle = ActionValueFunc(PlayerCircle)
+      cross = ActionValueFunc(PlayerCross)
+      schedule = train.EvalSchedule(evalEvery=50, evalGames=10)
+      train.run(train.SARSA, circle, cross, schedule=schedule, totalEpisodes=110, telemetry=tel)
+
+      with open(path) as f:
+        records = [json.loads(line) for line in f]
+
+      # assert that records are written periodically and at the end of training
+      self.assertEqual([r["episode"] for r in records], [20, 40, 60, 80, 100, 110])
+      last = records[-1]
+      self.assertEqual(last["episodes"], 110)
+      self.assertTrue(5 * 110 <= last["updates"] <= 9 * 110)
+      self.assertEqual(last["evaluations"], 3)
+      self.assertEqual(last["evalGames"], 30)
+      self.assertEqual(last["circleStates"], len(circle.stateActions))
+      self.assertEqual(last["crossStates"], len(cross.stateActions))
+
+      # assert that the profiled samples are recorded and saved
+      profiled = [r for r in records if "profile" in r]
+      self.assertEqual([r["episode"] for r in profiled], [60, 110])
+      self.assertEqual(profiled[0]["profile"]["runEpisode"]["calls"], 5)
+      self.assertTrue(profiled[0]["profile"]["SARSA"]["calls"] >= 25)
+      self.assertTrue(os.path.exists(path + ".54.prof"))
+
+      # assert that profiles can be requested
+      tel.requestProfile()
+      tel.episode(111, lambda: 0)
+      self.assertTrue(tel.profile is not None)
+    finally:
+      shutil.rmtree(tmp)
+
+
+  def testTableSize(self):
+    q = qtable.ArrayActionValueFunc(PlayerCircle)
+    self.assertEqual(telemetry.tableSize(q), 0)
+    s = BitState()
+    q.update(s, 4, 0.5)
+    q.update(s, 0, 0.5)
+    q.update(takeAction(PlayerCircle, s, 4), 0, -0.5)
+    self.assertEqual(telemetry.tableSize(q), 2)
@@ -1,9 +1,47 @@
 import unittest
 
+import batch_test
+import bench_test
+import config_test
+import evaluate_test
+import fastrandom_test
+import graph_test
+import metrics_test
+import minimax_test
+import mnk_test
+import parallel_test
+import policy_test
+import qtable_test
+import replay_test
+import serve_test
+import solver_test
+import sweep_test
+import tablefile_test
+import telemetry_test
 import tictactoe_test
+import tournament_test
 import train_test
 
 if __name__ == '__main__':
   suite = [ unittest.TestLoader().loadTestsFromTestCase(tictactoe_test.TestTicTacToe) ]
   suite.append( unittest.TestLoader().loadTestsFromTestCase(train_test.TestTrain) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(qtable_test.TestQTable) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(batch_test.TestBatch) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(parallel_test.TestParallel) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(evaluate_test.TestEvaluate) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(minimax_test.TestMinimax) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(tablefile_test.TestTableFile) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(fastrandom_test.TestFastRandom) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(config_test.TestConfig) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(sweep_test.TestSweep) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(bench_test.TestBench) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(telemetry_test.TestTelemetry) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(metrics_test.TestMetrics) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(graph_test.TestGraph) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(replay_test.TestReplay) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(solver_test.TestSolver) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(mnk_test.TestMNK) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(serve_test.TestServe) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(tournament_test.TestTournament) )
+  suite.append( unittest.TestLoader().loadTestsFromTestCase(policy_test.TestPolicy) )
   unittest.TextTestRunner().run(unittest.TestSuite(suite))
@@ -21,6 +21,10 @@ PlayerCross = 2
 # For example, state[4] == PlayerCross means that a cross has been drawn on the center of the grid;
 # likewise, state[6] == PlayerNone means that the lower left position is not occupied yet.
 class State:
+  # rows and cols are the dimensions of the grid, which game.printBoard draws.
+  rows = 3
+  cols = 3
+
   def __init__(self):
     self.s = (PlayerNone, PlayerNone, PlayerNone,
               PlayerNone, PlayerNone, PlayerNone,
@@ -79,12 +83,97 @@ class State:
     return res
 
 
+# BoardFull is the bit mask of a grid with all of its 9 positions occupied.
+BoardFull = 0x1ff
+
+# lineMasks are the bit masks of the 8 lines of a Tic Tac Toe grid, where bit i stands for position i.
+lineMasks = (0x007, 0x038, 0x1c0, # horizontal lines
+             0x049, 0x092, 0x124, # vertical lines
+             0x111, 0x054, )      # diagonal lines
+
+# _hasLine[bits] tells whether the positions set in bits contain at least one complete line.
+_hasLine = tuple(any(bits & m == m for m in lineMasks) for bits in range(BoardFull + 1))
+
+# _unoccupied[bits] is the tuple of positions that are not set in bits.
+_unoccupied = tuple(tuple(pos for pos in range(9) if not bits >> pos & 1) for bits in range(BoardFull + 1))
+
+# A BitState is a compact alternative to State which can be used interchangeably by the training and game code.
+# Instead of a tuple, the grid is encoded as two 9-bit integers, o and x,
+# whose i-th bits tell whether position i has been taken by PlayerCircle and PlayerCross respectively.
+# Together with the tables above, this makes winner, terminal, unoccupied and takeAction a handful of bit operations,
+# and lets a BitState hash as the small integer o | x << 9.
+class BitState(object):
+  __slots__ = ("o", "x")
+  rows = 3
+  cols = 3
+
+  def __init__(self, o=0, x=0):
+    self.o = o
+    self.x = x
+
+  # fromTuple returns the BitState of a grid represented in the same way as State.s.
+  @staticmethod
+  def fromTuple(s):
+    o = 0
+    x = 0
+    for pos, player in enumerate(s):
+      if player == PlayerCircle:
+        o |= 1 << pos
+      elif player == PlayerCross:
+        x |= 1 << pos
+    return BitState(o, x)
+
+  # s returns the grid of this state as a tuple, in the same layout as State.s.
+  @property
+  def s(self):
+    return tuple(PlayerCircle if self.o >> pos & 1 else PlayerCross if self.x >> pos & 1 else PlayerNone
+                 for pos in range(9))
+
+  def __eq__(self, other):
+    return self.o == other.o and self.x == other.x
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __hash__(self):
+    return self.o | self.x << 9
+
+  # winner returns the winner of a state according to the rules of Tic Tac Toe.
+  # If no winner has been determined in the current state yet, PlayerNone is returned.
+  def winner(self):
+    if _hasLine[self.o]:
+      return PlayerCircle
+    if _hasLine[self.x]:
+      return PlayerCross
+    return PlayerNone
+
+  # terminal returns whether or not this state contains no possible future moves.
+  def terminal(self):
+    return _hasLine[self.o] or _hasLine[self.x] or self.o | self.x == BoardFull
+
+  # unoccupied returns the positions that are available.
+  # The returned tuple is shared among all states with the same occupied positions, and must not be modified.
+  def unoccupied(self):
+    return _unoccupied[self.o | self.x]
+
+
 # takeAction marks a position on a state as belonging to a player.
 # A new state is returned representing the effect of taking such an action.
+# States of other implementations than State and BitState, such as mnk.State, take the action themselves with their play method.
 def takeAction(player, state, pos):
   if player != PlayerCircle and player != PlayerCross:
     raise ValueError("unexpected player: %s" % player)
 
+  if state.__class__ is BitState:
+    bit = 1 << pos
+    if (state.o | state.x) & bit:
+      raise ValueError("invalid position %s for state %s" % (pos, state.s))
+    if player == PlayerCircle:
+      return BitState(state.o | bit, state.x)
+    return BitState(state.o, state.x | bit)
+  if state.__class__ is not State:
+    return state.play(player, pos)
+
   if state.s[pos] != PlayerNone:
     raise ValueError("invalid position %s for state %s" % (pos, state))
 
@@ -130,42 +219,56 @@ class StateActions:
     # We use an ordinary list as the backing data structure,
     # since the possible number of items stored is small and always less than 9.
     self.a = []
+    # byPos indexes the items of a by position, so that scores can be found without searching.
+    # It reaches up to the last available position, which may be beyond 9 on the larger boards of the mnk module.
+    unoccupied = state.unoccupied()
+    self.byPos = [None] * (max(unoccupied) + 1 if unoccupied else 0)
 
     # We immediately store all possible positions of this state with the default value of ScoreDraw into our list,
     # as opposed to leaving it empty and lazy inserting items later on when we want to change scores.
     # This way, it is easier and more straight forward to determine the best action with the highest score.
-    for pos in state.unoccupied():
-      self.a.append(PositionScore(pos, ScoreDraw))
+    for pos in unoccupied:
+      ps = PositionScore(pos, ScoreDraw)
+      self.a.append(ps)
+      self.byPos[pos] = ps
+
+    # top is the highest score, and tied are the items sharing it.
+    # They are kept up to date on every update, so that best does not need to look at all the items.
+    self.top = ScoreDraw
+    self.tied = list(self.a)
 
   def update(self, pos, score):
     # Since we initialize our list to contain all positions in the beginning,
     # we are guaranteed to find the specified to-be-updated position.
-    for ps in self.a:
-      if ps.pos == pos:
-        ps.score = score
-        break
+    ps = self.byPos[pos]
+    wasTied = ps.score == self.top
+    ps.score = score
+
+    if score > self.top:
+      self.top = score
+      self.tied = [ps]
+    elif score == self.top:
+      if not wasTied:
+        self.tied.append(ps)
+    elif wasTied:
+      self.tied.remove(ps)
+      # Only when the last item with the highest score is lowered do we need to look for the new highest score.
+      if not self.tied:
+        self.top = max(ps.score for ps in self.a)
+        self.tied = [ps for ps in self.a if ps.score == self.top]
 
   def get(self, pos):
     # Since we initialize our list to contain all positions in the beginning,
     # we are guaranteed to find the specified position.
-    for ps in self.a:
-      if ps.pos == pos:
-        return ps.score
+    return self.byPos[pos].score
 
   # best returns the position with the highest score.
   # In case there are more than one positions sharing the same highest score,
-  # we simply randomly pick one among them.
-  def best(self):
-    self.a.sort(key=lambda ps: ps.score, reverse=True)
-
-    top = [self.a[0]]
-    for ps in self.a[1:]:
-      if ps.score == self.a[0]:
-        top.append(ps)
-      else:
-        break
-
-    return random.choice(top)
+  # we randomly pick one among them with equal probability, using the random number generator rng.
+  def best(self, rng=random):
+    if len(self.tied) == 1:
+      return self.tied[0]
+    return rng.choice(self.tied)
 
 
 # An ActionValueFunc is an action-value function in Q-learning.
@@ -200,18 +303,29 @@ class ActionValueFunc:
       return ScoreDraw
 
     sa = self.stateActions[state]
-    return sa.best().score
+    return sa.top
+
+  # bestAction returns the position with the highest score with respect to the current state.
+  # If the state has never been updated, a random available position is returned.
+  # Random choices are made with the random number generator rng.
+  def bestAction(self, state, rng=random):
+    if state not in self.stateActions:
+      return rng.choice(state.unoccupied())
+
+    sa = self.stateActions[state]
+    return sa.best(rng).pos
 
 
 # chooseAction returns the best possible action of a state using the epsilon-greedy algorithm.
 # A larger epsilon increases the possibility that a random action will be chosen, thus encouraging exploratory behaviour.
 # In contrast, a smaller epsilon encourages exploitary over exploratory behaviour which might be useful in later stages of training
-def chooseAction(q, state, epsilon):
-  if random.random() < epsilon:
-    return random.choice(state.unoccupied())
-
-  if state not in q.stateActions:
-    return random.choice(state.unoccupied())
-
-  sa = q.stateActions[state]
-  return sa.best().pos
+#
+# The argument q can be any action-value function providing a bestAction method,
+# such as an ActionValueFunc or a qtable.ArrayActionValueFunc.
+# The argument rng is the random number generator used for all random choices,
+# which can be the random module itself, a random.Random or a fastrandom.FastRandom.
+def chooseAction(q, state, epsilon, rng=random):
+  if rng.random() < epsilon:
+    return rng.choice(state.unoccupied())
+
+  return q.bestAction(state, rng)
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from tictactoe import *
@@ -89,3 +90,91 @@ class TestTicTacToe(unittest.TestCase):
 
     # assert that the best score is indeed the one we updated just now
     self.assertEqual(q.best(state), score)
+
+
+  def testBitStateMatchesState(self):
+    # Play random games with both State and BitState, and assert that they agree with each other after every move.
+    random.seed(1)
+    for _ in range(200):
+      s = State()
+      b = BitState()
+      while not s.terminal():
+        self.assertEqual(b.s, s.s)
+        self.assertEqual(list(b.unoccupied()), s.unoccupied())
+        self.assertEqual(b.winner(), s.winner())
+        self.assertFalse(b.terminal())
+
+        player = PlayerCircle if len(s.unoccupied()) % 2 == 1 else PlayerCross
+        pos = random.choice(s.unoccupied())
+        s = takeAction(player, s, pos)
+        b = takeAction(player, b, pos)
+
+      self.assertEqual(b.s, s.s)
+      self.assertEqual(b.winner(), s.winner())
+      self.assertTrue(b.terminal())
+      self.assertEqual(observeReward(PlayerCircle, b), observeReward(PlayerCircle, s))
+
+
+  def testBitState(self):
+    b = BitState.fromTuple((PlayerCross,  PlayerCircle, PlayerCross,
+                            PlayerCross,  PlayerNone,   PlayerCircle,
+                            PlayerCircle, PlayerCross,  PlayerNone, ))
+    self.assertEqual(b, BitState(0x062, 0x08d))
+    self.assertEqual(hash(b), 0x062 | 0x08d << 9)
+
+    # Check that takeAction raises an error if we take an action on states that are occupied
+    for pos in (0, 1, 2, 3, 5, 6, 7):
+      with self.assertRaises(ValueError):
+        takeAction(PlayerCircle, b, pos)
+
+    # Check that the cross player wins by completing the diagonal through the center.
+    b = takeAction(PlayerCross, b, 4)
+    self.assertEqual(b.winner(), PlayerNone)
+    self.assertFalse(b.terminal())
+    b = takeAction(PlayerCross, b, 8)
+    self.assertEqual(b.winner(), PlayerCross)
+    self.assertTrue(b.terminal())
+
+
+  def testStateActionsBestTies(self):
+    state = State()
+    sa = StateActions(state)
+    sa.update(0, 0.5)
+    sa.update(4, 0.5)
+    sa.update(8, 0.5)
+
+    # assert that tied positions are picked uniformly at random
+    random.seed(2)
+    counts = {}
+    for _ in range(3000):
+      pos = sa.best().pos
+      counts[pos] = counts.get(pos, 0) + 1
+    self.assertEqual(sorted(counts), [0, 4, 8])
+    for pos in counts:
+      self.assertTrue(900 < counts[pos] < 1100)
+
+    # assert that the tie is broken as soon as one of the tied positions changes
+    sa.update(4, 0.2)
+    sa.update(8, 0.7)
+    self.assertEqual(sa.best().pos, 8)
+    # assert that lowering the only best position falls back to the next best ones
+    sa.update(8, -1.0)
+    self.assertEqual(sorted(set(sa.best().pos for _ in range(100))), [0])
+    sa.update(0, 0.0)
+    self.assertEqual(sa.best().score, 0.2)
+    self.assertEqual(sa.best().pos, 4)
+    sa.update(4, 0.0)
+    self.assertEqual(len(set(sa.best().pos for _ in range(500))), 8)
+
+
+  def testStateActionsBestCached(self):
+    state = State()
+    sa = StateActions(state)
+    for pos in range(9):
+      sa.update(pos, pos * 0.1)
+
+    # assert that best does not look at all the actions
+    a = sa.a
+    sa.a = None
+    self.assertEqual(sa.best().pos, 8)
+    sa.a = a
@@ -0,0 +1,191 @@
+import argparse
+import multiprocessing
+import os
+import random
+
+import numpy
+
+import evaluate
+import graph
+import minimax
+import qtable
+import tablefile
+import tictactoe
+
+# This module runs round-robin tournaments between agents, to compare them with each other rather than only with a random opponent.
+#
+# Every pair of agents plays the same number of games in both seatings, each agent moving first as the circle player in half of them.
+# Agents play greedily, picking uniformly at random among their best moves, so their moves are described by masks:
+# the masks of an Agent tell, for each player and dense state index of qtable.States, which positions it may take.
+# Games are then played in batches, in lockstep on the tables of the graph module, with NumPy operations over the whole batch,
+# and batches are spread over worker processes.
+#
+# The results are the win, draw and loss counts of every agent against every other, from which Elo ratings are fitted.
+
+# An Agent is a named player of a tournament.
+# masks[p, i, pos] tells whether the agent may take position pos in the state with index i when playing the player with index p of graph.Players.
+class Agent:
+  def __init__(self, name, masks):
+    self.name = name
+    self.masks = masks
+
+# _masks returns empty masks for both players.
+def _masks():
+  return numpy.zeros((len(graph.Players), qtable.NumStates, 9), dtype=bool)
+
+# randomAgent returns an agent taking any available position uniformly at random.
+def randomAgent(name="random"):
+  masks = _masks()
+  masks[:] = graph.legal
+  return Agent(name, masks)
+
+# minimaxAgent returns a perfect agent, taking any optimal position uniformly at random like a minimax.MinimaxAgent.
+def minimaxAgent(name="minimax"):
+  masks = _masks()
+  for p, player in enumerate(graph.Players):
+    for state, _ in minimax.playerStates(player, tictactoe.BitState):
+      masks[p, qtable.indexOf(state), minimax.optimalActions(state, player)] = True
+  return Agent(name, masks)
+
+# tableAgent returns an agent acting greedily with respect to the circle and cross action-value functions.
+# The argument stateClass must be the State implementation they have been trained with.
+def tableAgent(name, circle, cross, stateClass=tictactoe.State):
+  masks = _masks()
+  for p, q in enumerate((circle, cross)):
+    for i, actions in enumerate(evaluate.greedyTable(q, stateClass)):
+      if actions is not None:
+        masks[p, i, actions] = True
+  return Agent(name, masks)
+
+# loadAgent returns the agent of the action-value functions saved with main.py --save PREFIX, named after the prefix.
+def loadAgent(prefix):
+  circle, _ = tablefile.load(prefix + "-circle.qtable")
+  cross, _ = tablefile.load(prefix + "-cross.qtable")
+  return tableAgent(os.path.basename(prefix), circle, cross, tictactoe.BitState)
+
+
+# playGames plays games between the agents with masks first and second, where first plays circle and moves first.
+# It returns the numbers of games won by first, drawn, and lost by first.
+def playGames(first, second, games, rng):
+  state = numpy.zeros(games, dtype=numpy.int32)
+  for move in range(9):
+    p = move & 1
+    active = numpy.flatnonzero(~graph.terminal[state])
+    if len(active) == 0:
+      break
+    s = state[active]
+    mask = (first, second)[p][p, s]
+    actions = numpy.where(mask, rng.random_sample(mask.shape), -1).argmax(axis=1)
+    state[active] = graph.successors[s, p, actions]
+
+  winners = graph.winners[state]
+  wins = int((winners == tictactoe.PlayerCircle).sum())
+  losses = int((winners == tictactoe.PlayerCross).sum())
+  return wins, games - wins - losses, losses
+
+# _agentMasks holds the masks of the agents of a tournament in each worker process, set once by _initWorker.
+_agentMasks = None
+
+def _initWorker(masks):
+  global _agentMasks
+  _agentMasks = masks
+
+# _playTask plays a batch of games of a tournament in a worker process.
+def _playTask(task):
+  first, second, games, seed = task
+  return playGames(_agentMasks[first], _agentMasks[second], games, numpy.random.RandomState(seed))
+
+
+# run plays games games between every pair of agents in each seating, in batches of at most batchSize games
+# spread over workers processes, or in this process if workers is 0.
+# It returns the matrix of results, whose element [i][j] is the list of the numbers of games won, drawn and lost by agent i against agent j.
+# A fixed seed always gives the same results, whatever the number of workers.
+def run(agents, games=1000, workers=0, batchSize=10000, seed=0):
+  rng = random.Random(seed)
+  tasks = []
+  for i in range(len(agents)):
+    for j in range(len(agents)):
+      if i == j:
+        continue
+      # The games of agent i moving first against agent j.
+      for start in range(0, games, batchSize):
+        tasks.append((i, j, min(batchSize, games - start), rng.getrandbits(32)))
+
+  masks = [agent.masks for agent in agents]
+  if workers > 0:
+    pool = multiprocessing.Pool(workers, _initWorker, (masks, ))
+    try:
+      outcomes = pool.map(_playTask, tasks)
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    _initWorker(masks)
+    outcomes = [_playTask(task) for task in tasks]
+
+  results = [[[0, 0, 0] for _ in agents] for _ in agents]
+  for (i, j, _, _), (wins, draws, losses) in zip(tasks, outcomes):
+    for k, n in enumerate((wins, draws, losses)):
+      results[i][j][k] += n
+      results[j][i][2 - k] += n
+  return results
+
+
+# eloRatings returns the Elo ratings best explaining the results returned by run, with a mean of mean.
+#
+# Ratings are the maximum likelihood estimates of the Bradley-Terry model, counting a draw as half a win and half a loss,
+# in which a player rated r scores 1/(1 + 10**((r' - r)/400)) on average against a player rated r'.
+# They are found by minorization-maximization, and do not depend on the order of games, unlike Elo's incremental updates.
+# Every pair of agents is credited with one extra draw, so that an agent that never loses or never wins still has a finite rating.
+def eloRatings(results, mean=1500.0, iterations=10000, tolerance=1e-9):
+  n = len(results)
+  played = numpy.array([[sum(results[i][j]) + 1.0 if i != j else 0.0 for j in range(n)] for i in range(n)])
+  score = numpy.array([sum(results[i][j][0] + 0.5*results[i][j][1] + 0.5 for j in range(n) if j != i) for i in range(n)])
+
+  strength = numpy.ones(n)
+  for _ in range(iterations):
+    updated = score / (played / (strength[:, numpy.newaxis] + strength[numpy.newaxis, :])).sum(axis=1)
+    updated /= numpy.exp(numpy.log(updated).mean())
+    done = numpy.abs(updated - strength).max() < tolerance
+    strength = updated
+    if done:
+      break
+
+  ratings = 400 * numpy.log10(strength)
+  return [float(r) for r in ratings - ratings.mean() + mean]
+
+
+# report returns the win, draw and loss matrix of the results returned by run, and the Elo ratings of the agents, as text.
+def report(agents, results):
+  names = [agent.name for agent in agents]
+  cells = [["-" if i == j else "%d/%d/%d" % tuple(results[i][j]) for j in range(len(agents))] for i in range(len(agents))]
+  width = max([len(name) for name in names] + [len(c) for row in cells for c in row])
+  lines = ["Wins/draws/losses of each row against each column:",
+           " ".join(name.rjust(width) for name in [""] + names)]
+  for name, row in zip(names, cells):
+    lines.append(" ".join(c.rjust(width) for c in [name] + row))
+
+  lines.append("")
+  lines.append("Elo ratings:")
+  ratings = eloRatings(results)
+  for k in sorted(range(len(agents)), key=lambda k: -ratings[k]):
+    lines.append("%s %7.1f" % (names[k].rjust(width), ratings[k]))
+  return "\n".join(lines) + "\n"
+
+def main():
+  parser = argparse.ArgumentParser(description="Play a round-robin tournament between saved agents, a random agent and a perfect one.")
+  parser.add_argument("prefixes", nargs="*", help="the prefixes the action-value functions have been saved with, by main.py --save PREFIX",
+                      metavar="PREFIX")
+  parser.add_argument("--games", type=int, default=10000, help="the number of games of every pair of agents in each seating")
+  parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="the number of worker processes playing the games")
+  parser.add_argument("--batch", type=int, default=10000, help="the number of games played in lockstep by a worker")
+  parser.add_argument("--seed", type=int, default=0, help="the seed of the random choices of the agents")
+  args = parser.parse_args()
+
+  agents = [loadAgent(prefix) for prefix in args.prefixes]
+  agents += [randomAgent(), minimaxAgent()]
+  results = run(agents, args.games, args.workers, args.batch, args.seed)
+  print(report(agents, results))
+
+if __name__ == '__main__':
+  main()
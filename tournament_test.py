@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from tictactoe import *
+import minimax
+import qtable
+import tablefile
+import tournament
+
+class TestTournament(unittest.TestCase):
+
+  def testPlayGames(self):
+    perfect = tournament.minimaxAgent()
+    rnd = tournament.randomAgent()
+    rng = numpy.random.RandomState(1)
+    self.assertEqual(tournament.playGames(perfect.masks, perfect.masks, 500, rng), (0, 500, 0))
+    wins, draws, losses = tournament.playGames(perfect.masks, rnd.masks, 500, rng)
+    self.assertEqual(losses, 0)
+    self.assertGreater(wins, draws)
+    wins, draws, losses = tournament.playGames(rnd.masks, perfect.masks, 500, rng)
+    self.assertEqual(wins, 0)
+    self.assertEqual(wins + draws + losses, 500)
+
+
+  def testTableAgent(self):
+    # Tables initialized with the game-theoretic values play exactly like the minimax agent.
+    circle = qtable.ArrayActionValueFunc(PlayerCircle)
+    cross = ActionValueFunc(PlayerCross)
+    minimax.initialize(circle, BitState)
+    minimax.initialize(cross)
+    agent = tournament.tableAgent("perfect", circle, cross)
+    self.assertTrue((agent.masks == tournament.minimaxAgent().masks).all())
+
+    d = tempfile.mkdtemp()
+    try:
+      prefix = os.path.join(d, "perfect")
+      tablefile.save(prefix + "-circle.qtable", circle, tablefile.TableHeader(PlayerCircle), BitState)
+      tablefile.save(prefix + "-cross.qtable", qtable.ArrayActionValueFunc(PlayerCross), tablefile.TableHeader(PlayerCross), BitState)
+      loaded = tournament.loadAgent(prefix)
+    finally:
+      shutil.rmtree(d)
+    self.assertEqual(loaded.name, "perfect")
+    self.assertTrue((loaded.masks[0] == agent.masks[0]).all())
+    # An untrained table is indifferent among all available positions.
+    for state, _ in minimax.playerStates(PlayerCross, BitState):
+      self.assertEqual(list(numpy.flatnonzero(loaded.masks[1, qtable.indexOf(state)])), list(state.unoccupied()))
+
+
+  def testRun(self):
+    agents = [tournament.randomAgent(), tournament.minimaxAgent("perfect"), tournament.minimaxAgent("other")]
+    results = tournament.run(agents, games=300, batchSize=128, seed=4)
+    for i in range(len(agents)):
+      self.assertEqual(results[i][i], [0, 0, 0])
+      for j in range(len(agents)):
+        if i != j:
+          self.assertEqual(sum(results[i][j]), 600)
+          self.assertEqual(results[i][j], results[j][i][::-1])
+    self.assertEqual(results[1][2], [0, 600, 0])
+    self.assertEqual(results[0][1][0], 0)
+
+    # The results only depend on the seed, not on the number of workers.
+    self.assertEqual(tournament.run(agents, games=300, workers=2, batchSize=128, seed=4), results)
+
+    ratings = tournament.eloRatings(results)
+    self.assertAlmostEqual(sum(ratings) / len(ratings), 1500.0)
+    self.assertLess(ratings[0], ratings[1])
+    self.assertLess(ratings[0], ratings[2])
+    self.assertTrue("perfect" in tournament.report(agents, results))
+
+
+  def testEloRatings(self):
+    # An agent scoring three quarters of the points against another is rated 400*log10(3) higher, up to the extra draw.
+    ratings = tournament.eloRatings([[[0, 0, 0], [749, 1, 249]], [[249, 1, 749], [0, 0, 0]]], mean=0.0)
+    self.assertAlmostEqual(ratings[0] - ratings[1], 400*numpy.log10(3), places=6)
+    self.assertAlmostEqual(ratings[0], -ratings[1])
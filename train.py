@@ -1,16 +1,26 @@
+import copy
 import math
+import multiprocessing
+import os
 import random
+import time
 
+import checkpoint
+import config
+import evaluate as evaluation # the evaluate module, whose name is taken by train.evaluate below
+import graph
+import qtable
 import tictactoe
 
 # SARSA performs an update to an action-value function according to the SARSA algorithm.
-def SARSA(q, s, a, newState, epsilon, alpha, gamma):
+# The argument rng is the random number generator used to choose the next action.
+def SARSA(q, s, a, newState, epsilon, alpha, gamma, rng=random):
   reward = tictactoe.observeReward(q.player, newState)
 
   if newState.terminal():
     newQ = reward
   else:
-    newAction = tictactoe.chooseAction(q, newState, epsilon)
+    newAction = tictactoe.chooseAction(q, newState, epsilon, rng)
     newQ = q.Q(newState, newAction)
 
   newScore = q.Q(s, a) + alpha*(reward + gamma*newQ - q.Q(s, a))
@@ -25,19 +35,112 @@ def QLearning(q, s, a, newState, alpha, gamma):
   q.update(s, a, newScore)
 
 
+# Traces are the eligibility traces of a player during an episode, that is the (state, action) pairs it has taken so far,
+# weighted by how much credit they get for the rewards that follow.
+# Since a player never takes the same pair twice in a game, and takes at most as many actions as there are positions,
+# traces are held in preallocated lists of size entries, the number of positions of the board, of which the first n are in use.
+class Traces:
+  def __init__(self, size=9):
+    self.states = [None] * size
+    self.actions = [0] * size
+    self.weights = [0.0] * size
+    self.n = 0
+
+  # add adds the pair of state s and action a with a weight of 1.
+  def add(self, s, a):
+    n = self.n
+    self.states[n] = s
+    self.actions[n] = a
+    self.weights[n] = 1.0
+    self.n = n + 1
+
+# _updateTraces adds the pair (s, a) to traces, and moves the scores of all traced pairs towards the target newQ,
+# in proportion to their weights, which are then decayed by gamma*lam. If cut is True, the traces are cleared instead.
+# It returns the number of scores updated.
+def _updateTraces(q, traces, s, a, newState, newQ, alpha, gamma, lam, cut):
+  delta = tictactoe.observeReward(q.player, newState) + gamma*newQ - q.Q(s, a)
+  traces.add(s, a)
+  states, actions, weights = traces.states, traces.actions, traces.weights
+  last = traces.n - 1
+  for k in range(traces.n):
+    ts, ta = states[k], actions[k]
+    q.update(ts, ta, q.Q(ts, ta) + _at(alpha, q, ts, ta, visit=k == last)*delta*weights[k])
+    weights[k] *= gamma*lam
+  updated = traces.n
+  if cut:
+    traces.n = 0
+  return updated
+
+# SARSALambda performs an update of SARSA(lambda) to an action-value function, for the action a taken in state s,
+# after which the player observed newState and took newAction, which is ignored if newState is terminal.
+# Like in SARSA, the target of terminal states is their reward.
+# The update credits all the pairs in traces, the Traces of the player in the current episode,
+# and the number of scores updated is returned.
+def SARSALambda(q, traces, s, a, newState, newAction, alpha, gamma, lam):
+  if newState.terminal():
+    newQ = tictactoe.observeReward(q.player, newState)
+  else:
+    newQ = q.Q(newState, newAction)
+  return _updateTraces(q, traces, s, a, newState, newQ, alpha, gamma, lam, False)
+
+# QLambda performs an update of Watkins's Q(lambda), like SARSALambda, towards the best score of newState as in QLearning.
+# Since earlier pairs are only credited as long as the player acts greedily, traces are cut when newAction is exploratory.
+def QLambda(q, traces, s, a, newState, newAction, alpha, gamma, lam):
+  newQ = q.best(newState)
+  cut = not newState.terminal() and q.Q(newState, newAction) != newQ
+  return _updateTraces(q, traces, s, a, newState, newQ, alpha, gamma, lam, cut)
+
+# Algorithms maps the names of the training algorithms in config.TrainConfig to their functions.
+Algorithms = {"sarsa": SARSA, "qlearning": QLearning, "sarsalambda": SARSALambda, "qlambda": QLambda}
+
+
+# _at returns the value of epsilon or alpha for the player of q in state, or for the pair of state and pos if pos is given.
+# The argument rate is either a number or a config.VisitCount, in which case the visit is counted if visit is True.
+def _at(rate, q, state, pos=None, visit=True):
+  if isinstance(rate, config.VisitCount):
+    return rate.at(q, state, pos, visit)
+  return rate
+
+# _record records the transition of the player of q taking action a in state s and observing newState into a replay.ReplayBuffer.
+def _record(replay, q, s, a, newState):
+  replay.add(graph.playerIndex(q.player), qtable.indexOf(s), a, tictactoe.observeReward(q.player, newState),
+             qtable.indexOf(newState), newState.terminal())
+
 # runEpisode performs a single training episode by arranging two ActionValueFuncs to play against each other.
 #
-# The argument algo can be either SARSA or QLearning,
+# The argument algo can be SARSA, QLearning, SARSALambda or QLambda,
 # q is a list of the two ActionValueFuncs,
 # epsilon controls the greediness of action selection,
 # alpha controls the learning rate of the score updates,
 # and gamma is the discount rate of immediate rewards.
+# Either of epsilon and alpha may be a config.VisitCount instead of a number,
+# in which case it is looked up for every state in which an action is chosen, or every (state, action) pair that is updated.
 #
 # The first agent in the argument q moves first in the game.
-def runEpisode(algo, q, epsilon, alpha, gamma):
-  s = tictactoe.State()
-  a = tictactoe.chooseAction(q[0], s, epsilon)
+# The argument stateClass is the State implementation used for the game, e.g. tictactoe.BitState,
+# and rng is the random number generator used for all random choices.
+#
+# If replay is a replay.ReplayBuffer, the transitions of the game are recorded into it instead of updating the action-value functions,
+# and algo and alpha are ignored.
+#
+# runEpisode returns the number of score updates it has made, or transitions it has recorded.
+# For the one-step algorithms SARSA and QLearning, this is the number of moves of the game.
+#
+# Games of SARSALambda and QLambda, whose traces decay by gamma*lam, are handed to runTraceEpisode.
+# Games between two dense action-value functions played with tictactoe.BitState are handed to runGraphEpisode,
+# unless epsilon or alpha is a config.VisitCount.
+def runEpisode(algo, q, epsilon, alpha, gamma, stateClass=tictactoe.State, rng=random, replay=None, lam=0.8):
+  if replay is None and (algo == SARSALambda or algo == QLambda):
+    return runTraceEpisode(algo, q, epsilon, alpha, gamma, lam, stateClass, rng)
+  if (stateClass is tictactoe.BitState and
+      isinstance(q[0], qtable.ArrayActionValueFunc) and isinstance(q[1], qtable.ArrayActionValueFunc) and
+      not isinstance(epsilon, config.VisitCount) and not isinstance(alpha, config.VisitCount)):
+    return runGraphEpisode(algo, q, epsilon, alpha, gamma, rng, replay)
+
+  s = stateClass()
+  a = tictactoe.chooseAction(q[0], s, _at(epsilon, q[0], s), rng)
   s1 = tictactoe.takeAction(q[0].player, s, a)
+  moves = 1
   while True:
     # After the first player has made her move, let the second make his move, too.
     # The resulting state s2 is effectively the outcome of the action taken by the first player earlier.
@@ -48,13 +151,16 @@ def runEpisode(algo, q, epsilon, alpha, gamma):
     #   * the new state: "s2"
     #
     # we can update her action-value function according to the algorithm.
-    opponentAction = tictactoe.chooseAction(q[1], s1, epsilon)
+    opponentAction = tictactoe.chooseAction(q[1], s1, _at(epsilon, q[1], s1), rng)
     s2 = tictactoe.takeAction(q[1].player, s1, opponentAction)
+    moves += 1
 
-    if algo == SARSA:
-      SARSA(q[0], s, a, s2, epsilon, alpha, gamma)
+    if replay is not None:
+      _record(replay, q[0], s, a, s2)
+    elif algo == SARSA:
+      SARSA(q[0], s, a, s2, _at(epsilon, q[0], s2, visit=False), _at(alpha, q[0], s, a), gamma, rng)
     else:
-      QLearning(q[0], s, a, s2, alpha, gamma)
+      QLearning(q[0], s, a, s2, _at(alpha, q[0], s, a), gamma)
 
     # Roll forward states and switch sides.
     s = s1
@@ -65,16 +171,102 @@ def runEpisode(algo, q, epsilon, alpha, gamma):
     # When the game ends, due to a time step lag, the player that made the last move has not observed the reward yet.
     # Let her observe the terminal state and update her action-value function before leaving.
     if s1.terminal():
-      if algo == SARSA:
-        SARSA(q[0], s, a, s1, epsilon, alpha, gamma)
+      if replay is not None:
+        _record(replay, q[0], s, a, s1)
+      elif algo == SARSA:
+        SARSA(q[0], s, a, s1, _at(epsilon, q[0], s1, visit=False), _at(alpha, q[0], s, a), gamma, rng)
+      else:
+        QLearning(q[0], s, a, s1, _at(alpha, q[0], s, a), gamma)
+      break
+
+  return moves
+
+
+# runTraceEpisode performs a single training episode like runEpisode, with the algorithm SARSALambda or QLambda,
+# keeping the Traces of both players for the duration of the episode.
+# Since these algorithms need the action a player takes next, the update of a player's previous action is made
+# right after it has chosen its next one, which makes the same random choices as runEpisode.
+# runTraceEpisode returns the number of score updates it has made.
+def runTraceEpisode(algo, q, epsilon, alpha, gamma, lam, stateClass=tictactoe.State, rng=random):
+  s = stateClass()
+  size = len(s.unoccupied())
+  traces = [Traces(size), Traces(size)]
+  pending = [None, None] # the last state and action of each player, whose update is pending
+  updates = 0
+  turn = 0
+  while True:
+    player = q[turn]
+    a = tictactoe.chooseAction(player, s, _at(epsilon, player, s), rng)
+    if pending[turn] is not None:
+      updates += algo(player, traces[turn], pending[turn][0], pending[turn][1], s, a, alpha, gamma, lam)
+    pending[turn] = (s, a)
+    s = tictactoe.takeAction(player.player, s, a)
+
+    if s.terminal():
+      # Both players observe the terminal state, the one who made the last move and her opponent.
+      for t in (1 - turn, turn):
+        if pending[t] is not None:
+          updates += algo(q[t], traces[t], pending[t][0], pending[t][1], s, -1, alpha, gamma, lam)
+      return updates
+    turn = 1 - turn
+
+
+# _learnGraph updates the score of the action a taken in the state with index s by the player with index p,
+# after it has observed the state with index newState, like SARSA and QLearning.
+# The action-value function has the given values, laid out according to offs as returned by graph.offsets.
+def _learnGraph(sarsa, values, offs, p, s, a, newState, epsilon, alpha, gamma, rng):
+  reward = graph.observeReward(p, newState)
+  if not sarsa:
+    newQ = graph.best(values, offs, newState)
+  elif graph.isTerminal(newState):
+    newQ = reward
+  else:
+    newQ = values[offs[newState*9 + graph.chooseAction(values, offs, newState, epsilon, rng)]]
+
+  o = offs[s*9 + a]
+  values[o] = values[o] + alpha*(reward + gamma*newQ - values[o])
+
+# runGraphEpisode performs a single training episode like runEpisode, between two qtable.ArrayActionValueFunc,
+# but plays the game on the dense state indices of the precomputed graph module instead of State objects,
+# so that no objects are created during the game.
+# It makes exactly the same moves, random choices and updates as runEpisode with the State implementation tictactoe.State.
+def runGraphEpisode(algo, q, epsilon, alpha, gamma, rng=random, replay=None):
+  sarsa = algo == SARSA
+  values = [q[0].values, q[1].values]
+  offs = [graph.offsets(q[0]), graph.offsets(q[1])]
+  p = [graph.playerIndex(q[0].player), graph.playerIndex(q[1].player)]
+
+  s = 0 # the empty grid
+  a = graph.chooseAction(values[0], offs[0], s, epsilon, rng)
+  s1 = graph.takeAction(p[0], s, a)
+  while True:
+    opponentAction = graph.chooseAction(values[1], offs[1], s1, epsilon, rng)
+    s2 = graph.takeAction(p[1], s1, opponentAction)
+    if replay is None:
+      _learnGraph(sarsa, values[0], offs[0], p[0], s, a, s2, epsilon, alpha, gamma, rng)
+    else:
+      replay.add(p[0], s, a, graph.observeReward(p[0], s2), s2, graph.isTerminal(s2))
+
+    s = s1
+    s1 = s2
+    a = opponentAction
+    values.reverse()
+    offs.reverse()
+    p.reverse()
+
+    if graph.isTerminal(s1):
+      if replay is None:
+        _learnGraph(sarsa, values[0], offs[0], p[0], s, a, s1, epsilon, alpha, gamma, rng)
       else:
-        QLearning(q[0], s, a, s1, alpha, gamma)
+        replay.add(p[0], s, a, graph.observeReward(p[0], s1), s1, True)
       break
 
+  return 9 - len(qtable.legalActions[s1])
+
 
 # rewardPerEpisode returns the reward-per-episode of a player.
 # The reward is defined with respect to playing against a randomly acting opponent.
-def rewardPerEpisode(q, gamma):
+def rewardPerEpisode(q, gamma, stateClass=tictactoe.State, rng=random):
   if q.player == tictactoe.PlayerCircle:
     opponent = tictactoe.ActionValueFunc(tictactoe.PlayerCross)
   else:
@@ -82,18 +274,18 @@ def rewardPerEpisode(q, gamma):
 
   rpe = 0.0 # reward per episode
   t = 0 # time step
-  s = tictactoe.State()
+  s = stateClass()
 
   # Randomly determine whether the player or her opponent should move first.
-  if random.random() < 0.5:
-    a = tictactoe.chooseAction(opponent, s, 0)
+  if rng.random() < 0.5:
+    a = tictactoe.chooseAction(opponent, s, 0, rng)
     s = tictactoe.takeAction(opponent.player, s, a)
     t += 1
 
   while True:
     # Player makes a move and defers observing the reward until her opponent has made his move.
     # Only under the special case where the move is the last move should the player observe reward before exiting.
-    a = tictactoe.chooseAction(q, s, 0)
+    a = tictactoe.chooseAction(q, s, 0, rng)
     s1 = tictactoe.takeAction(q.player, s, a)
     t += 1
     if s1.terminal():
@@ -102,7 +294,7 @@ def rewardPerEpisode(q, gamma):
       break
 
     # Opponent make a move, and the resulting state is observed by player to calculate her reward.
-    opponentAction = tictactoe.chooseAction(opponent, s1, 0)
+    opponentAction = tictactoe.chooseAction(opponent, s1, 0, rng)
     s2 = tictactoe.takeAction(opponent.player, s1, opponentAction)
     t += 1
     reward = tictactoe.observeReward(q.player, s2)
@@ -115,26 +307,182 @@ def rewardPerEpisode(q, gamma):
   return rpe
 
 
+# evaluate returns the average reward-per-episode of a player over a number of games against a randomly acting opponent.
+def evaluate(q, gamma, games, stateClass=tictactoe.State, rng=random):
+  rpe = 0.0
+  for _ in range(games):
+    rpe += rewardPerEpisode(q, gamma, stateClass, rng)
+  return rpe / games
+
+
+# An EvalSchedule determines how the circle player is evaluated during training:
+# after every evalEvery training episodes, its reward-per-episode is averaged over evalGames games.
+#
+# Evaluating only periodically keeps the cost of monitoring a small fraction of training,
+# while averaging over many games at once gives a less noisy metric.
+# If background is True, evaluations are run in a separate process on a snapshot of the action-value function,
+# so that training does not wait for them at all.
+# If exact is True, the exact expectation of the reward-per-episode is computed by evaluate.expectedReward instead of sampling games,
+# and evalGames is ignored.
+class EvalSchedule:
+  def __init__(self, evalEvery=10000, evalGames=1000, background=False, exact=False):
+    self.evalEvery = evalEvery
+    self.evalGames = evalGames
+    self.background = background
+    self.exact = exact
+
+  # evaluate returns the reward-per-episode of the player of q according to this schedule.
+  def evaluate(self, q, gamma, stateClass, rng=random):
+    if self.exact:
+      return evaluation.expectedReward(q, gamma, stateClass)
+    return evaluate(q, gamma, self.evalGames, stateClass, rng)
+
+
+# _evaluateSnapshot evaluates a snapshot of an action-value function in a background process,
+# with a random number generator of its own seeded by seed.
+def _evaluateSnapshot(schedule, q, gamma, stateClass, seed):
+  return schedule.evaluate(q, gamma, stateClass, random.Random(seed))
+
+
+# plateaued returns whether a list of (episode, reward-per-episode) evaluations has stopped improving,
+# that is the last patience evaluations have not exceeded the best earlier one by more than minDelta.
+# If patience is None, plateaued always returns False.
+def plateaued(evaluations, patience, minDelta=0.0):
+  if patience is None:
+    return False
+  best = None
+  since = 0
+  for _, rpe in evaluations:
+    if best is None or rpe > best + minDelta:
+      best = rpe
+      since = 0
+    else:
+      since += 1
+  return since >= patience
+
+
 # run runs a number of training episodes for an algorithm on two opposite players, circle and cross.
-# The supported algorithms are SARSA and Q-learning.
-# The arguments circle and cross are of type tictactoe.ActionValueFunc.
-def run(algo, circle, cross):
-  alpha = 0.1 # learning rate
-  gamma = 0.9 # discount of reward
-
-  rpeCircle = 0.0 # reward per episodes for the circle player
-  totalEpisodes = 400000
-  for epi in range(totalEpisodes):
-    if random.random() < 0.5:
-      q = [circle, cross]
+# The supported algorithms are SARSA, Q-learning, SARSA(lambda) and Watkins's Q(lambda).
+# The arguments circle and cross are of type tictactoe.ActionValueFunc,
+# stateClass is the State implementation the games are played with,
+# and schedule is the EvalSchedule of circle.
+#
+# The hyperparameters of the session are given by cfg, a config.TrainConfig, whose algo field is ignored.
+# If totalEpisodes is None, cfg.episodes episodes are run.
+# Training stops early as soon as the evaluations of circle have plateaued according to the patience and minDelta of cfg.
+#
+# If telemetry is a telemetry.Telemetry, the session is instrumented and recorded by it.
+# If metrics is a metrics.Metrics, a record of both players is logged by it with the result of every evaluation,
+# as soon as the evaluation is reported, and evaluations are not printed.
+#
+# If checkpoints is a checkpoint.CheckpointSchedule, the session is saved according to it.
+# If resume is True as well and a checkpoint exists, the session continues from that checkpoint,
+# with exactly the same results as if it had never been interrupted.
+#
+# All random choices of the session are made with the random number generator rng,
+# so that a seeded generator always produces the same session.
+#
+# run returns the list of (episode, reward-per-episode) evaluations of circle during training.
+def run(algo, circle, cross, stateClass=tictactoe.State, schedule=None, totalEpisodes=None, checkpoints=None, resume=False,
+        rng=random, cfg=None, telemetry=None, metrics=None):
+  if schedule is None:
+    schedule = EvalSchedule()
+  if cfg is None:
+    cfg = config.TrainConfig()
+  if totalEpisodes is None:
+    totalEpisodes = cfg.episodes
+  gamma = cfg.gamma
+  rates = (cfg.alpha, cfg.epsilon)
+
+  evaluations = []
+  start = 1
+  if resume and checkpoints is not None and os.path.exists(checkpoints.path):
+    done, evaluations = checkpoint.load(checkpoints.path, circle, cross, rng, rates)
+    start = done + 1
+    print("resuming from episode %s" % done)
+
+  def report(epi, rpe):
+    evaluations.append((epi, rpe))
+    if metrics is None:
+      print("episode: %s, reward-per-episode: %s" % (epi, rpe))
     else:
-      q = [cross, circle]
+      metrics.record(epi, circle, cross, cfg.epsilon.value(epi), cfg.alpha.value(epi), gamma, stateClass, rpe, schedule.exact)
+
+  pool = None
+  if schedule.background:
+    pool = multiprocessing.Pool(1)
+  pending = [] # background evaluations not reported yet, as pairs of episode and multiprocessing.AsyncResult
+
+  if metrics is not None:
+    metrics.begin(start - 1)
+
+  try:
+    reported = -1 # the number of evaluations when early stopping was last checked
+    for epi in range(start, totalEpisodes + 1):
+      if len(evaluations) != reported:
+        reported = len(evaluations)
+        if plateaued(evaluations, cfg.patience, cfg.minDelta):
+          print("stopping early at episode %s" % (epi - 1))
+          if telemetry is not None:
+            telemetry.record(epi - 1, circle, cross, True)
+          if checkpoints is not None:
+            while pending:
+              e, result = pending.pop(0)
+              report(e, result.get())
+            checkpoint.save(checkpoints.path, circle, cross, epi - 1, evaluations, rng, rates)
+          break
+
+      if rng.random() < 0.5:
+        q = [circle, cross]
+      else:
+        q = [cross, circle]
+
+      alpha = cfg.alpha.value(epi) # learning rate
+      epsilon = cfg.epsilon.value(epi) # epsilon in the epsilon-greedy action selection
+      if telemetry is None:
+        runEpisode(algo, q, epsilon, alpha, gamma, stateClass, rng, lam=cfg.lam)
+      else:
+        telemetry.episode(epi, lambda: runEpisode(algo, q, epsilon, alpha, gamma, stateClass, rng, lam=cfg.lam))
+
+      if epi % schedule.evalEvery == 0 or epi == totalEpisodes:
+        evalStart = time.time()
+        if pool is None:
+          report(epi, schedule.evaluate(circle, gamma, stateClass, rng))
+        else:
+          snapshot = copy.deepcopy(circle)
+          seed = int(rng.random() * 2**32)
+          pending.append((epi, pool.apply_async(_evaluateSnapshot, (schedule, snapshot, gamma, stateClass, seed))))
+        if telemetry is not None:
+          games = schedule.evalGames
+          if schedule.exact:
+            games = 0
+          telemetry.evaluation(time.time() - evalStart, games)
+
+      if telemetry is not None:
+        telemetry.record(epi, circle, cross, epi == totalEpisodes)
+
+      # Report background evaluations as soon as they finish, in order.
+      while pending and pending[0][1].ready():
+        e, result = pending.pop(0)
+        report(e, result.get())
+
+      if checkpoints is not None and checkpoints.due(epi, totalEpisodes):
+        # Wait for background evaluations so that the checkpoint contains all evaluations up to now.
+        while pending:
+          e, result = pending.pop(0)
+          report(e, result.get())
+        checkpoint.save(checkpoints.path, circle, cross, epi, evaluations, rng, rates)
+        checkpoints.last = time.time()
+        if metrics is not None:
+          metrics.flush()
 
-    epsilon = 0.1 # epsilon in the epsilon-greedy action selection
-    runEpisode(algo, q, epsilon, alpha, gamma)
+    for e, result in pending:
+      report(e, result.get())
+  finally:
+    if pool is not None:
+      pool.close()
+      pool.join()
+    if metrics is not None:
+      metrics.flush()
 
-    rpeCircle += rewardPerEpisode(circle, gamma)
-    acc = 1000
-    if epi % acc == 0:
-      print("episode: %s, reward-per-episode: %s" % (epi, rpeCircle / acc))
-      rpeCircle = 0.0
+  return evaluations
@@ -1,7 +1,16 @@
+import os
+import random
+import shutil
+import tempfile
 import unittest
 
 from tictactoe import *
 from train import *
+import checkpoint
+import config
+import evaluate
+import mnk
+import qtable
 
 class TestTrain(unittest.TestCase):
 
@@ -44,3 +53,147 @@ class TestTrain(unittest.TestCase):
     self.assertEqual(q.Q(state, action), ScoreDraw)
     QLearning(q, state, action, newState, alpha, gamma)
     self.assertEqual(q.Q(state, action), -0.1)
+
+
+  def testTraces(self):
+    q = ActionValueFunc(PlayerCircle)
+    traces = Traces()
+    s0 = takeAction(PlayerCross, State(), 4)
+    s1 = takeAction(PlayerCross, takeAction(PlayerCircle, s0, 0), 8)
+    s2 = takeAction(PlayerCircle, s1, 1)
+    s3 = takeAction(PlayerCircle, takeAction(PlayerCross, s2, 6), 2) # circle wins with 0, 1 and 2
+
+    # No reward yet, so the first update changes nothing, and the greedy action 1 keeps the trace.
+    self.assertEqual(QLambda(q, traces, s0, 0, s1, 1, 0.5, 0.9, 0.5), 1)
+    self.assertEqual(q.Q(s0, 0), ScoreDraw)
+    # The win credits the last action fully, and the first one discounted by gamma*lambda.
+    self.assertEqual(QLambda(q, traces, s1, 1, s3, -1, 0.5, 0.9, 0.5), 2)
+    self.assertEqual(q.Q(s1, 1), 0.5)
+    self.assertAlmostEqual(q.Q(s0, 0), 0.5 * 0.45)
+    self.assertEqual(traces.n, 2)
+
+    # Watkins's Q(lambda) cuts the traces after an exploratory action, SARSA(lambda) does not.
+    q.update(s1, 3, 0.25)
+    for algo, n in ((QLambda, 0), (SARSALambda, 1)):
+      traces = Traces()
+      algo(q, traces, s0, 0, s1, 5, 0.5, 0.9, 0.5)
+      self.assertEqual(traces.n, n)
+
+
+  def testTraceEpisodes(self):
+    # With lambda = 0, Q(lambda) makes the same updates as Q-learning.
+    tables = []
+    for algo in (QLearning, QLambda):
+      q = [ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross)]
+      rng = random.Random(3)
+      for i in range(200):
+        runEpisode(algo, [q[i & 1], q[1 - (i & 1)]], 0.3, 0.5, 0.9, State, rng, lam=0.0)
+      tables.append(q)
+    for a, b in zip(*tables):
+      self.assertEqual(len(a.stateActions), len(b.stateActions))
+      for state, sa in a.stateActions.items():
+        for ps in sa.a:
+          self.assertEqual(b.Q(state, ps.pos), ps.score)
+
+    # Traces make more updates than there are moves, and train.run supports them.
+    q = [ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross)]
+    self.assertTrue(runEpisode(SARSALambda, q, 1.0, 0.5, 0.9, BitState, random.Random(1), lam=0.9) > 5)
+    for algo in ("sarsalambda", "qlambda"):
+      cfg = config.TrainConfig(algo=algo, episodes=100, lam=0.5)
+      evaluations = run(Algorithms[algo], ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross),
+                        schedule=EvalSchedule(evalEvery=50, exact=True), cfg=cfg)
+      self.assertEqual(len(evaluations), 2)
+
+    # On larger boards, a player takes more than 9 actions in a game, and traces grow with the board.
+    board = mnk.Board(5, 5, 4)
+    for algo in (SARSALambda, QLambda):
+      q = [qtable.SparseActionValueFunc(PlayerCircle), qtable.SparseActionValueFunc(PlayerCross)]
+      rng = random.Random(2)
+      for _ in range(20):
+        self.assertTrue(runEpisode(algo, q, 1.0, 0.5, 0.9, board, rng, lam=0.8) > 0)
+
+
+  def testRunEvalSchedule(self):
+    # assert that circle is evaluated every evalEvery episodes and at the end of training,
+    # both when evaluating in the foreground and in the background.
+    for background in (False, True):
+      circle = ActionValueFunc(PlayerCircle)
+      cross = ActionValueFunc(PlayerCross)
+      schedule = EvalSchedule(evalEvery=40, evalGames=20, background=background)
+      evaluations = run(QLearning, circle, cross, schedule=schedule, totalEpisodes=100)
+
+      self.assertEqual([epi for epi, _ in evaluations], [40, 80, 100])
+      for _, rpe in evaluations:
+        self.assertTrue(ScoreLose <= rpe <= ScoreWin)
+
+
+  def testRunExactEvaluation(self):
+    circle = ActionValueFunc(PlayerCircle)
+    cross = ActionValueFunc(PlayerCross)
+    schedule = EvalSchedule(evalEvery=50, exact=True)
+    evaluations = run(QLearning, circle, cross, schedule=schedule, totalEpisodes=50)
+
+    # assert that the exact evaluation is reported
+    self.assertEqual(evaluations, [(50, evaluate.expectedReward(circle, 0.9))])
+
+
+  def testRunResume(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      path = os.path.join(tmp, "checkpoint")
+      schedule = EvalSchedule(evalEvery=20, evalGames=10)
+
+      # An uninterrupted session.
+      random.seed(9)
+      circle = ActionValueFunc(PlayerCircle)
+      cross = ActionValueFunc(PlayerCross)
+      expected = run(SARSA, circle, cross, schedule=schedule, totalEpisodes=100)
+
+      # A session stopped after 60 episodes, and resumed in fresh objects from its checkpoint.
+      random.seed(9)
+      run(SARSA, ActionValueFunc(PlayerCircle), ActionValueFunc(PlayerCross), schedule=schedule, totalEpisodes=60,
+          checkpoints=checkpoint.CheckpointSchedule(path, every=30))
+      random.seed(0)
+      resumedCircle = ActionValueFunc(PlayerCircle)
+      resumedCross = ActionValueFunc(PlayerCross)
+      evaluations = run(SARSA, resumedCircle, resumedCross, schedule=schedule, totalEpisodes=100,
+                        checkpoints=checkpoint.CheckpointSchedule(path, every=30), resume=True)
+
+      # assert that the resumed session ends exactly like the uninterrupted one
+      self.assertEqual(evaluations, expected)
+      for q, resumed in ((circle, resumedCircle), (cross, resumedCross)):
+        self.assertEqual(set(q.stateActions), set(resumed.stateActions))
+        for state, sa in q.stateActions.items():
+          for ps in sa.a:
+            self.assertEqual(resumed.Q(state, ps.pos), ps.score)
+    finally:
+      shutil.rmtree(tmp)
+
+
+  def testRunSchedules(self):
+    circle = ActionValueFunc(PlayerCircle)
+    cross = ActionValueFunc(PlayerCross)
+    cfg = config.TrainConfig(episodes=100, alpha=config.VisitCount(0.5, 1), epsilon=config.Linear(1.0, 0.0, 50))
+    run(QLearning, circle, cross, schedule=EvalSchedule(evalEvery=50, evalGames=10), cfg=cfg)
+
+    # assert that every update has been counted, at least the one for the first move of each of the 100 games
+    self.assertTrue(sum(cfg.alpha.counts.values()) >= 100)
+    # assert that the learning rate of a pair has decayed with its visits
+    (player, state, pos), n = max(cfg.alpha.counts.items(), key=lambda kv: kv[1])
+    self.assertTrue(n > 1)
+    self.assertEqual(cfg.alpha.at(ActionValueFunc(player), state, pos, visit=False), 0.5 / (1 + n))
+
+
+  def testRunEarlyStopping(self):
+    self.assertFalse(plateaued([(1, 0.1), (2, 0.2), (3, 0.3)], 2))
+    self.assertTrue(plateaued([(1, 0.3), (2, 0.2), (3, 0.3)], 2))
+    self.assertFalse(plateaued([(1, 0.3), (2, 0.2), (3, 0.3)], None))
+    self.assertTrue(plateaued([(1, 0.1), (2, 0.15), (3, 0.18)], 2, minDelta=0.1))
+
+    # assert that training stops after patience evaluations without improvement,
+    # which is certain for a learning rate of zero since circle never changes
+    circle = ActionValueFunc(PlayerCircle)
+    cross = ActionValueFunc(PlayerCross)
+    cfg = config.TrainConfig(episodes=1000, alpha=config.Constant(0.0), patience=2)
+    evaluations = run(QLearning, circle, cross, schedule=EvalSchedule(evalEvery=10, exact=True), cfg=cfg)
+    self.assertEqual([epi for epi, _ in evaluations], [10, 20, 30])